@@ -29,6 +29,9 @@ from ansible.utils.display import Display
 
 display = Display()
 
+# modules keeping a controller side cache, see cache_key
+CACHING_MODULES = ('ocnos_facts', 'ocnos_config')
+
 
 class ActionModule(ActionNetworkModule):
 
@@ -36,6 +39,12 @@ class ActionModule(ActionNetworkModule):
         del tmp  # tmp no longer has any effect
 
         self._config_module = True if '_config' in self._task.action else False
+
+        # the controller side caches are kept per inventory host
+        module_name = (getattr(self._task, 'resolved_action', None) or self._task.action).rpartition('.')[2]
+        if module_name in CACHING_MODULES and not self._task.args.get('cache_key'):
+            self._task.args['cache_key'] = task_vars.get('inventory_hostname')
+
         socket_path = None
         if self._play_context.connection == 'local':
             provider = load_provider(ocnos_provider_spec, self._task.args)
@@ -15,22 +15,70 @@
 
 from ansible.plugins.action import ActionBase
 from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.utils.display import Display
 from datetime import datetime
+import gzip
+import hashlib
+import json
+import os
 import re
-import time
-from netmiko import ConnectHandler
-from paramiko.proxy import ProxyCommand
+import tempfile
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool, CLI, SHELL
 
 display = Display()
 
+
+def atomic_write(path, write):
+    """Call write with a file object and move the file to path once written"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def time_stamper(file, time_stamp):
+    """Insert time_stamp before the extension of file, leaf1.dc1.cfg -> leaf1.dc1_<time_stamp>.cfg"""
+    name, ext = os.path.splitext(file)
+    return f'{name}_{time_stamp}{ext}'
+
+
+def write_backup(dest_dir, name, export_file, content, digests):
+    """
+    Write a dump gzip compressed as export_file in dest_dir, unless it has the
+    same digest as the previous backup of name recorded in digests.
+    Returns the backup entry of the result.
+    """
+    data = content.encode('utf-8', errors='surrogateescape')
+    digest = hashlib.sha256(data).hexdigest()
+    previous = digests.get(name)
+    if previous and previous['sha256'] == digest and os.path.exists(os.path.join(dest_dir, previous['file'])):
+        return {'file': previous['file'], 'sha256': digest, 'changed': False}
+
+    def write(f):
+        with gzip.GzipFile(filename=name, fileobj=f, mode='wb', mtime=0) as gz:
+            gz.write(data)
+
+    atomic_write(os.path.join(dest_dir, export_file), write)
+    digests[name] = {'file': export_file, 'sha256': digest}
+    return {'file': export_file, 'sha256': digest, 'changed': True}
+
+
 class ActionModule(ActionBase):
     def run(self, tmp=None, task_vars=None):
         
         inventory_hostname = task_vars.get('inventory_hostname')
 
+        # controller directory the dumps are streamed to, instead of a remote server
+        dest_dir = self._task.args.get('dest_dir')
+
         required_args = ['remote_host', 'remote_path', 'remote_username', 'remote_password']
-        missing_args = [arg for arg in required_args if self._task.args.get(arg) is None]
+        missing_args = [arg for arg in required_args if self._task.args.get(arg) is None and not dest_dir]
 
         if missing_args:
             raise AnsibleError(f"Missing required arguments: {', '.join(missing_args)}")
@@ -42,6 +90,10 @@ class ActionModule(ActionBase):
         remote_password = self._task.args.get('remote_password')
         node_type = self._task.args.get('node_type','physical')
         trans = self._task.args.get('transport','scp')
+        # the dumps run in parallel in the shell and are copied as one archive
+        parallel_dump = boolean(self._task.args.get('parallel_dump', False))
+        # seconds to wait for the prompt to come back after a dump
+        dump_timeout = int(self._task.args.get('dump_timeout', 300))
 
         if trans == 'scp' or trans =='ftp':
             pass
@@ -49,99 +101,104 @@ class ActionModule(ActionBase):
             raise AnsibleError("Module only supports ftp or scp transport types")
         
         # Extract OcNOS connection details from inventory
-        host = self._task.args.get('ansible_host') or task_vars.get('ansible_host')
-        username = self._task.args.get('ansible_ssh_user') or task_vars.get('ansible_ssh_user')
-        password = self._task.args.get('ansible_ssh_pass') or task_vars.get('ansible_ssh_pass')
-        port = str(self._task.args.get('ansible_port') or task_vars.get('ansible_port') or 22)
-        
-        connection_dict = {
-            'host': host,
-            'username': username,
-            'password': password,
-            'device_type': 'ipinfusion_ocnos'
-            }
-            
-        if not all(connection_dict.values()):
-            raise AnsibleError("Missing OcNOS connection details in inventory/task vars.")
+        params = get_connection_params(self._task.args, task_vars)
 
         result = {'changed': False, 'copied_files': [], 'failed': False}
 
-        #Handle SSH Proxy or Jump Server Setting
-        proxy_cmd = (
-                self._task.args.get('ansible_ssh_common_args')
-                or task_vars.get('ansible_ssh_common_args')
-        )
-       
-        if proxy_cmd:
-            proxy_cmd = proxy_cmd.strip()
-
-            if proxy_cmd.startswith("-o ProxyCommand="):
-                # Remove the prefix
-                proxy_cmd = proxy_cmd.replace("-o ProxyCommand=", "", 1).strip()
-                # Strip surrounding quotes
-                proxy_cmd = proxy_cmd.strip('"').strip("'")
-
-            # Replace %h and %p placeholders with actual host/port
-            proxy_cmd = proxy_cmd.replace("%h", host).replace("%p", port)
-
-            connection_dict['sock'] = ProxyCommand(proxy_cmd)
-
         try:
-            # Try to establish a connection to the DUT using netmiko 
-            session = ConnectHandler(**connection_dict)
-            
-            #Enter into Debian Linux
-            session.enable()
-            
-            time_stamp = str(datetime.now()).split('.')[0].replace(' ','_')
-            cmd_list = []
-
-            json_cmd = f'show json running > /var/log/{inventory_hostname}.json'
-            cmd_list.append(json_cmd)
-            xml_cmd = f'show xml running > /var/log/{inventory_hostname}.xml'
-            cmd_list.append(xml_cmd)
-            cli_cmd =  f'show running > /var/log/{inventory_hostname}.cfg'
-            cmd_list.append(cli_cmd)
-            
-            def time_stamper(file, time_stamp):
-                m = file.split('.')
-                m.insert(1,time_stamp)
-                file_name = m[0]+'_'+m[1]+'.'+m[2]
-                return file_name
+            # Get an enabled netmiko session to the DUT from the task session pool
+            with get_pool().session(params) as session:
+                time_stamp = str(datetime.now()).split('.')[0].replace(' ','_')
+                dump_list = [
+                    ('show json running', f'{inventory_hostname}.json'),
+                    ('show xml running', f'{inventory_hostname}.xml'),
+                    ('show running', f'{inventory_hostname}.cfg'),
+                ]
             
-            for cmds in cmd_list:
-                display.display(f'dumping {cmds}')
-                session.send_command(cmds)
-                time.sleep(60)
-            
-            file_list = [f'{inventory_hostname}.json', f'{inventory_hostname}.xml', f'{inventory_hostname}.cfg']
-            state = 1
-            copy_list = []
-            result['output'] = ''
-
-            for file in file_list:
-                export_file = time_stamper(file,time_stamp)
-                copy_list.append(export_file)
-                if node_type == 'vm':
-                    copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file}'
+                if dest_dir:
+                    result.update(self._stream_backups(session, dump_list, dest_dir, inventory_hostname,
+                                                       time_stamp, dump_timeout))
+                    return result
+
+                # The prompt only comes back once a dump is written, so waiting
+                # for it replaces a fixed sleep per dump.
+                if parallel_dump:
+                    archive = f'{inventory_hostname}.tar.gz'
+                    jobs = ' & '.join(f"cmlsh -e '{show}' > {file}" for show, file in dump_list)
+                    files = ' '.join(file for show, file in dump_list)
+                    session.set_mode(SHELL)
+                    display.display(f'dumping {len(dump_list)} configurations in parallel into {archive}')
+                    session.send_command(f'cd /var/log && {{ {jobs} & wait; }} && tar czf {archive} {files}',
+                                         expect_string='#', read_timeout=dump_timeout)
+                    session.set_mode(CLI)
+                    file_list = [archive]
+                    export_list = [f'{inventory_hostname}_{time_stamp}.tar.gz']
                 else:
-                    copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file} vrf management'
-                display.display(copy_cmd)
-                output = session.send_command(copy_cmd, expect_string='#', read_timeout=60)
-                display.display(f'copying file {file} to {remote_host} and then wait for 2 seconds')
-                time.sleep(2)
-                if "Copy Success" in output or "copy success" in output.lower():
-                    state = 0
-                    result['output'] += output
+                    for show, file in dump_list:
+                        cmds = f'{show} > /var/log/{file}'
+                        display.display(f'dumping {cmds}')
+                        session.send_command(cmds, expect_string='#', read_timeout=dump_timeout)
+                    file_list = [file for show, file in dump_list]
+                    export_list = [time_stamper(file,time_stamp) for file in file_list]
+
+                state = 1
+                copy_list = []
+                result['output'] = ''
+
+                for file, export_file in zip(file_list, export_list):
+                    copy_list.append(export_file)
+                    if node_type == 'vm':
+                        copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file}'
+                    else:
+                        copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file} vrf management'
+                    display.display(copy_cmd)
+                    output = session.send_command(copy_cmd, expect_string='#', read_timeout=60)
+                    display.display(f'copied file {file} to {remote_host}')
+                    if "Copy Success" in output or "copy success" in output.lower():
+                        state = 0
+                        result['output'] += output
             
-                if state:
-                    raise AnsibleError(f"Copy failed for {file}: {output}")    
-                else:
-                    result['changed'] = True
+                    if state:
+                        raise AnsibleError(f"Copy failed for {file}: {output}")    
+                    else:
+                        result['changed'] = True
         
-            result['copied_files'].append(copy_list)
-            result['backup_location'] = f'{remote_path}@{remote_host}'
+                result['copied_files'].append(copy_list)
+                result['backup_location'] = f'{remote_path}@{remote_host}'
         
         except Exception as e:
             raise AnsibleError(f"OcNOS Configuration Backup failed: {str(e)}")
-        return result        
+        return result
+
+    def _stream_backups(self, session, dump_list, dest_dir, inventory_hostname, time_stamp, dump_timeout):
+        """
+        Read every dump over the session and write it compressed into dest_dir
+        on the controller. Nothing is staged on the device and a dump identical
+        to the previous backup is not written again.
+        """
+        dest_dir = os.path.abspath(os.path.expanduser(dest_dir))
+        os.makedirs(dest_dir, exist_ok=True)
+
+        manifest = os.path.join(dest_dir, f'{inventory_hostname}.digests.json')
+        digests = {}
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                digests = json.load(f)
+
+        backups = []
+        for show, file in dump_list:
+            display.display(f'reading {show}')
+            content = session.send_command(show, read_timeout=dump_timeout)
+            backup = write_backup(dest_dir, file, time_stamper(file, time_stamp) + '.gz', content, digests)
+            if not backup['changed']:
+                display.display(f'{file} is unchanged since {backup["file"]}')
+            backups.append(backup)
+
+        if any(backup['changed'] for backup in backups):
+            atomic_write(manifest, lambda f: f.write(json.dumps(digests, indent=2, sort_keys=True).encode('utf-8')))
+
+        return {
+            'changed': any(backup['changed'] for backup in backups),
+            'backup_files': backups,
+            'backup_location': dest_dir,
+        }        
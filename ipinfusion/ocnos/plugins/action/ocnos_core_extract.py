@@ -15,14 +15,76 @@
 
 from ansible.plugins.action import ActionBase
 from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.utils.display import Display
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
 import re
-import time
-from netmiko import ConnectHandler
-from paramiko.proxy import ProxyCommand
+import tempfile
+import threading
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import DEFAULT_CACHE_DIR
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool, wait_until, CLI, SHELL
 
 display = Display()
 
+
+class CoreManifest(object):
+    """Controller side record of the cores already copied, to resume an interrupted extraction"""
+
+    def __init__(self, path):
+        self.path = path
+        self.copied = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.copied = json.load(f).get('copied', {})
+
+    def add(self, core_file, dest_filename):
+        with self._lock:
+            self.copied[core_file] = dest_filename
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'copied': self.copied}, f)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def file_size(session, path):
+    """Return the size of a file of the device from the root shell, or None"""
+    output = session.send_command(f'stat -c %s {path} 2>/dev/null || echo missing')
+    match = re.search(r'(\d+)\s*$', re.sub(r'\x1B\[[0-?]*[ -/]*[@-~]', '', output))
+    return int(match.group(1)) if match else None
+
+
+def file_in_use(session, path):
+    """
+    Return whether a process of the device has a file open, from the root
+    shell. Returns None when neither fuser nor lsof is on the device.
+    """
+    output = session.send_command(
+        f'if command -v fuser >/dev/null; then fuser -s {path} && echo in-use || echo closed; '
+        f'elif command -v lsof >/dev/null; then lsof {path} >/dev/null 2>&1 && echo in-use || echo closed; '
+        f'else echo unknown; fi')
+    match = re.search(r'(in-use|closed|unknown)\s*$', re.sub(r'\x1B\[[0-?]*[ -/]*[@-~]', '', output))
+    if not match or match.group(1) == 'unknown':
+        return None
+    return match.group(1) == 'in-use'
+
+
+def remove_file(session, path):
+    """Remove a file of the device from the root shell, a failure is only displayed"""
+    try:
+        session.set_mode(SHELL)
+        session.send_command(f'rm -f {path}', expect_string='#')
+    except Exception as e:
+        display.warning(f'could not remove {path} from the device: {str(e)}')
+
+
 class ActionModule(ActionBase):
     def run(self, tmp=None, task_vars=None):
         # Collect task arguments
@@ -32,6 +94,12 @@ class ActionModule(ActionBase):
         remote_password = self._task.args.get('remote_password')
         node_type = self._task.args.get('node_type','physical')
         trans = self._task.args.get('transport','scp')
+        # number of cores processed and copied at the same time
+        max_transfers = int(self._task.args.get('max_transfers', 2))
+        # seconds to wait for the GDB log of a core to be written
+        ready_timeout = int(self._task.args.get('ready_timeout', 300))
+        # gzip the core artifacts on the device before the copy
+        compress = boolean(self._task.args.get('compress', False))
 
         if trans == 'scp' or trans =='ftp':
             pass
@@ -39,89 +107,119 @@ class ActionModule(ActionBase):
             raise AnsibleError("Module only supports ftp or scp transport types")
 
         # Extract OcNOS connection details from inventory
-        host = self._task.args.get('ansible_host') or task_vars.get('ansible_host')
-        username = self._task.args.get('ansible_ssh_user') or task_vars.get('ansible_ssh_user')
-        password = self._task.args.get('ansible_ssh_pass') or task_vars.get('ansible_ssh_pass')
-        port = str(self._task.args.get('ansible_port') or task_vars.get('ansible_port') or 22)
+        params = get_connection_params(self._task.args, task_vars)
         inventory_hostname = task_vars.get('inventory_hostname')
 
-        connection_dict = {
-            'host': host,
-            'username': username,
-            'password': password,
-            'device_type': 'ipinfusion_ocnos'
-        }
-
-        if not all(connection_dict.values()):
-            raise AnsibleError("Missing OcNOS connection details in inventory/task vars.")
+        manifest = CoreManifest(self._task.args.get('manifest') or os.path.join(
+            os.path.expanduser(DEFAULT_CACHE_DIR), inventory_hostname, 'core_extract.json'))
 
         result = {'changed': False, 'copied_files': [], 'copy_stats': '', 'failed': False}
 
-        #Handle SSH Proxy or Jump Server Setting
-        proxy_cmd = (
-                self._task.args.get('ansible_ssh_common_args')
-                or task_vars.get('ansible_ssh_common_args')
-        )
-
-        if proxy_cmd:
-            proxy_cmd = proxy_cmd.strip()
-
-            if proxy_cmd.startswith("-o ProxyCommand="):
-                # Remove the prefix
-                proxy_cmd = proxy_cmd.replace("-o ProxyCommand=", "", 1).strip()
-                # Strip surrounding quotes
-                proxy_cmd = proxy_cmd.strip('"').strip("'")
-
-            # Replace %h and %p placeholders with actual host/port
-            proxy_cmd = proxy_cmd.replace("%h", host).replace("%p", port)
-
-            connection_dict['sock'] = ProxyCommand(proxy_cmd)
+        def copy(conn, artifact, dest_filename):
+            if node_type == 'vm':
+                copy_cmd = (
+                    f"copy filepath {artifact} "
+                    f"{trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{dest_filename}"
+                )
+            else:
+                copy_cmd = (
+                    f"copy filepath {artifact} "
+                    f"{trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{dest_filename} vrf management"
+                )
+            display.display(f'copying {artifact} to {remote_host}')
+            return conn.send_command(copy_cmd, expect_string='#', read_timeout=max(60, ready_timeout))
+
+        def extract(file):
+            # every worker uses its own session, a copy blocks the CLI
+            with get_pool().session(params) as conn:
+                details_output = conn.send_command(f'show core {file} details', read_timeout=60)
+                match = re.search(r'core_.*', details_output)
+                if not match:
+                    return None
+                artifact = f'/tmp/{match.group()}'
+                dest_filename = f"{inventory_hostname}_{match.group()}"
+
+                # the GDB log is ready once it is written and no process
+                # has it open any more
+                conn.set_mode(SHELL)
+                sizes = []
+                warned = []
+
+                def is_ready():
+                    sizes.append(file_size(conn, artifact))
+                    if not sizes[-1]:
+                        return False
+                    in_use = file_in_use(conn, artifact)
+                    if in_use is None:
+                        # without fuser or lsof, a size unchanged between
+                        # two polls is the only sign left
+                        if not warned:
+                            warned.append(artifact)
+                            display.warning(f'neither fuser nor lsof is on {inventory_hostname}, '
+                                            f'{artifact} is taken as written once its size stops changing')
+                        return len(sizes) > 1 and sizes[-1] == sizes[-2]
+                    return not in_use
+
+                if not wait_until(is_ready, ready_timeout, interval=2, max_interval=10):
+                    raise AnsibleError(f"{artifact} was not ready within {ready_timeout} seconds")
+
+                if compress:
+                    # the archive is removed from the device whatever the copy result
+                    try:
+                        conn.send_command(f'gzip -c {artifact} > {artifact}.gz', expect_string='#', read_timeout=ready_timeout)
+                        conn.set_mode(CLI)
+                        output = copy(conn, f'{artifact}.gz', f'{dest_filename}.gz')
+                    finally:
+                        remove_file(conn, f'{artifact}.gz')
+                    artifact += '.gz'
+                    dest_filename += '.gz'
+                else:
+                    conn.set_mode(CLI)
+                    output = copy(conn, artifact, dest_filename)
+
+                if "Copy Success" in output or "copy success" in output.lower():
+                    manifest.add(file, dest_filename)
+                    return dest_filename, output
+                raise AnsibleError(f"Copy failed for {artifact}: {output}")
 
         try:
-            conn = ConnectHandler(**connection_dict)
-            conn.enable()
-
-            core_output = conn.send_command('show cores')
+            # Get an enabled netmiko session to the DUT from the task session pool
+            with get_pool().session(params) as conn:
+                core_output = conn.send_command('show cores')
             core_files = re.findall(r'core_.*', core_output)
 
             if not core_files:
                 result['msg'] = "No core files found"
+                manifest.remove()
                 return result
 
-            core_file_logs = []
-            for file in core_files:
-                details_output = conn.send_command(f'show core {file} details', read_timeout=60)
-                match = re.search(r'core_.*', details_output)
-                if match:
-                    core_file_logs.append(match.group())
-                    #display.display(f'appended {match.group()} to core log list')
-                    time.sleep(120)
-                    dest_filename = f"{inventory_hostname}_{match.group()}"
-                    if node_type == 'vm':
-                        copy_cmd = (
-                            f"copy filepath /tmp/{match.group()} "
-                            f"{trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{dest_filename}"
-                        )
-                    else:
-                        copy_cmd = (
-                            f"copy filepath /tmp/{match.group()} "
-                            f"{trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{dest_filename} vrf management"
-                        )
-                    #display.display(f'the copy command is {copy_cmd}')
-                    output = conn.send_command(copy_cmd)
-                    #display.display(output)
-                    time.sleep(10)
-
-                    if "Copy Success" in output or "copy success" in output.lower():
-                        result['copied_files'].append(dest_filename)
-                        result['copy_stats'] += output
+            # the cores copied by an interrupted run are not copied again
+            pending = [file for file in core_files if file not in manifest.copied]
+            result['resumed_files'] = [manifest.copied[file] for file in core_files if file in manifest.copied]
+
+            errors = []
+            with ThreadPoolExecutor(max_workers=max(max_transfers, 1)) as executor:
+                futures = [(file, executor.submit(extract, file)) for file in pending]
+                for file, future in futures:
+                    try:
+                        copied = future.result()
+                    except Exception as e:
+                        errors.append(f'{file}: {str(e)}')
+                        continue
+                    if copied:
+                        result['copied_files'].append(copied[0])
+                        result['copy_stats'] += copied[1]
                         result['core_file_location'] = f'{remote_path}@{remote_host}'
                         result['changed'] = True
-                    else:
-                        raise AnsibleError(f"Copy failed for {core_file}: {output}")
+
+            if errors:
+                raise AnsibleError('; '.join(errors))
+
+            with get_pool().session(params) as conn:
+                conn.send_command('clear cores')
+            manifest.remove()
 
         except Exception as e:
             raise AnsibleError(f"OcNOS core extraction failed: {str(e)}")
 
-        conn.send_command('clear cores')
         return result
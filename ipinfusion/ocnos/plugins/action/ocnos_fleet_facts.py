@@ -0,0 +1,197 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Contains Action Plugin methods for OcNOS Fleet Facts Module
+# IP Infusion
+#
+
+DOCUMENTATION = '''
+---
+action: ocnos_fleet_facts
+short_description: Collect OcNOS facts for many hosts from one task
+description:
+  - Collects the same facts as M(ipinfusion.ocnos.ocnos_facts) for a list of
+    inventory hosts from a single controller task.
+  - The hosts are handled by a bounded pool of SSH sessions, so the run time
+    scales with I(workers) instead of the number of playbook forks.
+  - Without I(hosts), the facts of the task host are collected and returned
+    as C(ansible_facts), with the same C(ansible_net_*) names as
+    M(ipinfusion.ocnos.ocnos_facts), so it can be used in its place.
+  - With I(hosts), typically from a C(run_once) task, the C(ansible_net_*)
+    facts of every host are returned in I(hosts) only. No C(ansible_facts)
+    are returned, as Ansible would set the facts of a C(run_once) task on
+    every host of the play.
+options:
+  hosts:
+    description: Inventory hosts to collect facts from. Defaults to the task host.
+    type: list
+    elements: str
+  gather_subset:
+    description: Restrict the facts collected, same as the ocnos_facts option.
+    type: list
+    elements: str
+    default: ['!config']
+  workers:
+    description: Maximum number of devices handled at the same time.
+    type: int
+    default: 10
+'''
+
+EXAMPLES = '''
+- name: Collect facts, same as ocnos_facts
+  ipinfusion.ocnos.ocnos_fleet_facts:
+    gather_subset: all
+
+- name: Collect facts for the whole group
+  ipinfusion.ocnos.ocnos_fleet_facts:
+    hosts: "{{ groups['ocnos'] }}"
+    gather_subset: all
+    workers: 50
+  run_once: true
+  register: fleet
+
+- name: Publish the ansible_net_* facts of every host
+  ansible.builtin.set_fact:
+    "{{ item.key }}": "{{ item.value }}"
+  loop: "{{ fleet.hosts[inventory_hostname] | default({}) | dict2items }}"
+'''
+
+RETURN = '''
+ansible_facts:
+  description: The ansible_net_* facts of the task host, same as ocnos_facts returns
+  type: dict
+  returned: without hosts, when the task host was collected
+hosts:
+  description: The ansible_net_* facts of every host that was collected
+  type: dict
+  returned: always
+failed_hosts:
+  description: Error message of every host that could not be collected
+  type: dict
+  returned: always
+'''
+
+from ansible.plugins.action import ActionBase
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.common.validation import check_type_str
+from ansible.utils.display import Display
+from concurrent.futures import ThreadPoolExecutor
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos_facts import get_runable_subsets, gather_facts
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool
+from ansible_collections.ipinfusion.ocnos.plugins.terminal.ocnos import TerminalModule
+
+display = Display()
+
+
+class FleetConnection(object):
+    """Serve the connection calls of the facts collectors over a netmiko session"""
+
+    def __init__(self, session):
+        self._session = session
+
+    def get(self, command, prompt=None, answer=None, **kwargs):
+        return self._session.send_command(command, read_timeout=60)
+
+    def run_commands_batch(self, commands=None, check_rc=False):
+        results = []
+        for cmd in commands:
+            if isinstance(cmd, dict):
+                cmd = cmd['command']
+            try:
+                output = self._session.send_command(cmd, read_timeout=60)
+                # same error detection as the network_cli connection
+                data = to_bytes('\r\n' + output.replace('\n', '\r\n'), errors='surrogate_then_replace')
+                for regex in TerminalModule.terminal_stderr_re:
+                    if regex.search(data):
+                        raise AnsibleError(output)
+            except Exception as e:
+                if check_rc:
+                    raise
+                results.append({'output': None, 'error': str(e)})
+                continue
+            results.append({'output': output, 'error': None})
+        return results
+
+
+class FleetModule(object):
+    """Just enough of AnsibleModule for the ocnos_facts collectors"""
+
+    check_mode = False
+    # type checks netcommon's EntityCollection runs on the commands
+    _CHECK_ARGUMENT_TYPES_DISPATCHER = {'str': check_type_str}
+
+    def __init__(self, connection, params):
+        self._ocnos_connection = connection
+        self.params = params
+
+    def fail_json(self, msg, **kwargs):
+        raise AnsibleError(msg)
+
+    def warn(self, warning):
+        display.warning(warning)
+
+
+class ActionModule(ActionBase):
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = {}
+
+        inventory_hostname = task_vars.get('inventory_hostname')
+        fleet = bool(self._task.args.get('hosts'))
+        hosts = self._task.args.get('hosts') or [inventory_hostname]
+        gather_subset = self._task.args.get('gather_subset', ['!config'])
+        workers = int(self._task.args.get('workers', 10))
+
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        if isinstance(gather_subset, str):
+            gather_subset = [gather_subset]
+
+        try:
+            runable_subsets = get_runable_subsets(gather_subset)
+        except ValueError as e:
+            raise AnsibleError(str(e))
+
+        hostvars = task_vars.get('hostvars', {})
+        result = {'changed': False, 'hosts': {}, 'failed_hosts': {}, 'failed': False}
+
+        def collect(host):
+            params = get_connection_params({}, hostvars.get(host, {}), defaults={'ansible_host': host})
+
+            with get_pool().session(params) as session:
+                module = FleetModule(FleetConnection(session), {'gather_subset': gather_subset})
+                ansible_facts, warnings = gather_facts(module, runable_subsets)
+
+            for warning in warnings:
+                display.warning(f'{host}: {warning}')
+            return ansible_facts
+
+        display.display(f'Collecting OcNOS facts from {len(hosts)} hosts with {workers} workers')
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = dict((host, executor.submit(collect, host)) for host in hosts)
+            for host, future in futures.items():
+                try:
+                    result['hosts'][host] = future.result()
+                except Exception as e:
+                    result['failed_hosts'][host] = str(e)
+
+        # the facts of a run_once task are set on every host of the play,
+        # the facts of a fleet are only returned in hosts
+        if not fleet and inventory_hostname in result['hosts']:
+            result['ansible_facts'] = result['hosts'][inventory_hostname]
+
+        if hosts and not result['hosts']:
+            result['failed'] = True
+            result['msg'] = 'OcNOS fact collection failed on every host'
+
+        return result
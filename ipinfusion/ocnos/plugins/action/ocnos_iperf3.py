@@ -15,101 +15,180 @@
 
 from ansible.plugins.action import ActionBase
 from ansible.errors import AnsibleActionFail
+from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.utils.display import Display
-from netmiko import ConnectHandler
-import time
+import json
 import re
-import paramiko
-from paramiko.proxy import ProxyCommand
+from contextlib import contextmanager
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool, wait_until, SHELL
 
 display = Display()
 
+# values kept from the iperf3 -J interval, stream and summary records
+IPERF3_STATS = ('socket', 'start', 'end', 'seconds', 'bytes', 'bits_per_second', 'retransmits',
+                'jitter_ms', 'lost_packets', 'packets', 'lost_percent', 'sender')
+
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+DEFAULT_CREDENTIALS = {'ansible_ssh_user': 'ocnos', 'ansible_ssh_pass': 'ocnos'}
+
+
+def _pick(record):
+    return dict((key, record[key]) for key in IPERF3_STATS if key in record)
+
+
+def parse_iperf3_json(output):
+    """Return the object of the iperf3 -J output, or None"""
+    start = output.find('{')
+    end = output.rfind('}')
+    if start < 0 or end < start:
+        return None
+    try:
+        return json.loads(output[start:end + 1])
+    except ValueError:
+        return None
+
+
+def summarize_iperf3(data):
+    """
+    Reduce the iperf3 -J object to the throughput, retransmits, jitter and
+    loss of every interval and stream, and of the whole test.
+    """
+    end = data.get('end', {})
+    summary = {
+        'protocol': data.get('start', {}).get('test_start', {}).get('protocol'),
+        'intervals': [],
+        'streams': [],
+    }
+    for interval in data.get('intervals', []):
+        item = _pick(interval.get('sum', {}))
+        item['streams'] = [_pick(stream) for stream in interval.get('streams', [])]
+        summary['intervals'].append(item)
+
+    # tcp streams have sender and receiver records, udp streams a udp one
+    for stream in end.get('streams', []):
+        summary['streams'].append(dict((key, _pick(value)) for key, value in stream.items() if isinstance(value, dict)))
+
+    for key in ('sum_sent', 'sum_received', 'sum'):
+        if key in end:
+            summary[key] = _pick(end[key])
+
+    if 'error' in data:
+        summary['error'] = data['error']
+    return summary
+
+
+def get_read_timeout(cmd):
+    """Return the read_timeout of an iperf3 cmd, from its -t timer"""
+    # get the timer pattern from the iperf3 cmd to adjust the read_timeout
+    timer_pattern = re.compile(r'-t\s\d+')
+    try:
+        if re.findall(timer_pattern, cmd)[0].split()[1]:
+            timeout = int(re.findall(timer_pattern, cmd)[0].split()[1])
+            timeout += 10  # tolerance
+    except:
+        timeout = 30
+    return timeout
+
+
+@contextmanager
+def iperf3_server(params, name, port):
+    """
+    Start a one-off iperf3 server on the device of params for a with block,
+    once it listens on port. It exits after one test and is killed at the
+    end of the block in case no client connected.
+    """
+    with get_pool().session(params, SHELL) as server_session:
+        server_session.send_command(f'nohup iperf3 -s -1 -p {port} >/dev/null 2>/dev/null &')
+
+        def listening():
+            output = server_session.send_command('ss -ltn 2>/dev/null || netstat -ltn')
+            return re.search(r':%d\s' % port, output) is not None
+
+        if not wait_until(listening, 30, interval=0.5, max_interval=2):
+            raise AnsibleActionFail(f"iperf3 server did not start listening on {name}:{port}")
+        display.display(f'iperf3 server listening on {name}:{port}')
+
+        try:
+            yield server_session
+        finally:
+            server_session.send_command(f"pkill -f 'iperf3 -s -1 -p {port}'")
+
+
 class ActionModule(ActionBase):
 
     def run(self, tmp=None, task_vars=None):
         result = super().run(tmp, task_vars)
         cmd = self._task.args.get('cmd')
+        # inventory host to run the iperf3 server on, the task host is the client
+        server = self._task.args.get('server')
+        # return the parsed iperf3 -J results of a client run
+        structured = boolean(self._task.args.get('json', False))
 
-        if not cmd:
+        if not cmd and not server:
             raise AnsibleActionFail("Missing required argument: cmd")
 
         # Get connection data from inventory
-        host = self._task.args.get('ansible_host') or task_vars.get('ansible_host')
-        username = self._task.args.get('ansible_ssh_user', 'ocnos') or task_vars.get('ansible_ssh_user')
-        password = self._task.args.get('ansible_ssh_pass', 'ocnos') or task_vars.get('ansible_ssh_pass')
-        port = str(self._task.args.get('ansible_port') or task_vars.get('ansible_port') or 22)
-        device_type = 'ipinfusion_ocnos'
-
-        if not host:
+        if not (self._task.args.get('ansible_host') or task_vars.get('ansible_host')):
             raise AnsibleActionFail("Missing 'ansible_host' in inventory for the target")
-
-        # Prepare connection
-        conn = dict(
-            host=host,
-            username=username,
-            password=password,
-            device_type=device_type,
-        )
-
-        # Handle jump host (ansible_ssh_common_args → ProxyCommand)
-        proxy_cmd = (
-            self._task.args.get('ansible_ssh_common_args')
-            or task_vars.get('ansible_ssh_common_args')
-        )
-        if proxy_cmd:
-            proxy_cmd = proxy_cmd.strip()
-
-            if proxy_cmd.startswith("-o ProxyCommand="):
-                # Remove the prefix
-                proxy_cmd = proxy_cmd.replace("-o ProxyCommand=", "", 1).strip()
-                # Strip surrounding quotes
-                proxy_cmd = proxy_cmd.strip('"').strip("'")
-
-            # Replace %h and %p placeholders with actual host/port
-            proxy_cmd = proxy_cmd.replace("%h", host).replace("%p", port)
-
-            conn['sock'] = ProxyCommand(proxy_cmd)
+        params = get_connection_params(self._task.args, task_vars, defaults=DEFAULT_CREDENTIALS)
+
+        server_params = None
+        if server:
+            server_vars = task_vars.get('hostvars', {}).get(server, {})
+            server_params = get_connection_params({}, server_vars, defaults=dict(DEFAULT_CREDENTIALS, ansible_host=server))
+            # address the client reaches the server on, usually a data plane one
+            server_address = self._task.args.get('server_address') or server_params['host']
+            port = int(self._task.args.get('port', 5201))
+            cmd = f"iperf3 -c {server_address} -p {port} -J {self._task.args.get('client_args', '')}".strip()
+        elif structured and '-c' in cmd.split() and '-J' not in cmd.split():
+            cmd = f'{cmd} -J'
+
+        def run_cmd(cmd):
+            # Get a root shell session to the DUT from the task session pool
+            with get_pool().session(params, SHELL) as device:
+                # kill command if nothing given
+                try:
+                    cmd.split()[1]
+                except:
+                    cmd = "kill -9 `ps aux | grep iperf | grep -v grep | awk '{print $2}'`"
+
+                # Server mode: run in background
+                if '-s' in cmd.split():
+                    cmd = f'nohup {cmd} >/dev/null 2>/dev/null &'
+
+                return cmd, device.send_command(cmd, expect_string=r'#', read_timeout=get_read_timeout(cmd))
+
+        def run_with_server(cmd):
+            with iperf3_server(server_params, server, port):
+                return run_cmd(cmd)
 
         try:
-            device = ConnectHandler(**conn)
-            device.enable()
-
-            # Enter shell
-            device.send_command('start-shell', expect_string=r'\$')
-            time.sleep(1)
-            device.send_command('su -', expect_string='Password:')
-            device.send_command('root', expect_string=r'#')
-
-            # kill command if nothing given
-            try:
-                cmd.split()[1]
-            except:
-                cmd = "kill -9 `ps aux | grep iperf | grep -v grep | awk '{print $2}'`"
-
-            # Server mode: run in background
-            if '-s' in cmd.split():
-                cmd = f'nohup {cmd} >/dev/null 2>/dev/null &'
-
-            # get the timer pattern from the iperf3 cmd to adjust the read_timeout
-            timer_pattern = re.compile(r'-t\s\d+')
-            try:
-                if re.findall(timer_pattern, cmd)[0].split()[1]:
-                    timeout = int(re.findall(timer_pattern, cmd)[0].split()[1])
-                    timeout += 10  # tolerance
-            except:
-                timeout = 30
-
-            iperf_output = device.send_command(cmd, expect_string=r'#', read_timeout=timeout)
-            device.disconnect()
+            cmd, iperf_output = run_with_server(cmd) if server else run_cmd(cmd)
 
             result['cmd'] = cmd
-            clean_output = re.sub(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])', '', iperf_output)
+            clean_output = ANSI_ESCAPE.sub('', iperf_output)
             result['output'] = clean_output.strip().splitlines()
 
             if 'nohup' in cmd:
                 result['changed'] = True
                 return result
 
+            if '-J' in cmd.split():
+                data = parse_iperf3_json(clean_output)
+                result['changed'] = True
+                if data is None:
+                    result['success'] = False
+                    result['failed'] = True
+                    result['msg'] = 'iperf3 did not return JSON results'
+                    return result
+                result['iperf3'] = summarize_iperf3(data)
+                result['success'] = 'error' not in data
+                if not result['success']:
+                    result['failed'] = True
+                    result['msg'] = f"iperf3 failed: {data['error']}"
+                return result
+
             if 'iperf Done.' in iperf_output:
                 result['changed'] = True
                 result['success'] = True
@@ -126,4 +205,3 @@ class ActionModule(ActionBase):
             result['msg'] = f"Failed to run iperf3 {e}"
 
         return result
-
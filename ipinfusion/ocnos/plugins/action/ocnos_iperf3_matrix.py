@@ -0,0 +1,312 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Contains Action Plugin methods for OcNOS IPERF3 Matrix Module
+# IP Infusion
+#
+
+DOCUMENTATION = '''
+---
+action: ocnos_iperf3_matrix
+short_description: Run iperf3 between many pairs of OcNOS hosts from one task
+description:
+  - Runs an iperf3 test, as M(ipinfusion.ocnos.ocnos_iperf3) with I(server),
+    for every server and client pair of a topology and returns the
+    throughput of all of them as a matrix.
+  - The pairs are scheduled in rounds in which a host is in one pair only, so
+    a host is never loaded by one test while it is measured by another. The
+    pairs of a round run at the same time. A full mesh of n hosts runs in
+    n - 1 rounds, n rounds when n is odd.
+  - The whole matrix is tested by a single task, which must run with
+    C(run_once). Without it every host of the play would test the whole
+    matrix again, at the same time, and a warning is shown.
+  - This plugin is strictly for testing purposes. OcNOS Rate Limits the CPU
+    packets to 20Mbps.
+options:
+  hosts:
+    description: Inventory hosts of the full_mesh topology. Defaults to the hosts of the current play batch.
+    type: list
+  topology:
+    description:
+      - C(full_mesh) tests every pair of I(hosts).
+      - C(leaf_spine) tests every leaf of I(leaves) against every spine of I(spines), the spine being the server.
+      - C(pairs) tests the pairs given in I(pairs).
+    type: str
+    choices: ['full_mesh', 'leaf_spine', 'pairs']
+    default: full_mesh
+  leaves:
+    description: Leaf inventory hosts of the leaf_spine topology.
+    type: list
+  spines:
+    description: Spine inventory hosts of the leaf_spine topology.
+    type: list
+  pairs:
+    description: Pairs of the pairs topology, as dicts with server and client keys or as [server, client] lists.
+    type: list
+  bidirectional:
+    description: Also test every pair with the server and the client swapped.
+    type: bool
+    default: false
+  address_var:
+    description: Host variable holding the address the clients reach a server on. Defaults to its ansible_host.
+    type: str
+  port:
+    description: Port of the iperf3 servers.
+    type: int
+    default: 5201
+  client_args:
+    description: Extra arguments of the iperf3 clients, -t 10 -P 4 for example.
+    type: str
+    default: ''
+  workers:
+    description: Maximum number of pairs tested at the same time within a round.
+    type: int
+    default: 10
+  fail_on_pair_error:
+    description:
+      - Fail the task when a pair fails, the results of the other pairs are still returned.
+      - When false, the task only fails when every pair fails.
+    type: bool
+    default: true
+'''
+
+EXAMPLES = '''
+- name: Acceptance test of a new pod
+  ipinfusion.ocnos.ocnos_iperf3_matrix:
+    topology: leaf_spine
+    leaves: "{{ groups['leaf'] }}"
+    spines: "{{ groups['spine'] }}"
+    address_var: loopback_address
+    client_args: -t 10 -P 4
+    bidirectional: true
+    fail_on_pair_error: false
+  run_once: true
+  register: pod
+
+- name: Check every link runs at 15Mbps at least
+  ansible.builtin.assert:
+    that:
+      - pod.failed_pairs | length == 0
+      - pod.results | map(attribute='bits_per_second') | min >= 15000000
+  run_once: true
+'''
+
+RETURN = '''
+matrix:
+  description: Received bits per second of every tested pair, keyed by server then client
+  type: dict
+  returned: always
+results:
+  description: Server, client, round, cmd, bits_per_second and parsed iperf3 results of every successful pair
+  type: list
+  returned: always
+failed_pairs:
+  description: Server, client, round and error message of every pair that failed
+  type: list
+  returned: always
+rounds:
+  description: The [server, client] pairs of every round, in the order they ran
+  type: list
+  returned: always
+'''
+
+from ansible.plugins.action import ActionBase
+from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.utils.display import Display
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from ansible_collections.ipinfusion.ocnos.plugins.action.ocnos_iperf3 import (
+    ANSI_ESCAPE, DEFAULT_CREDENTIALS, get_read_timeout, iperf3_server, parse_iperf3_json, summarize_iperf3
+)
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool, SHELL
+
+display = Display()
+
+TOPOLOGIES = ('full_mesh', 'leaf_spine', 'pairs')
+
+
+def get_pairs(topology, hosts=None, leaves=None, spines=None, pairs=None, bidirectional=False):
+    """Return the (server, client) pairs of a topology"""
+    if topology == 'full_mesh':
+        result = list(combinations(hosts or [], 2))
+    elif topology == 'leaf_spine':
+        if not leaves or not spines:
+            raise AnsibleError("leaf_spine topology requires leaves and spines")
+        result = [(spine, leaf) for leaf in leaves for spine in spines]
+    elif topology == 'pairs':
+        result = []
+        for pair in pairs or []:
+            if isinstance(pair, dict):
+                pair = (pair.get('server'), pair.get('client'))
+            if len(pair) != 2 or not all(pair):
+                raise AnsibleError(f"Invalid iperf3 pair: {pair}")
+            result.append(tuple(pair))
+    else:
+        raise AnsibleError(f"topology must be one of {', '.join(TOPOLOGIES)}")
+
+    for server, client in result:
+        if server == client:
+            raise AnsibleError(f"iperf3 pair with the same server and client: {server}")
+
+    if bidirectional:
+        result += [(client, server) for server, client in result]
+
+    # keep the first of duplicated pairs
+    return list(dict.fromkeys(result))
+
+
+def full_mesh_rounds(hosts):
+    """
+    Split every pair of hosts into rounds in which every host is in one pair.
+
+    This is the circle method of round robin tournaments: the first host
+    stays in place while the others rotate, giving n - 1 rounds for n hosts
+    and n rounds when n is odd. The server of a pair is the host that comes
+    first in hosts, like get_pairs.
+    """
+    position = dict((host, index) for index, host in enumerate(hosts))
+    circle = list(hosts)
+    if len(circle) % 2:
+        circle.append(None)
+    half = len(circle) // 2
+
+    rounds = []
+    for dummy in range(len(circle) - 1):
+        current = []
+        for pair in zip(circle[:half], reversed(circle[half:])):
+            if None not in pair:
+                current.append(tuple(sorted(pair, key=position.get)))
+        if current:
+            rounds.append(current)
+        circle = circle[:1] + circle[-1:] + circle[1:-1]
+    return rounds
+
+
+def schedule_rounds(pairs):
+    """
+    Split pairs into rounds in which every host is in one pair at most.
+
+    The pairs of the hosts with the most pairs left are placed first. This
+    is a greedy heuristic, it may need more rounds than the largest number
+    of pairs of a host. full_mesh_rounds() is used for full meshes.
+    """
+    remaining = list(pairs)
+    rounds = []
+    while remaining:
+        load = {}
+        for server, client in remaining:
+            load[server] = load.get(server, 0) + 1
+            load[client] = load.get(client, 0) + 1
+
+        busy = set()
+        current = []
+        for pair in sorted(remaining, key=lambda pair: -(load[pair[0]] + load[pair[1]])):
+            if pair[0] in busy or pair[1] in busy:
+                continue
+            busy.update(pair)
+            current.append(pair)
+
+        rounds.append(current)
+        remaining = [pair for pair in remaining if pair not in current]
+    return rounds
+
+
+def get_bits_per_second(summary):
+    """Return the received throughput of an iperf3 summary, the total of udp tests"""
+    for key in ('sum_received', 'sum'):
+        if 'bits_per_second' in summary.get(key, {}):
+            return summary[key]['bits_per_second']
+    return None
+
+
+class ActionModule(ActionBase):
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = {}
+
+        topology = self._task.args.get('topology', 'full_mesh')
+        hosts = self._task.args.get('hosts') or task_vars.get('ansible_play_batch') or []
+        address_var = self._task.args.get('address_var')
+        port = int(self._task.args.get('port', 5201))
+        client_args = self._task.args.get('client_args', '')
+        workers = int(self._task.args.get('workers', 10))
+        bidirectional = boolean(self._task.args.get('bidirectional', False))
+        fail_on_pair_error = boolean(self._task.args.get('fail_on_pair_error', True))
+
+        if isinstance(hosts, str):
+            hosts = [hosts]
+
+        if not self._task.run_once:
+            display.warning('ocnos_iperf3_matrix tests the whole matrix from every host of the play, '
+                            'set run_once: true on the task')
+
+        pairs = get_pairs(topology, hosts=hosts,
+                          leaves=self._task.args.get('leaves'),
+                          spines=self._task.args.get('spines'),
+                          pairs=self._task.args.get('pairs'),
+                          bidirectional=bidirectional)
+        if topology == 'full_mesh':
+            rounds = full_mesh_rounds(hosts)
+            if bidirectional:
+                rounds += [[(client, server) for server, client in round_pairs] for round_pairs in rounds]
+        else:
+            rounds = schedule_rounds(pairs)
+
+        hostvars = task_vars.get('hostvars', {})
+        result = {'changed': False, 'matrix': {}, 'results': [], 'failed_pairs': [],
+                  'rounds': [[list(pair) for pair in round_pairs] for round_pairs in rounds], 'failed': False}
+
+        def connection_params(host):
+            return get_connection_params({}, hostvars.get(host, {}), defaults=dict(DEFAULT_CREDENTIALS, ansible_host=host))
+
+        def test(server, client):
+            server_params = connection_params(server)
+            server_address = hostvars.get(server, {}).get(address_var) if address_var else None
+            cmd = f"iperf3 -c {server_address or server_params['host']} -p {port} -J {client_args}".strip()
+
+            with iperf3_server(server_params, server, port):
+                with get_pool().session(connection_params(client), SHELL) as device:
+                    output = device.send_command(cmd, expect_string=r'#', read_timeout=get_read_timeout(cmd))
+
+            data = parse_iperf3_json(ANSI_ESCAPE.sub('', output))
+            if data is None:
+                raise AnsibleError('iperf3 did not return JSON results')
+            if 'error' in data:
+                raise AnsibleError(f"iperf3 failed: {data['error']}")
+            return cmd, summarize_iperf3(data)
+
+        display.display(f'Testing {len(pairs)} iperf3 pairs in {len(rounds)} rounds')
+        for index, round_pairs in enumerate(rounds):
+            display.display(f'iperf3 round {index + 1}/{len(rounds)}: ' + ', '.join(f'{s} -> {c}' for s, c in round_pairs))
+            with ThreadPoolExecutor(max_workers=max(min(workers, len(round_pairs)), 1)) as executor:
+                futures = dict((pair, executor.submit(test, *pair)) for pair in round_pairs)
+                for (server, client), future in futures.items():
+                    try:
+                        cmd, summary = future.result()
+                    except Exception as e:
+                        result['failed_pairs'].append({'server': server, 'client': client, 'round': index, 'msg': str(e)})
+                        continue
+                    bits_per_second = get_bits_per_second(summary)
+                    result['matrix'].setdefault(server, {})[client] = bits_per_second
+                    result['results'].append({'server': server, 'client': client, 'round': index, 'cmd': cmd,
+                                              'bits_per_second': bits_per_second, 'iperf3': summary})
+                    result['changed'] = True
+
+        if pairs and not result['results']:
+            result['failed'] = True
+            result['msg'] = 'iperf3 failed on every pair'
+        elif fail_on_pair_error and result['failed_pairs']:
+            result['failed'] = True
+            result['msg'] = f"iperf3 failed on {len(result['failed_pairs'])} of {len(pairs)} pairs"
+
+        return result
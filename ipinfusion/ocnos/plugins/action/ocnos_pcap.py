@@ -15,15 +15,41 @@
 
 from ansible.plugins.action import ActionBase
 from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.utils.display import Display
 from datetime import datetime
 import re
-import time
-from netmiko import ConnectHandler
-from paramiko.proxy import ProxyCommand
+import shlex
+from ansible_collections.ipinfusion.ocnos.plugins.action.ocnos_config_backup import time_stamper
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool, wait_until, CLI, SHELL
 
 display = Display()
 
+ANSI_ESCAPE_RE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+
+
+def tshark_command(interfaces, path, duration, capture_filter=None, snaplen=None, ring_filesize=None, ring_files=None):
+    """
+    Build the tshark command line of one capture process, which stops by itself
+    after duration seconds. The filter and snaplen are given before the
+    interfaces so they apply to all of them.
+    """
+    args = ['tshark', '-q']
+    if capture_filter:
+        args += ['-f', shlex.quote(capture_filter)]
+    if snaplen:
+        args += ['-s', str(snaplen)]
+    for interface in interfaces:
+        args += ['-i', interface]
+    args += ['-a', f'duration:{duration}']
+    if ring_filesize:
+        args += ['-b', f'filesize:{ring_filesize}']
+        if ring_files:
+            args += ['-b', f'files:{ring_files}']
+    args += ['-w', path]
+    return ' '.join(args) + ' >/dev/null 2> /dev/null &'
+
+
 class ActionModule(ActionBase):
     def run(self, tmp=None, task_vars=None):
         
@@ -43,134 +69,122 @@ class ActionModule(ActionBase):
         node_type = self._task.args.get('node_type','physical')
         trans = self._task.args.get('transport','scp')
         capture_interfaces = self._task.args.get('capture_interfaces')
-        capture_timeout = self._task.args.get('capture_timeout')
+        capture_timeout = int(self._task.args.get('capture_timeout'))
+        # BPF capture filter and bytes captured per packet
+        capture_filter = self._task.args.get('capture_filter')
+        snaplen = self._task.args.get('snaplen')
+        # ring buffer of ring_files files of ring_filesize kB, finished files
+        # are copied while the capture goes on
+        ring_filesize = self._task.args.get('ring_filesize')
+        ring_files = self._task.args.get('ring_files')
+        # capture all the interfaces with a single tshark process into one file
+        merge_interfaces = boolean(self._task.args.get('merge_interfaces', False))
 
         if trans == 'scp' or trans =='ftp':
             pass
         else:
             raise AnsibleError("Module only supports ftp or scp transport types")
+
+        if ring_files and not ring_filesize:
+            raise AnsibleError("ring_files requires ring_filesize")
         
         # Extract OcNOS connection details from inventory
-        host = self._task.args.get('ansible_host') or task_vars.get('ansible_host')
-        username = self._task.args.get('ansible_ssh_user') or task_vars.get('ansible_ssh_user')
-        password = self._task.args.get('ansible_ssh_pass') or task_vars.get('ansible_ssh_pass')
-        port = str(self._task.args.get('ansible_port') or task_vars.get('ansible_port') or 22)
-        
-        connection_dict = {
-            'host': host,
-            'username': username,
-            'password': password,
-            'device_type': 'ipinfusion_ocnos'
-            }
-            
-        if not all(connection_dict.values()):
-            raise AnsibleError("Missing OcNOS connection details in inventory/task vars.")
+        params = get_connection_params(self._task.args, task_vars)
 
         result = {'changed': False, 'copied_files': [], 'failed': False}
 
-        proxy_cmd = (
-                self._task.args.get('ansible_ssh_common_args')
-                or task_vars.get('ansible_ssh_common_args')
-        )        
+        # one capture per interface, or a single one for all of them
+        interfaces = capture_interfaces.split()
+        if merge_interfaces:
+            captures = [(f'{inventory_hostname}', 'pcapng', interfaces)]
+        else:
+            captures = [(f'{inventory_hostname}_{interface}', 'pcap', [interface]) for interface in interfaces]
 
-        #Handle SSH Proxy or Jump Server Setting
-        if proxy_cmd:
-            proxy_cmd = proxy_cmd.strip()
+        time_stamp = str(datetime.now()).split('.')[0].replace(' ','_')
 
-            if proxy_cmd.startswith("-o ProxyCommand="):
-                # Remove the prefix
-                proxy_cmd = proxy_cmd.replace("-o ProxyCommand=", "", 1).strip()
-                # Strip surrounding quotes
-                proxy_cmd = proxy_cmd.strip('"').strip("'")
+        copy_list = []
 
-            # Replace %h and %p placeholders with actual host/port
-            proxy_cmd = proxy_cmd.replace("%h", host).replace("%p", port)
+        def copy_file(session, file, export_file):
+            if node_type == 'vm':
+                copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file}'
+            else:
+                copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file} vrf management'
+            output = session.send_command(copy_cmd, expect_string='#', read_timeout=60)
+            display.display(f'copied file {file} to {remote_host}')
+            if not ("Copy Success" in output or "copy success" in output.lower()):
+                raise AnsibleError(f"Copy failed for {file}: {output}")
+            copy_list.append(export_file)
+            result['changed'] = True
 
-            connection_dict['sock'] = ProxyCommand(proxy_cmd)
-        
         try:
-            # Try to establish a connection to the DUT using netmiko 
-            session = ConnectHandler(**connection_dict)
-
-            #Enter into Debian Linux
-            session.enable()
-
-            #Enter the OcNOS Debian Shell
-            session.send_command('start-shell',expect_string='$')
-
-            #Escalate Privliges to root for capture using tshark
-            session.send_command('su -',expect_string='Password:')
-            session.send_command('root',expect_string='#')
-
-            #Function to get the tshark PIDs (stale or old) if running and kill it before starting new.
-            def get_and_kill_tshark_pids():
-                raw_ts_pids = session.send_command('pidof tshark')
-                ts_pids = re.sub(r'\x1B\[[0-?]*[ -/]*[@-~]', '', raw_ts_pids).strip()
-                for pids in ts_pids.split():
-                    session.send_command(f'kill -9 {pids}')
-                    time.sleep(2)
-
-            # Make sure the stale tshark pids are killed
-            get_and_kill_tshark_pids()
-
-            #construct tshark string based on the input interface
-            ts_string = []
-            for interfaces in capture_interfaces.split():
-                ts_string.append(f"tshark -i {interfaces} -w /var/log/{inventory_hostname}_{interfaces}.pcap >/dev/null 2> /dev/null &")
-            
-            time_stamp = str(datetime.now()).split('.')[0].replace(' ','_')
-
-            def time_stamper(file, time_stamp):
-                m = file.split('.')
-                m.insert(1,time_stamp)
-                file_name = m[0]+'_'+m[1]+'.'+m[2]
-                return file_name
-            
-            for strings in ts_string:
-                display.display(f'Capture Started on {strings.split()[2]}')
-                session.send_command(strings)
-                time.sleep(1)
-
-            #wait for packet capture to complete and then kill the tshark PIDs
-            display.display(f'Waiting for {capture_timeout} seconds for Captures to complete')
-            time.sleep(capture_timeout)
-           
-            # cleanup the tshark pids
-            get_and_kill_tshark_pids()
-
-            #come back to ocnos prompt
-            session.send_command('exit',expect_string='$')
-            session.send_command('exit',expect_string='#')
-
-            # File Copy operation to remote locations
-            file_list = []
-            for interface_caps in capture_interfaces.split():
-                file_list.append(f'{inventory_hostname}_{interface_caps}.pcap')
-            state = 1
-            copy_list = []
-        
-
-            for file in file_list:
-                export_file = time_stamper(file,time_stamp)
-                copy_list.append(export_file)
-                if node_type == 'vm':
-                    copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file}'
-                else:
-                    copy_cmd = f'copy filepath /var/log/{file} {trans} {trans}://{remote_username}:{remote_password}@{remote_host}{remote_path}/{export_file} vrf management'
-                output = session.send_command(copy_cmd, expect_string='#', read_timeout=60)
-                display.display(f'copying file {file} to {remote_host} and then wait for 5 seconds')
-                time.sleep(5)
-                if "Copy Success" in output or "copy success" in output.lower():
-                    state = 0
-            
-                if state:
-                    raise AnsibleError(f"Copy failed for {file}: {output}")    
+            # Get a netmiko session to the DUT from the task session pool, in the
+            # root shell for the capture using tshark
+            with get_pool().session(params, SHELL) as session:
+                def get_tshark_pids():
+                    raw_ts_pids = session.send_command('pidof tshark')
+                    return ANSI_ESCAPE_RE.sub('', raw_ts_pids).strip().split()
+
+                #Function to get the tshark PIDs (stale or old) if running and kill it before starting new.
+                def get_and_kill_tshark_pids():
+                    for pids in get_tshark_pids():
+                        session.send_command(f'kill -9 {pids}')
+
+                def list_capture_files(base, ext):
+                    # the ring buffer files are named <base>_<number>_<time>.<ext>
+                    pattern = re.compile(r'^%s(_\d+_\d+)?\.%s$' % (re.escape(base), ext))
+                    output = session.send_command('ls -1 /var/log')
+                    return sorted(file for file in ANSI_ESCAPE_RE.sub('', output).split() if pattern.match(file))
+
+                # Make sure the stale tshark pids are killed
+                get_and_kill_tshark_pids()
+
+                for base, ext, capture_ifs in captures:
+                    # remove the files of a previous capture, they would be copied again
+                    for file in list_capture_files(base, ext):
+                        session.send_command(f'rm -f /var/log/{file}')
+                    ts_string = tshark_command(capture_ifs, f'/var/log/{base}.{ext}', capture_timeout,
+                                               capture_filter, snaplen, ring_filesize, ring_files)
+                    display.display(f'Capture Started on {", ".join(capture_ifs)}')
+                    session.send_command(ts_string)
+
+                copied = set()
+
+                def stream_segments(cli, final):
+                    # every ring buffer file but the last of a capture is complete
+                    for base, ext, capture_ifs in captures:
+                        files = list_capture_files(base, ext)
+                        for file in (files if final else files[:-1]):
+                            if file not in copied:
+                                copy_file(cli, file, file)
+                                copied.add(file)
+                                session.send_command(f'rm -f /var/log/{file}')
+
+                #wait for tshark to stop by itself at the end of the capture
+                display.display(f'Waiting for {capture_timeout} seconds for Captures to complete')
+                if ring_filesize:
+                    with get_pool().session(params) as cli:
+                        def capture_done():
+                            stream_segments(cli, False)
+                            return not get_tshark_pids()
+
+                        wait_until(capture_done, capture_timeout + 30, interval=5, backoff=1)
+                        get_and_kill_tshark_pids()
+                        stream_segments(cli, True)
                 else:
-                    result['changed'] = True
+                    wait_until(lambda: not get_tshark_pids(), capture_timeout + 30,
+                               interval=min(capture_timeout, 5) or 1, backoff=1)
+                    get_and_kill_tshark_pids()
+
+                    #come back to ocnos prompt
+                    session.set_mode(CLI)
+
+                    # File Copy operation to remote locations
+                    for base, ext, capture_ifs in captures:
+                        file = f'{base}.{ext}'
+                        copy_file(session, file, time_stamper(file, time_stamp))
         
-            result['copied_files'].append(copy_list)
-            session.disconnect()
+                result['copied_files'].append(copy_list)
         
         except Exception as e:
             raise AnsibleError(f"OcNOS Packet Capture failed: {str(e)}")
-        return result        
+        return result
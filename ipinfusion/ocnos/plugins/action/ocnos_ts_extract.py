@@ -16,13 +16,27 @@
 from ansible.plugins.action import ActionBase
 from ansible.errors import AnsibleError
 from ansible.utils.display import Display
+from concurrent.futures import ThreadPoolExecutor
 import re
-import time
-from netmiko import ConnectHandler
-from paramiko.proxy import ProxyCommand
+from ansible_collections.ipinfusion.ocnos.plugins.plugin_utils.ocnos_session import get_connection_params, get_pool, wait_until, CLI, SHELL
 
 display = Display()
 
+#Compile the Tech Support File Pattern
+ts_file_pat = re.compile(r'\S+_tech_support.*')
+
+
+def list_ts_files(session):
+    """Return the Tech Support Files of the current directory"""
+    output = session.send_command('ls')
+    file_list = []
+    for files in output.split():
+        match = re.match(ts_file_pat, files)
+        if match:
+            file_list.append(match.group())
+    return file_list
+
+
 class ActionModule(ActionBase):
     def run(self, tmp=None, task_vars=None):
         
@@ -32,115 +46,92 @@ class ActionModule(ActionBase):
         remote_username = self._task.args.get('remote_username')
         remote_password = self._task.args.get('remote_password')
         node_type = self._task.args.get('node_type','physical')
-        
-        # Extract OcNOS connection details from inventory
-        host = self._task.args.get('ansible_host') or task_vars.get('ansible_host')
-        username = self._task.args.get('ansible_ssh_user') or task_vars.get('ansible_ssh_user')
-        password = self._task.args.get('ansible_ssh_pass') or task_vars.get('ansible_ssh_pass')
-        port = str(self._task.args.get('ansible_port') or task_vars.get('ansible_port') or 22)
-
-        connection_dict = {
-            'host': host,
-            'username': username,
-            'password': password,
-            'device_type': 'ipinfusion_ocnos'
-            }
-
-        #Handle SSH Proxy or Jump Server Setting
-        proxy_cmd = (
-                self._task.args.get('ansible_ssh_common_args')
-                or task_vars.get('ansible_ssh_common_args')
-        )
-
-        if proxy_cmd:
-             proxy_cmd = proxy_cmd.strip()
-             if proxy_cmd.startswith("-o ProxyCommand="):
-                 # Remove the prefix
-                 proxy_cmd = proxy_cmd.replace("-o ProxyCommand=", "", 1).strip()
-                 # Strip surrounding quotes
-                 proxy_cmd = proxy_cmd.strip('"').strip("'")
-             # Replace %h and %p placeholders with actual host/port
-             proxy_cmd = proxy_cmd.replace("%h", host).replace("%p", port)
-             connection_dict['sock'] = ProxyCommand(proxy_cmd)            
-        if not all(connection_dict.values()):
-            raise AnsibleError("Missing OcNOS connection details in inventory/task vars.")
-
-        result = {'changed': False, 'copied_files': [], 'failed': False}
-        
-        #Compile the Tech Support File Pattern
-        ts_file_pat = re.compile(r'\S+_tech_support.*')
-        
-        try:
-            # Try to establish a connection to the DUT using netmiko 
-            session = ConnectHandler(**connection_dict)
-            
-            #Enter into Debian Linux
-            session.enable()
-            session.send_command('start-shell',expect_string='$')
-            
-            #Privilege Escalation to root
-            session.send_command('su -', expect_string='Password:')
-            session.send_command('root', expect_string='#')
-            
-            #Change Directory to /var/log where Tech Support Files are stored
-            session.send_command('cd /var/log',expect_string='#',read_timeout=30)
-            
-            #Gather previous tech support files
-            output = session.send_command('ls')
-            
-            file_list = []
-            for files in output.split():
-                match = re.match(ts_file_pat, files)
-                if match:
-                     file_list.append(match.group())
-            
-            #clean up the files
-            if len(file_list) > 0:
-                for files in file_list:
+        # seconds to wait for the Tech Support collection to complete
+        ts_timeout = int(self._task.args.get('ts_timeout', 600))
+        # first wait between two status checks, it doubles up to max_poll_interval
+        poll_interval = float(self._task.args.get('poll_interval', 2))
+        max_poll_interval = float(self._task.args.get('max_poll_interval', 15))
+        # extract from several devices at once instead of the task host
+        hosts = self._task.args.get('hosts')
+        workers = int(self._task.args.get('workers', 10))
+
+        def extract(params, label):
+            # Get a netmiko session to the DUT from the task session pool, in the
+            # root shell where the Tech Support Files are generated
+            with get_pool().session(params, SHELL) as session:
+                #Change Directory to /var/log where Tech Support Files are stored
+                session.send_command('cd /var/log',expect_string='#',read_timeout=30)
+
+                #clean up the previous tech support files
+                for files in list_ts_files(session):
                     session.send_command(f'rm -f {files}')
 
-            session.send_command("cmlsh -e 'show techsupport all'")
-            state = 1
-            
-            result['copy_stat'] =''
-
-            #iterate to check the TS File status every 10 seconds for 10 attempts
-            for i in range(0,10):
-                ts_status = session.send_command("cmlsh -e 'show techsupport status'")
-                #Action block when TS File is completed
-                if 'Is Complete' in ts_status:
-                    output = session.send_command('ls')
-                    file_list = []
-                    for files in output.split():
-                        match = re.match(ts_file_pat, files)
-                        if match:
-                            file_list.append(match.group())
-                            if node_type == 'vm':
-                                copy_cmd = f'copy filepath /var/log/{file_list[0]} scp scp://{remote_username}:{remote_password}@{remote_host}{remote_path}/{file_list[0]}'
-                            else:
-
-                                copy_cmd = f'copy filepath /var/log/{file_list[0]} scp scp://{remote_username}:{remote_password}@{remote_host}{remote_path}/{file_list[0]} vrf management'
-                            session.send_command('exit',expect_string='$')
-                            session.send_command('exit',expect_string='#')
-                            output = session.send_command(copy_cmd, expect_string='#', read_timeout=60)
-                            state = 0
-                    #break from iterating loop
-                    break
+                session.send_command("cmlsh -e 'show techsupport all'")
+
+                def is_complete():
+                    return 'Is Complete' in session.send_command("cmlsh -e 'show techsupport status'")
+
+                def progress(elapsed):
+                    display.display(f'{label}: Tech Support still running after {elapsed:.0f} seconds')
+
+                if not wait_until(is_complete, ts_timeout, interval=poll_interval,
+                                  max_interval=max_poll_interval, progress=progress):
+                    raise AnsibleError(f"Tech Support did not complete within {ts_timeout} seconds")
+
+                file_list = list_ts_files(session)
+                if not file_list:
+                    raise AnsibleError("Tech Support File not found in /var/log")
+
+                if node_type == 'vm':
+                    copy_cmd = f'copy filepath /var/log/{file_list[0]} scp scp://{remote_username}:{remote_password}@{remote_host}{remote_path}/{file_list[0]}'
                 else:
-                    #display.display('Still Waiting..')
-                    time.sleep(10)
-
-            if 'Failed' in output:
-                state = 1
-            
-            if state:
-                raise AnsibleError(f"Copy failed for {file_list[0]}: {output}")    
-            else:
-                result['copied_files'].append(file_list[0])
-                result['TS_File_Location'] = f'{remote_path}@{remote_host}'
-                result['copy_stat'] += output
-                result['changed'] = True
-        
-        except Exception as e:
-            raise AnsibleError(f"OcNOS TechSupport extraction failed: {str(e)}")
-        return result        
+                    copy_cmd = f'copy filepath /var/log/{file_list[0]} scp scp://{remote_username}:{remote_password}@{remote_host}{remote_path}/{file_list[0]} vrf management'
+                session.set_mode(CLI)
+                output = session.send_command(copy_cmd, expect_string='#', read_timeout=60)
+
+                if 'Failed' in output:
+                    raise AnsibleError(f"Copy failed for {file_list[0]}: {output}")
+
+                return {
+                    'changed': True,
+                    'copied_files': [file_list[0]],
+                    'TS_File_Location': f'{remote_path}@{remote_host}',
+                    'copy_stat': output,
+                }
+
+        if not hosts:
+            # Extract OcNOS connection details from inventory
+            params = get_connection_params(self._task.args, task_vars)
+
+            result = {'changed': False, 'copied_files': [], 'failed': False}
+            try:
+                result.update(extract(params, task_vars.get('inventory_hostname')))
+            except Exception as e:
+                raise AnsibleError(f"OcNOS TechSupport extraction failed: {str(e)}")
+            return result
+
+        if isinstance(hosts, str):
+            hosts = [hosts]
+
+        hostvars = task_vars.get('hostvars', {})
+        result = {'changed': False, 'hosts': {}, 'failed_hosts': {}, 'failed': False}
+
+        def extract_host(host):
+            params = get_connection_params({}, hostvars.get(host, {}), defaults={'ansible_host': host})
+            return extract(params, host)
+
+        display.display(f'Extracting OcNOS TechSupport from {len(hosts)} hosts with {workers} workers')
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = dict((host, executor.submit(extract_host, host)) for host in hosts)
+            for host, future in futures.items():
+                try:
+                    result['hosts'][host] = future.result()
+                    result['changed'] = True
+                except Exception as e:
+                    result['failed_hosts'][host] = f"OcNOS TechSupport extraction failed: {str(e)}"
+
+        if result['failed_hosts']:
+            result['failed'] = True
+            result['msg'] = f"OcNOS TechSupport extraction failed on {len(result['failed_hosts'])} of {len(hosts)} hosts"
+
+        return result
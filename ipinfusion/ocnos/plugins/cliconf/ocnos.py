@@ -22,10 +22,27 @@ short_description: Use ocnos cliconf to run command on IP Infusion OcNOS
 description:
   - This ocnos plugin provides low level abstraction APIs for
     sending and receiving CLI commands from IP Infusion OcNOS devices.
+options:
+  ignored_errors:
+    description:
+      - Additional regular expressions for device error messages that are
+        ignored while configuration lines are pushed, on top of the
+        built-in list of benign errors such as C(%% Configuration already exists).
+    type: list
+    elements: str
+    default: []
+    vars:
+      - name: ansible_ocnos_ignored_errors
 """
 
+import hashlib
+import inspect
+import os
 import re
 import json
+import tempfile
+import time
+import uuid
 
 from itertools import chain
 
@@ -35,6 +52,8 @@ from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.c
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import to_list
 from ansible.plugins.cliconf import CliconfBase, enable_mode
 from ansible.errors import AnsibleConnectionFailure
+from ansible_collections.ipinfusion.ocnos.plugins.terminal.ocnos import TerminalModule
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import PatternClassifier, ConfigIndex, config_difference
 
 ignored_errors = [
         re.compile(r"%% L2/L3 mode cannot be explicitly configured on aggregator interfaces"),
@@ -64,6 +83,58 @@ ignored_errors = [
         re.compile(r"%% All dynamic routes on this physical port will be lost due to this ESI/system mac change"),
 ]
 
+_ignored_errors_classifier = PatternClassifier(ignored_errors)
+
+# show commands that have a JSON form, "show json ..."
+JSON_COMMAND_RE = re.compile(r'^show\s+(?!json\b|xml\b)')
+
+
+# echo of a line sent to the device, the prompt followed by the line
+ECHO_RE = re.compile(r'^[\w+\-\.:\/\[\]]+(?:\([^\)]+\)){,3}[>#] ?(?P<line>.*?)\s*$')
+
+
+def is_error_output(output):
+    """Whether the output of a command holds a device error"""
+    for line in output.splitlines():
+        data = to_bytes('\r\n%s' % line, errors='surrogate_then_replace')
+        if any(regex.search(data) for regex in TerminalModule.terminal_stderr_re):
+            return True
+    return False
+
+
+def split_window_output(lines, transcript):
+    """
+    Split the raw output of a pipelined window, prompts included, on the
+    echo of each line.  The echoes are expected in the order the lines were
+    sent, a line whose echo is missing has no output.
+    :return: tuple of the per line outputs, None for a line without echo,
+             and the output found before the first echo, None if empty
+    """
+    expected = [line.strip() for line in lines]
+    outputs = [None for line in lines]
+    unattributed = []
+    current = None
+    position = 0
+    for out in transcript.splitlines():
+        match = ECHO_RE.match(out.strip('\r'))
+        if match:
+            echoed = match.group('line')
+            if not echoed:
+                # bare prompt
+                continue
+            if echoed in expected[position:]:
+                current = expected.index(echoed, position)
+                outputs[current] = []
+                position = current + 1
+                continue
+        if current is None:
+            unattributed.append(out)
+        else:
+            outputs[current].append(out)
+
+    outputs = [None if out is None else '\n'.join(out).strip() for out in outputs]
+    unattributed = '\n'.join(unattributed).strip()
+    return outputs, unattributed or None
 
 
 class Cliconf(CliconfBase):
@@ -112,12 +183,12 @@ class Cliconf(CliconfBase):
             'format': ['text'],
             'diff_match': ['line', 'strict', 'exact', 'none'],
             'diff_replace': ['line', 'block'],
-            'output': []
+            'output': ['text', 'json']
         }
 
     def get_capabilities(self):
         result = super(Cliconf, self).get_capabilities()
-        result['rpc'] += ['get_diff', 'run_commands']
+        result['rpc'] += ['get_diff', 'run_commands', 'run_commands_batch', 'run_commands_to_files']
         result['device_operations'] = self.get_device_operations()
         result.update(self.get_option_values())
         return json.dumps(result)
@@ -134,45 +205,45 @@ class Cliconf(CliconfBase):
         return self.send_command(cmd)
 
     @enable_mode
-    def edit_config(self, candidate=None, commit=True, replace=None, comment=None):
+    def edit_config(self, candidate=None, commit=True, replace=None, comment=None, window=None, ignored_errors=None):
         operations = self.get_device_operations()
         self.check_edit_config_capability(operations, candidate, commit, replace, comment)
 
+        self._error_classifier = self._get_error_classifier(ignored_errors)
+        self._ignored = []
+
         resp = {}
         results = []
         requests = []
-        for cmd in chain(['configure terminal'], to_list(candidate)):
-            #results.append(self.send_command(cmd))
-            #requests.append(cmd)
-            try:
-                requests.append(cmd)
-                result = self.send_command(cmd)
-                results.append(result)
-            except AnsibleConnectionFailure as e:
-                pass
-                ignored = False
-                for regex in ignored_errors:
-                    match = regex.search(str(e))
-                    if match:
-                        ignored = True
+        if window and window > 1 and self._supports_window():
+            requests.append('configure terminal')
+            results.append(self.send_command('configure terminal'))
+            lines = [line for line in to_list(candidate) if line.strip()]
+            for index in range(0, len(lines), window):
+                self._edit_config_window(lines[index:index + window], requests, results)
+        else:
+            for cmd in chain(['configure terminal'], to_list(candidate)):
+                #results.append(self.send_command(cmd))
+                #requests.append(cmd)
+                try:
+                    requests.append(cmd)
+                    result = self.send_command(cmd)
+                    results.append(result)
+                except AnsibleConnectionFailure as e:
+                    if self._is_ignored_error(cmd, str(e)):
                         results.append("IGNORED %s" % str(e))
-                        break
-
-                if not ignored:
-                    raise e
-                    #results.append("ERROR %s" % str(e))
-                    #pass
+                    else:
+                        raise e
+                        #results.append("ERROR %s" % str(e))
+                        #pass
 
         ignored = True
         if commit:
             commitresult = self.send_command('commit')
             if '% Failed to commit' in commitresult:
-                ignored = False
-                for regex in ignored_errors:
-                    if regex.search(commitresult):
-                        ignored = True
-                        results.append("IGNORED %s" % commitresult)
-                        break
+                ignored = self._is_ignored_error('commit', commitresult)
+                if ignored:
+                    results.append("IGNORED %s" % commitresult)
 
         endresult = self.send_command('end')
 
@@ -187,8 +258,95 @@ class Cliconf(CliconfBase):
 
         resp['request'] = requests
         resp['response'] = results
+        resp['ignored'] = self._ignored
         return resp
 
+    def _get_error_classifier(self, ignored_errors=None):
+        """
+        Build the classifier for benign device errors out of the built-in
+        list, the ignored_errors connection option and the task patterns
+        """
+        try:
+            extra = list(self.get_option('ignored_errors') or [])
+        except KeyError:
+            extra = []
+        extra.extend(to_list(ignored_errors))
+
+        if not extra:
+            return _ignored_errors_classifier
+        return PatternClassifier(_ignored_errors_classifier.patterns + extra)
+
+    def _is_ignored_error(self, cmd, text):
+        rule = self._error_classifier.classify(text)
+        if rule is None:
+            return False
+        self._ignored.append({'command': cmd, 'error': text, 'rule': rule})
+        return True
+
+    def _supports_window(self):
+        """
+        Whether the connection can read the raw output of a window, with the
+        echo of every line.  network_cli removes the lines holding the prompt,
+        and so the echoes, unless it is asked not to with strip_prompt.
+        """
+        receive = getattr(self._connection, 'receive', None)
+        if receive is None:
+            return False
+        try:
+            return 'strip_prompt' in inspect.signature(receive).parameters
+        except (TypeError, ValueError):
+            return False
+
+    def _edit_config_window(self, lines, requests, results):
+        """
+        Write a window of configuration lines without waiting for the
+        prompt after each line, followed by a unique comment line, and read
+        the output up to the echo of that comment line.  The output is then
+        split on the echo of each line and scanned for errors.
+        :param lines: configuration lines of the window
+        :param requests: list the sent lines are appended to
+        :param results: list the per line output is appended to
+        :return: None
+        """
+        marker = '! ansible window end %s' % uuid.uuid4().hex
+        self.send_command('\n'.join(lines + [marker]), sendonly=True)
+
+        # every read ends at a prompt, the echo of the next line follows in
+        # the next read.  A read that sees a device error raises, its
+        # message holds the end of that read, the error included.  Other
+        # failures, a command timeout or a closed socket, are raised.
+        timeout = int(self._connection.get_option('persistent_command_timeout'))
+        deadline = time.time() + timeout
+        transcript = ''
+        while marker not in transcript:
+            try:
+                chunk = self._connection.receive(strip_prompt=False)
+            except AnsibleConnectionFailure as e:
+                if not is_error_output(str(e)):
+                    raise
+                chunk = str(e)
+            transcript += to_text(chunk, errors='surrogate_then_replace')
+            if marker not in transcript and time.time() >= deadline:
+                raise AnsibleConnectionFailure("end of configuration window starting with '%s' not received within %d seconds"
+                                               % (lines[0], timeout))
+
+        outputs, unattributed = split_window_output(lines + [marker], transcript)
+        if unattributed is not None and is_error_output(unattributed):
+            raise AnsibleConnectionFailure("configuration window starting with '%s' failed: %s" % (lines[0], unattributed))
+
+        for cmd, out in zip(lines, outputs):
+            requests.append(cmd)
+            if out is None:
+                # the echo of the line was lost with the output of a read
+                # interrupted by an error, its outcome is unknown
+                raise AnsibleConnectionFailure("output of configuration line '%s' was not received" % cmd)
+            if not is_error_output(out):
+                results.append(out)
+            elif self._is_ignored_error(cmd, out):
+                results.append("IGNORED %s" % out)
+            else:
+                raise AnsibleConnectionFailure("configuration line '%s' failed: %s" % (cmd, out))
+
     def get(self, command, prompt=None, answer=None, sendonly=False, newline=True, check_all=False):
         return self.send_command(command=command, prompt=prompt, answer=answer, sendonly=sendonly, newline=newline, check_all=check_all)
 
@@ -216,7 +374,8 @@ class Cliconf(CliconfBase):
         if running and diff_match != 'none':
             # running configuration
             running_obj = NetworkConfig(indent=1, contents=running, ignore_lines=diff_ignore_lines)
-            configdiffobjs = candidate_obj.difference(running_obj, path=path, match=diff_match, replace=diff_replace)
+            configdiffobjs = config_difference(candidate_obj, ConfigIndex(running_obj), path=path,
+                                               match=diff_match, replace=diff_replace)
 
         else:
             configdiffobjs = candidate_obj.items
@@ -224,6 +383,28 @@ class Cliconf(CliconfBase):
         diff['config_diff'] = dumps(configdiffobjs, 'commands') if configdiffobjs else ''
         return diff
 
+    def _send_command(self, cmd):
+        """
+        Send a command, in its JSON form when the json output is requested
+        :param cmd: dict with command, prompt, answer and output keys
+        :return: tuple of the output text and the parsed JSON object, which
+                 is None when the text form was used. A show command that
+                 has no JSON rendering falls back to its text form.
+        """
+        output = cmd.pop('output', None)
+        if output and output not in self.get_option_values()['output']:
+            raise ValueError("'output' value %s is not supported for run_commands" % output)
+
+        if output == 'json' and JSON_COMMAND_RE.match(cmd['command']):
+            json_cmd = dict(cmd, command=JSON_COMMAND_RE.sub('show json ', cmd['command'], 1))
+            try:
+                out = to_text(self.send_command(**json_cmd), errors='surrogate_then_replace')
+                return out, json.loads(out)
+            except (AnsibleConnectionFailure, ValueError):
+                pass
+
+        return self.send_command(**cmd), None
+
     def run_commands(self, commands=None, check_rc=True):
         if commands is None:
             raise ValueError("'commands' value is required")
@@ -233,21 +414,97 @@ class Cliconf(CliconfBase):
             if not isinstance(cmd, Mapping):
                 cmd = {'command': cmd}
 
-            output = cmd.pop('output', None)
-            if output:
-                raise ValueError("'output' value %s is not supported for run_commands" % output)
-
             try:
-                out = self.send_command(**cmd)
+                out, obj = self._send_command(cmd)
             except AnsibleConnectionFailure as e:
                 if check_rc:
                     raise
-                out = getattr(e, 'err', to_text(e))
+                out, obj = getattr(e, 'err', to_text(e)), None
 
-            responses.append(out)
+            responses.append(out if obj is None else obj)
 
         return responses
 
+    def run_commands_batch(self, commands=None, check_rc=False):
+        """
+        Run a list of commands in a single RPC call
+        :param commands: list of commands, either plain strings or dicts
+                         with command, prompt, answer and output keys
+        :param check_rc: raise on the first failed command instead of
+                         reporting the error for that command
+        :return: ordered list of dicts with output and error keys, one per
+                 command. error is None when the command succeeded. output
+                 is the parsed object for commands run with the json output.
+        """
+        if commands is None:
+            raise ValueError("'commands' value is required")
+
+        results = list()
+        for cmd in to_list(commands):
+            if not isinstance(cmd, Mapping):
+                cmd = {'command': cmd}
+
+            try:
+                out, obj = self._send_command(cmd)
+            except AnsibleConnectionFailure as e:
+                if check_rc:
+                    raise
+                results.append({'output': None, 'error': getattr(e, 'err', to_text(e))})
+                continue
+
+            if obj is None:
+                obj = to_text(out, errors='surrogate_then_replace')
+            results.append({'output': obj, 'error': None})
+
+        return results
+
+    def run_commands_to_files(self, commands=None, paths=None, chunk_size=1048576):
+        """
+        Run commands and write each output to a file on the controller
+        :param commands: list of commands, either plain strings or dicts
+                         with command, prompt, answer and output keys
+        :param paths: list of file paths, one per command
+        :param chunk_size: number of bytes written at once
+        :return: ordered list of dicts with path, size and sha256 keys.
+                 The outputs themselves are not returned, they do not go
+                 through the RPC to the module.
+        """
+        if commands is None or paths is None:
+            raise ValueError("'commands' and 'paths' values are required")
+        commands = to_list(commands)
+        if len(commands) != len(paths):
+            raise ValueError("one path is required per command")
+
+        results = list()
+        for cmd, path in zip(commands, paths):
+            if not isinstance(cmd, Mapping):
+                cmd = {'command': cmd}
+
+            data = to_bytes(self._send_command(cmd)[0], errors='surrogate_then_replace')
+            view = memoryview(data)
+            sha256 = hashlib.sha256()
+
+            directory = os.path.dirname(os.path.abspath(path))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for offset in range(0, len(data), chunk_size):
+                        chunk = view[offset:offset + chunk_size]
+                        sha256.update(chunk)
+                        f.write(chunk)
+                os.rename(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            results.append({'path': path, 'size': len(data), 'sha256': sha256.hexdigest()})
+            del view, data
+
+        return results
+
     def set_cli_prompt_context(self):
         """
         Make sure we are in the operational cli mode
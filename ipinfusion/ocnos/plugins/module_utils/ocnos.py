@@ -25,17 +25,32 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import hashlib
 import json
+import os
+import re
+import tempfile
+import time
 
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.basic import env_fallback
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import to_list, EntityCollection
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import ignore_line
 from ansible.module_utils.connection import Connection, exec_command
 from ansible.module_utils.connection import ConnectionError
 
 _DEVICE_CONFIGS = {}
 _CONNECTION = None
 
+DEFAULT_CACHE_DIR = '~/.ansible/ocnos_cache'
+
+# commands sent in one RPC call, all of them have to complete within the
+# persistent_command_timeout of the connection
+BATCH_SIZE = 10
+
+# characters NetworkConfig drops from a line before looking at it
+_CONFIG_ENTRY_CHARS = dict((ord(c), None) for c in '{};')
+
 ocnos_provider_spec = {
     'host': dict(required=True),
     'port': dict(type='int', default=22),
@@ -54,10 +69,163 @@ ocnos_argument_spec = {
 command_spec = {
     'command': dict(key=True),
     'prompt': dict(),
-    'answer': dict()
+    'answer': dict(),
+    'output': dict()
 }
 
 
+class PatternClassifier(object):
+    """Match text against a list of regular expressions in a single pass
+
+    The patterns are compiled into one alternation.  A pattern with groups
+    is matched on its own instead, as its group numbers and backreferences
+    would change meaning inside the alternation.  classify() returns the
+    pattern that matched, or None when none of them matches.
+    """
+
+    def __init__(self, patterns=None):
+        self.patterns = list()
+        self._regex = None
+        self._combined = list()
+        self._separate = list()
+        self.add(patterns or list())
+
+    def add(self, patterns):
+        for pattern in patterns:
+            pattern = getattr(pattern, 'pattern', pattern)
+            if pattern in self.patterns:
+                continue
+            # fail on the offending pattern rather than on the alternation
+            regex = re.compile(pattern)
+            self.patterns.append(pattern)
+            if regex.groups:
+                self._separate.append((pattern, regex))
+            else:
+                self._combined.append(pattern)
+
+        alternatives = list()
+        for index, pattern in enumerate(self._combined):
+            # global inline flags are only allowed at the start of the
+            # whole expression, scope them to their own alternative
+            match = re.match(r'\(\?([aiLmsux]+)\)', pattern)
+            if match:
+                pattern = '(?%s:%s)' % (match.group(1), pattern[match.end():])
+            alternatives.append('(?P<_p%d>%s)' % (index, pattern))
+
+        self._regex = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def classify(self, text):
+        if self._regex is not None:
+            match = self._regex.search(text)
+            if match:
+                return self._combined[int(match.lastgroup[2:])]
+        for pattern, regex in self._separate:
+            if regex.search(text):
+                return pattern
+        return None
+
+
+class ConfigIndex(object):
+    """Index of a NetworkConfig for config_difference()
+
+    Every line of the config is hashed once by its full path, so diffing a
+    candidate costs a lookup per candidate line instead of a scan of the
+    whole config for each of them.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lines = set()
+        self.objects = dict()
+        for item in config.items:
+            path = item.parents
+            path.append(item.text)
+            self.lines.add(' '.join(path))
+            self.objects.setdefault(tuple(path), item)
+
+    def get_block(self, path):
+        obj = self.objects.get(tuple(path))
+        if obj is None:
+            raise ValueError('path does not exist in config')
+        return self.config._expand_block(obj)
+
+
+def config_digest(contents, ignore_lines=None):
+    """Return the sha1 of a config as NetworkConfig.sha1 computes it
+
+    The lines are hashed as they are read, the config tree is never built.
+    """
+    regexes = [re.compile(pattern) for pattern in ignore_lines or []]
+    sha1 = hashlib.sha1()
+    separator = b''
+    for line in contents.split('\n'):
+        text = line.translate(_CONFIG_ENTRY_CHARS).strip()
+        if not text or ignore_line(text) or any(regex.match(text) for regex in regexes):
+            continue
+        sha1.update(separator)
+        sha1.update(to_bytes(line, errors='surrogate_or_strict'))
+        separator = b'\n'
+    return sha1.hexdigest()
+
+
+def config_difference(candidate, index, match='line', path=None, replace=None):
+    """Return the lines of candidate that are missing from the indexed config
+
+    The result is the same as candidate.difference() against the config of
+    the index, with the same match, path and replace semantics. Only the
+    lookup of the candidate lines in the config is indexed, the expansion
+    of the parents, which repeats a parent when the candidate returns to
+    an earlier block, is the one of netcommon.
+    """
+    if match == 'line':
+        updates = [item for item in candidate.items if item.line not in index.lines]
+    else:
+        if path:
+            try:
+                other = index.get_block(path)
+            except ValueError:
+                other = list()
+        else:
+            other = list(index.config.items)
+        updates = getattr(candidate, '_diff_%s' % match)(other)
+
+    if replace == 'block':
+        parents = list()
+        for item in updates:
+            if not item.has_parents:
+                parents.append(item)
+            else:
+                for p in item._parents:
+                    if p not in parents:
+                        parents.append(p)
+
+        updates = list()
+        for item in parents:
+            updates.extend(candidate._expand_block(item))
+
+    visited = set()
+    expanded = list()
+    for item in updates:
+        add_parents = False
+        if expanded:
+            last = expanded[-1]
+            # the parents are sent again when the previous line belongs to
+            # another block, or is a parent that is not followed by its
+            # own first child
+            if item.has_parents and last.has_parents and item.parents[0] != last.parents[0]:
+                add_parents = True
+            if last.has_children and last.children[0] != item.text:
+                add_parents = True
+        for p in item._parents:
+            if p.line not in visited or add_parents:
+                visited.add(p.line)
+                expanded.append(p)
+        expanded.append(item)
+        visited.add(item.line)
+
+    return expanded
+
+
 def get_provider_argspec():
     return ocnos_provider_spec
 
@@ -91,7 +259,96 @@ def get_capabilities(module):
     return module._ocnos_capabilities
 
 
-def get_config(module, flags=None):
+def cache_enabled(module):
+    """Whether a controller side cache can be used for this device
+
+    The cache is keyed by cache_key, the inventory hostname the action
+    plugin passes, as devices can report the same hostname.
+    """
+    return bool(module.params.get('cache_key'))
+
+
+def _cache_path(module, name):
+    if not cache_enabled(module):
+        return None
+    cache_key = module.params['cache_key'].replace(os.sep, '_')
+    cache_dir = os.path.expanduser(module.params.get('cache_dir') or DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, cache_key, '%s.json' % name)
+
+
+def read_cache(module, name):
+    """Return the data cached on the controller for this device, or None"""
+    path = _cache_path(module, name)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError) as exc:
+        module.warn('ignoring unreadable cache file %s: %s' % (path, to_text(exc)))
+        return None
+
+
+def write_cache(module, name, data):
+    """Store data for this device on the controller, replacing it atomically"""
+    path = _cache_path(module, name)
+    if not path:
+        module.warn('cache_key is not set, not caching %s' % name)
+        return
+    try:
+        cache_dir = os.path.dirname(path)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as exc:
+        module.warn('unable to write cache file %s: %s' % (path, to_text(exc)))
+
+
+def delete_cache(module, name):
+    path = _cache_path(module, name)
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except (IOError, OSError) as exc:
+            module.warn('unable to remove cache file %s: %s' % (path, to_text(exc)))
+
+
+def get_config_indicator(module):
+    """Return a digest that changes with every commit, or None
+
+    It is taken from 'show commit list', which is a few lines long
+    whatever the size of the running-config.
+    """
+    try:
+        out = get_connection(module).get('show commit list')
+    except ConnectionError:
+        return None
+    return hashlib.sha1(to_bytes(out, errors='surrogate_then_replace')).hexdigest()
+
+
+def _get_config_cache(module, cache_ttl):
+    if not hasattr(module, '_ocnos_config_cache'):
+        cache = None
+        indicator = get_config_indicator(module)
+        if indicator:
+            cache = read_cache(module, 'running_config')
+            if (not cache or cache.get('indicator') != indicator or
+                    time.time() - cache.get('timestamp', 0) >= cache_ttl):
+                cache = dict(indicator=indicator, timestamp=time.time(), configs=dict())
+        module._ocnos_config_cache = cache
+    return module._ocnos_config_cache
+
+
+def get_config(module, flags=None, cache_ttl=None):
+    """Return the output of show running-config with the given flags
+
+    With cache_ttl the output is also cached on the controller for up to
+    cache_ttl seconds, as long as the commit list of the device is
+    unchanged.
+    """
     flags = [] if flags is None else flags
 
     cmd = 'show running-config '
@@ -101,13 +358,28 @@ def get_config(module, flags=None):
     try:
         return _DEVICE_CONFIGS[cmd]
     except KeyError:
-        conn = get_connection(module)
-        out = conn.get(cmd)
-        cfg = to_text(out, errors='surrogate_then_replace').strip()
+        cache = _get_config_cache(module, cache_ttl) if cache_ttl and cache_enabled(module) else None
+        if cache and cmd in cache['configs']:
+            cfg = cache['configs'][cmd]
+        else:
+            conn = get_connection(module)
+            out = conn.get(cmd)
+            cfg = to_text(out, errors='surrogate_then_replace').strip()
+            if cache:
+                cache['configs'][cmd] = cfg
+                write_cache(module, 'running_config', cache)
         _DEVICE_CONFIGS[cmd] = cfg
         return cfg
 
 
+def clear_config_cache(module):
+    """Forget the running-config fetched so far, after it was changed"""
+    _DEVICE_CONFIGS.clear()
+    if hasattr(module, '_ocnos_config_cache'):
+        del module._ocnos_config_cache
+    delete_cache(module, 'running_config')
+
+
 def to_commands(module, commands):
     if not isinstance(commands, list):
         raise AssertionError('argument must be of type <list>')
@@ -128,20 +400,81 @@ def run_commands(module, commands, check_rc=True):
 
     commands = to_commands(module, to_list(commands))
 
+    # a failing command raises ConnectionError just like the per command
+    # connection.get() calls did, but up to BATCH_SIZE commands share one
+    # RPC round trip
+    results = list()
+    for batch in split_batches(commands):
+        results.extend(connection.run_commands_batch(commands=batch, check_rc=True))
+
     responses = list()
+    for item in results:
+        output = item['output']
+        if not isinstance(output, (dict, list)):
+            output = to_text(output, errors='surrogate_then_replace')
+        responses.append(output)
+    return responses
 
-    for cmd in commands:
-        out = connection.get(**cmd)
-        responses.append(to_text(out, errors='surrogate_then_replace'))
 
-    return responses
+def split_batches(commands, size=BATCH_SIZE):
+    """Split commands into lists of at most size commands"""
+    return [commands[i:i + size] for i in range(0, len(commands), size)]
+
+
+def run_commands_batch(module, commands):
+    """Run commands over the persistent connection in few RPC calls
+
+    The commands are sent BATCH_SIZE at a time, the commands of a call
+    share the persistent_command_timeout of the connection.
+
+    Returns two lists ordered like commands, the outputs and the errors.
+    Output is None for a failed command and error is None for a command
+    that succeeded.
+    """
+    connection = get_connection(module)
+
+    commands = to_commands(module, to_list(commands))
+    results = list()
+    for batch in split_batches(commands):
+        results.extend(connection.run_commands_batch(commands=batch, check_rc=False))
+
+    responses = list()
+    errors = list()
+    for item in results:
+        output = item['output']
+        if output is not None and not isinstance(output, (dict, list)):
+            output = to_text(output, errors='surrogate_then_replace')
+        responses.append(output)
+        errors.append(item['error'])
+
+    return responses, errors
+
+
+def run_commands_to_files(module, commands, paths):
+    """Run commands and have the connection write each output to a file
+
+    Returns a list ordered like commands of dicts with path, size and
+    sha256 of each output.
+    """
+    connection = get_connection(module)
+
+    commands = to_commands(module, to_list(commands))
+    return connection.run_commands_to_files(commands=commands, paths=paths)
+
 
+def load_config(module, config, commit=False, window=None, ignored_errors=None, full_response=False):
+    kwargs = dict(commit=commit)
+    if window:
+        kwargs['window'] = window
+    if ignored_errors:
+        kwargs['ignored_errors'] = ignored_errors
 
-def load_config(module, config, commit=False):
     try:
         conn = get_connection(module)
         conn.get('enable')
-        resp = conn.edit_config(config, commit=commit)
+        resp = conn.edit_config(config, **kwargs)
+        if full_response:
+            return resp
         return resp.get('response')
     except ConnectionError as exc:
         module.fail_json(msg=to_text(exc))
@@ -0,0 +1,750 @@
+#
+# Copyright (C) 2020 IP Infusion
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import hashlib
+import re
+import time
+
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands, run_commands_batch
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import cache_enabled, read_cache, write_cache
+from ansible.module_utils.six import iteritems
+from ansible.module_utils.six.moves import zip
+from ansible.module_utils.connection import ConnectionError
+
+
+INTERFACE_RE = re.compile(r'^Interface (.*)')
+INTERFACE_BRIEF_RE = re.compile(r'^(\S+)\s+\S+\s+\S+\s+(up|down)\s+')
+INTERFACE_BRIEF_STATUS_RE = re.compile(r'^(\S+).*(up|down)')
+SEPARATOR_RE = re.compile(r'^-+$')
+TRANSCEIVER_PORT_RE = re.compile(r'^(\S+)\s+(.*)$')
+IPV4_RE = re.compile(r'inet (\S+)/(\d+)')
+IPV6_RE = re.compile(r'inet6 (\S+)/(\d+)')
+COUNTER_LINE_RE = re.compile(r'COUNTERS\s+(.+)')
+COUNTER_RE = re.compile(r'([^:]+): (\S*)')
+TRANSCEIVER_LINE_RE = re.compile(r'TRANSCEIVERS[0-9]+\s+(.+)')
+TRANSCEIVER_RE = re.compile(r'\s*(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)')
+TRANSCEIVER_LANE_RE = re.compile(r'\s*(\S+)\s+(\S+)\s+(\S+)\s+(\S+)')
+
+# Rules of the interface facts taken from the first line matching them, as
+# (keyword, regex, fact). The regex only runs when the keyword is in the
+# lowercased line, the regexes ignore case.
+INTERFACE_RULES = [
+    ('description: ', re.compile(r'Description: (.*)', re.I), 'description'),
+    ('current hw addr: ', re.compile(r'Current HW addr: (.*)', re.I), 'macaddress'),
+    ('mtu ', re.compile(r'mtu (\d+) ', re.I), 'mtu'),
+    ('link-speed ', re.compile(r'link-speed (\S*)', re.I), 'bandwidth'),
+    ('hardware is ', re.compile(r'Hardware is (\S*)', re.I), 'mediatype'),
+    ('duplex-', re.compile(r'duplex-([^\s\(]*)', re.I), 'duplex'),
+    ('status ', re.compile(r'Status (up|down)', re.I), 'status'),
+    ('line protocol is ', re.compile(r'line protocol is (up|down)', re.I), 'lineprotocol'),
+    ('port mode is ', re.compile(r'Port Mode is (\S*)', re.I), 'portmode'),
+    ('vrf binding: associated with ', re.compile(r'VRF Binding: Associated with (.*)', re.I), 'vrf'),
+]
+
+
+class FactsBase(object):
+
+    KEY = None
+    COMMANDS = list()
+
+    def __init__(self, module):
+        self.module = module
+        self.facts = dict()
+        self.responses = None
+        self.warnings = []
+
+    def populate(self):
+        try:
+            self.responses = []
+            if not self.COMMANDS:
+                return
+            # the commands of the subset are sent BATCH_SIZE per RPC round trip
+            try:
+                outputs, errors = run_commands_batch(self.module, self.COMMANDS)
+            except ConnectionError as exc:
+                outputs = [None] * len(self.COMMANDS)
+                errors = [str(exc)] * len(self.COMMANDS)
+
+            for cmd, output, error in zip(self.COMMANDS, outputs, errors):
+                if error is not None:
+                    self.warnings.append(f"Failed to execute command '{cmd}': {error}")
+                    self.responses.append(None)
+                elif isinstance(output, str) and "Command not supported" in output:
+                    self.warnings.append(f"Command not supported: {cmd}")
+                    self.responses.append(None)
+                else:
+                    self.responses.append(output)
+        except Exception as exc:
+            self.module.fail_json(msg=f"Unexpected error during command execution: {str(exc)}")
+
+    def run(self, cmd):
+        try:
+            output = run_commands(self.module, [cmd], check_rc=False)
+            if output and isinstance(output[0], str) and "Command not supported" in output[0]:
+                self.warnings.append(f"Command not supported: {cmd}")
+                return None
+            return output[0] if output else None
+        except ConnectionError as exc:
+            self.warnings.append(f"Failed to execute command '{cmd}': {str(exc)}")
+            return None
+        except Exception as exc:
+            self.warnings.append(f"Unexpected error executing command '{cmd}': {str(exc)}")
+            return None
+
+    def safe_parse_int(self, value, default="N/A"):
+        try:
+            return int(value.strip()) if value else default
+        except (ValueError, AttributeError):
+            return default
+
+    def safe_regex_search(self, pattern, data, group=1, default=None):
+        try:
+            if not data:
+                return default
+            match = re.search(pattern, data, re.M | re.I)
+            return match.group(group) if match else default
+        except (AttributeError, IndexError, re.error) as exc:
+            self.warnings.append(f"Regex parsing error: {str(exc)}")
+            return default
+
+
+class Default(FactsBase):
+
+    KEY = 'default'
+    COMMANDS = ['show version', 'show hostname']
+
+    def populate(self):
+        try:
+            super(Default, self).populate()
+            
+            self.facts.update({
+                'version': "N/A",
+                'model': "N/A",
+                'image': "N/A",
+                'hostname': "N/A"
+            })
+
+            if self.responses and len(self.responses) >= 1 and self.responses[0]:
+                data = self.responses[0]
+                self.facts['version'] = self.safe_regex_search(r'^ Software Product: OcNOS, Version: (.*)', data) or "N/A"
+                self.facts['model'] = self.safe_regex_search(r'^ Hardware Model: (.*)', data) or "N/A"
+                self.facts['image'] = self.safe_regex_search(r' Image Filename: (.*)', data) or "N/A"
+
+            if self.responses and len(self.responses) >= 2 and self.responses[1]:
+                data_hostname = self.responses[1]
+                try:
+                    hostname = data_hostname.replace('\n', '').strip()
+                    self.facts['hostname'] = hostname if hostname else "N/A"
+                except (AttributeError, TypeError):
+                    self.warnings.append("Failed to parse hostname data")
+                        
+        except Exception as exc:
+            self.warnings.append(f"Error in Default facts collection: {str(exc)}")
+
+
+class Hardware(FactsBase):
+
+    KEY = 'hardware'
+    COMMANDS = [
+        'show hardware-information memory',
+        'show system-information board-info',
+        'show system-information cpu',
+        'show system-information cpu-load',
+        'show system sensor',
+        "show hardware-information led",
+    ]
+
+    def populate(self):
+        self.facts.update({
+            'memtotal_mb': "N/A",
+            'memfree_mb': "N/A",
+            'serialnum': "N/A",
+            'vendor': "N/A",
+            'product': "N/A",
+            'cpu': "N/A",
+            'ocnos_sensor': "N/A",
+            'power_led': "N/A"
+        })
+        
+        try:
+            super(Hardware, self).populate()
+
+            if not self.responses:
+                self.warnings.append("No hardware command responses received")
+                return
+
+            if len(self.responses) > 0 and self.responses[0]:
+                data = self.responses[0]
+                self.facts['memtotal_mb'] = self.parse_memtotal(data)
+                self.facts['memfree_mb'] = self.parse_memfree(data)
+
+            if len(self.responses) > 1 and self.responses[1]:
+                data_boardinfo = self.responses[1]
+                self.facts['serialnum'] = self.parse_serialnum(data_boardinfo)
+                self.facts['vendor'] = self.parse_vendorinfo(data_boardinfo)
+                self.facts['product'] = self.parse_productname(data_boardinfo)
+                
+            if len(self.responses) > 2 and self.responses[2]:
+                data_cpu = self.responses[2]
+                data_cpuload = self.responses[3] if len(self.responses) > 3 else ""
+                self.facts['cpu'] = self.parse_cpu(data_cpu, data_cpuload)
+
+            if len(self.responses) > 4 and self.responses[4] and "Command not supported" not in self.responses[4]:
+                data_system = self.responses[4]
+                self.facts['ocnos_sensor'] = self.parse_sensor(data_system)
+
+            if len(self.responses) > 5 and self.responses[5] and "Command not supported" not in self.responses[5]:
+                data_powerled = self.responses[5]
+                self.facts['power_led'] = self.parse_powerled(data_powerled)
+
+        except Exception as exc:
+            self.warnings.append(f"Unexpected error in Hardware facts: {str(exc)}")
+
+    def parse_memtotal(self, data):
+        match_result = self.safe_regex_search(r'^Total\s*:(.*) MB', data)
+        return self.safe_parse_int(match_result) if match_result else "N/A"
+
+    def parse_memfree(self, data):
+        match_result = self.safe_regex_search(r'^Free\s*:(.*) MB', data)
+        return self.safe_parse_int(match_result) if match_result else "N/A"
+
+    def parse_serialnum(self, data_boardinfo):
+        return self.safe_regex_search(r'^Serial Number\s+: (\S+)', data_boardinfo, default="N/A")
+
+    def parse_productname(self, data_boardinfo):
+        return self.safe_regex_search(r'^Product Name\s+: (\S+)', data_boardinfo, default="N/A")
+
+    def parse_vendorinfo(self, data_boardinfo):
+        return self.safe_regex_search(r'^Vendor Name\s+: (\S+)', data_boardinfo, default="N/A")
+
+    def parse_cpu(self, data_cpu, data_cpuload):
+        parsed = dict()
+        try:
+            if not data_cpu:
+                return parsed
+                
+            for line in data_cpu.split('\n'):
+                if len(line) == 0:
+                    continue
+
+                match = re.match(r'^Processor\s+:\s(\S+)', line)
+                if match:
+                    key = match.group(1)
+                    parsed[key] = line
+                else:
+                    match = re.match(r'^Model\s+:\s(.+)', line)
+                    if match and key:
+                        parsed[key] = match.group(1)
+                        key = None
+
+            if data_cpuload:
+                for line in data_cpuload.split('\n'):
+                    if len(line) == 0:
+                        continue
+                    match = re.match(r'^CPU core (\S+) Usage\s+:\s(.+)', line)
+                    if match:
+                        key = match.group(1)
+                        if key in parsed:
+                            parsed[key] = { "Model": parsed[key], "Load": match.group(2) }
+
+        except Exception as exc:
+            self.warnings.append(f"Error parsing CPU information: {str(exc)}")
+            
+        return parsed
+
+    def parse_sensor(self, data_sensor):
+        parsed = {}
+        try:
+            if not data_sensor:
+                return parsed
+                
+            skip = True
+            for line in data_sensor.split('\n'):
+                if skip:
+                    match = re.match(r'^-+$', line)
+                    if match:
+                        skip = False
+                    continue
+                    
+                match = re.match(r'^(\S+)\s+\|\s+(\S+)\s+\|\s+([\S\s]+)\s+\|\s+(\S+)\s*\|\s+(\S+)\s+\|\s+(\S+)\s+\|\s+(\S+)\s+\|\s+(\S+)\s+\|\s+(\S+)\s+\|\s+(\S+)', line)
+                if match:
+                    parsed.update({match.group(1):
+                                   {"VALUE": match.group(2), "UNITS": match.group(3).rstrip(), "STATE": match.group(4),
+                                    "LNR": match.group(5), "LCR": match.group(6), "LNC": match.group(7),
+                                    "UNC": match.group(8), "UCR": match.group(9), "UNR": match.group(10)}})
+        except Exception as exc:
+            self.warnings.append(f"Error parsing sensor information: {str(exc)}")
+
+        return parsed        
+
+    def parse_powerled(self, data_powerled):
+        skipcount = 2
+        retvalue = dict()
+        try:
+            if not data_powerled:
+                return retvalue
+                
+            for line in data_powerled.split('\n'):
+                if skipcount > 0:
+                    match = re.match(r'^-+$', line)
+                    if match:
+                        skipcount -= 1
+                    continue
+
+                match = re.match(r'^(\S+)\s+(\S+)\s+(.+)$', line)
+                if match:
+                    retvalue[match.group(1)] = dict(color=match.group(2), description=match.group(3))
+        except Exception as exc:
+            self.warnings.append(f"Error parsing power LED information: {str(exc)}")
+                
+        return retvalue
+
+
+class Config(FactsBase):
+
+    KEY = 'config'
+    COMMANDS = ['show running-config']
+
+    def populate(self):
+        try:
+            super(Config, self).populate()
+            self.facts['config'] = "N/A"
+            
+            if self.responses and len(self.responses) > 0 and self.responses[0] and "Command not supported" not in self.responses[0]:
+                data = self.responses[0]
+                if data and data.strip():
+                    self.facts['config'] = data
+                else:
+                    self.warnings.append("No configuration data received")
+        except Exception as exc:
+            self.warnings.append(f"Error collecting configuration: {str(exc)}")
+
+
+class Interfaces(FactsBase):
+
+    KEY = 'interfaces'
+    COMMANDS = [
+        'show interface',
+        'show interface brief',
+        'show lldp neighbors detail',
+        'show interface counters',
+        'show interface transceiver',
+        'show etherchannel summary'
+    ]
+
+    def populate(self):
+        try:
+            super(Interfaces, self).populate()
+
+            self.facts.update({
+                'all_ipv4_addresses': list(),
+                'all_ipv6_addresses': list(),
+                'interfaces': dict(),
+                'neighbors': dict(),
+                'lagg': list()
+            })
+
+            if not self.responses:
+                self.warnings.append("No interface command responses received")
+                return
+
+            if len(self.responses) >= 2 and self.responses[0] and self.responses[1]:
+                data_interface = self.responses[0]
+                data_interface_br = self.responses[1]
+                data_interface_counter = self.responses[3] if len(self.responses) > 3 else ""
+                data_interface_transceiver = self.responses[4] if len(self.responses) > 4 else ""
+                
+                if "Command not supported" not in data_interface and "Command not supported" not in data_interface_br:
+                    self.facts['interfaces'] = self.parse_interfaces(data_interface, data_interface_br,
+                                                                     data_interface_counter, data_interface_transceiver)
+
+            if len(self.responses) > 2 and self.responses[2] and "Command not supported" not in self.responses[2]:
+                data_neigh_detail = self.responses[2]
+                neighbors = self.parse_neighbors(data_neigh_detail)
+                self.facts['neighbors'] = self.populate_neighbors(neighbors)
+
+            if len(self.responses) > 5 and self.responses[5] and "Command not supported" not in self.responses[5]:
+                data_interface_lagg = self.responses[5]
+                self.facts['lagg'] = self.parse_lagg(data_interface_lagg)
+
+        except Exception as exc:
+            self.warnings.append(f"Error collecting interface facts: {str(exc)}")
+
+    def populate_neighbors(self, neighbors):
+        facts = dict()
+        try:
+            for key, value in iteritems(neighbors):
+                neigh = dict()
+                neigh['Remote Chassis ID'] = self.parse_neigh_chasisID(value) or "N/A"
+                neigh['Remote Port'] = self.parse_neigh_port(value) or "N/A"
+                neigh['Remote System Name'] = self.parse_neigh_sysname(value) or "N/A"
+                facts[key] = neigh
+        except Exception as exc:
+            self.warnings.append(f"Error populating neighbor facts: {str(exc)}")
+
+        return facts
+
+    def parse_neigh_chasisID(self, data):
+        return self.safe_regex_search(r'Chassis id type\s+: (.*)', data)
+
+    def parse_neigh_port(self, data):
+        return self.safe_regex_search(r'Port id type\s+: (.*)', data)
+
+    def parse_neigh_sysname(self, data):
+        result = self.safe_regex_search(r'System Name\s+: (.*)', data)
+        return result if result else "NA"
+
+    def parse_lagg(self, data):
+        parsed_lagg = []
+        try:
+            if not data:
+                return parsed_lagg
+                
+            aggregator = dict()
+            link = []
+            for line in data.split('\n'):
+                if re.search(r'^-+$', line):
+                    aggregator['link'] = link
+                    parsed_lagg.append(aggregator)
+                    aggregator = dict()
+                    link = []
+                else:
+                    match = re.search('^\s+Aggregator Type: (\S+)', line)
+                    if match:
+                        aggregator['AggregatorType'] = match.group(1)
+                        continue
+                    match = re.search('^\s*Aggregator\s+(\S+)\s+(\S+)', line)
+                    if match:
+                        aggregator['AggregatorPort'] = match.group(1)
+                        aggregator['AggregatorID'] = match.group(2)
+                        continue
+                    match = re.search('^\s+Admin Key: (.+)$', line)
+                    if match:
+                        aggregator['AdminKey'] = match.group(1)
+                        continue
+                    match = re.search('^\s+Link: (.+) sync: (.*)$', line)
+                    if match:
+                        link.append({"Link": match.group(1), "sync": match.group(2)})
+                        continue
+
+            if len(link) > 0:
+                aggregator['link'] = link
+            if len(aggregator) > 0:
+                parsed_lagg.append(aggregator)
+        except Exception as exc:
+            self.warnings.append(f"Error parsing LAG information: {str(exc)}")
+                    
+        return parsed_lagg                 
+        
+    def parse_neighbors(self, neighbors):
+        parsed = dict()
+        try:
+            if not neighbors:
+                return parsed
+                
+            key = ''
+            neighbors = ''.join(neighbors)
+            for line in neighbors.split('\n'):
+                if len(line) == 0:
+                    continue
+                if line[0] == ' ':
+                    if key:
+                        parsed[key] += '\n%s' % line
+                else:
+                    match = re.match(r'^Interface Name\s+:\s(\S+)', line)
+                    if match:
+                        key = match.group(1)
+                        parsed[key] = line
+        except Exception as exc:
+            self.warnings.append(f"Error parsing neighbor information: {str(exc)}")
+
+        return parsed
+
+    def add_interface_line(self, record, line):
+        """Read the facts of one line of the interface into its record
+
+        The lines of an interface are added in the order of the commands,
+        show interface first.
+        """
+        # a counter was only read from a line followed by another one
+        if record['pending_counter']:
+            name, value = record['pending_counter']
+            record['counter'][name] = value
+            record['pending_counter'] = None
+
+        lowered = line.lower()
+        for keyword, regex, fact in INTERFACE_RULES:
+            if fact not in record and keyword in lowered:
+                match = regex.search(line)
+                if match:
+                    record[fact] = match.group(1)
+
+        if 'inet' in line:
+            record['ipv4'].extend(IPV4_RE.findall(line))
+            record['ipv6'].extend(IPV6_RE.findall(line))
+
+        if 'COUNTERS' in line:
+            match = COUNTER_LINE_RE.search(line)
+            if match:
+                match = COUNTER_RE.search(match.group(1))
+                if match:
+                    record['pending_counter'] = (match.group(1), match.group(2))
+
+        if 'TRANSCEIVERS' in line:
+            match = TRANSCEIVER_LINE_RE.search(line)
+            if match:
+                self.add_transceiver_lane(record['transceiver'], match.group(1))
+
+    def add_transceiver_lane(self, lanes, line):
+        match = TRANSCEIVER_RE.search(line)
+        if match:
+            lanes.append(dict(zip(('DDM', 'Temp', 'Voltage', 'Lane', 'Current', 'TxPower', 'RxPower'), match.groups())))
+            return
+        # the other lanes of a port only have the lane columns
+        match = TRANSCEIVER_LANE_RE.search(line)
+        if match and lanes:
+            lane = lanes[-1].copy()
+            lane.update(zip(('Lane', 'Current', 'TxPower', 'RxPower'), match.groups()))
+            lanes.append(lane)
+
+    def parse_interfaces(self, data_int, data_int_br, data_int_counter, data_int_tr):
+        """Return the facts of every interface in show interface
+
+        Each output is read once, line by line. The brief status, counter and
+        transceiver lines of an interface are added to its record after the
+        show interface lines, every fact is taken from the first line it is
+        found on.
+        """
+        records = dict()
+        try:
+            record = None
+
+            if data_int:
+                for line in data_int.split('\n'):
+                    if len(line) == 0:
+                        continue
+                    if line[0] == ' ':
+                        if record is not None:
+                            self.add_interface_line(record, line)
+                    else:
+                        match = INTERFACE_RE.match(line)
+                        if match:
+                            record = dict(ipv4=[], ipv6=[], counter=dict(), transceiver=[], pending_counter=None)
+                            records[match.group(1)] = record
+                            self.add_interface_line(record, line)
+
+            if data_int_br:
+                for line in data_int_br.split('\n'):
+                    match = INTERFACE_BRIEF_RE.match(line)
+                    if not match:
+                        match = INTERFACE_BRIEF_STATUS_RE.match(line)
+                    if match and match.group(1) in records:
+                        self.add_interface_line(records[match.group(1)], 'Status %s' % match.group(2).upper())
+
+            if data_int_counter:
+                key = ''
+                for line in data_int_counter.split('\n'):
+                    if len(line) == 0:
+                        key = ''
+                        continue
+                    if key and line[0] == ' ':
+                        if key in records:
+                            self.add_interface_line(records[key], 'COUNTERS %s' % line)
+                    else:
+                        match = INTERFACE_RE.match(line)
+                        if match and match.group(1) != "CPU":
+                            key = match.group(1)
+
+            if data_int_tr:
+                key = ''
+                lanenum = 0
+                skip = True
+                for line in data_int_tr.split('\n'):
+                    if skip:
+                        if SEPARATOR_RE.match(line):
+                            skip = False
+                        continue
+
+                    match = TRANSCEIVER_PORT_RE.match(line)
+                    if match:
+                        key = match.group(1)
+                        lanenum = 0
+                        if key in records:
+                            self.add_interface_line(records[key], 'TRANSCEIVERS%d %s' % (lanenum, match.group(2)))
+                    elif line[0] == ' ' and key:
+                        lanenum += 1
+                        if key in records:
+                            self.add_interface_line(records[key], 'TRANSCEIVERS%d %s' % (lanenum, line))
+        except Exception as exc:
+            self.warnings.append(f"Error parsing interface data: {str(exc)}")
+
+        facts = dict()
+        for key, record in iteritems(records):
+            ipv4 = [dict(address=address, masklen=int(masklen)) for address, masklen in record['ipv4']]
+            ipv6 = [dict(address=address, masklen=int(masklen)) for address, masklen in record['ipv6']]
+            self.facts['all_ipv4_addresses'].extend(addr['address'] for addr in ipv4)
+            self.facts['all_ipv6_addresses'].extend(addr['address'] for addr in ipv6)
+
+            lineprotocol = record.get('status') or record.get('lineprotocol')
+            facts[key] = {
+                'description': record.get('description') or "N/A",
+                'macaddress': record.get('macaddress') or "N/A",
+                'mtu': record.get('mtu') or "N/A",
+                'bandwidth': record.get('bandwidth') or "N/A",
+                'mediatype': record.get('mediatype') or "N/A",
+                'duplex': record.get('duplex') or "N/A",
+                'ipv4': ipv4,
+                'ipv6': ipv6,
+                'lineprotocol': lineprotocol.upper() if lineprotocol else "N/A",
+                'portmode': record.get('portmode') or "N/A",
+                'counter': record['counter'],
+                'transceiver': record['transceiver'],
+                'vrf': record.get('vrf') or "N/A",
+            }
+        return facts
+
+
+FACT_SUBSETS = dict(
+    default=Default,
+    hardware=Hardware,
+    interfaces=Interfaces,
+    config=Config,
+)
+
+VALID_SUBSETS = frozenset(FACT_SUBSETS.keys())
+
+
+def get_runable_subsets(gather_subset):
+    runable_subsets = set()
+    exclude_subsets = set()
+
+    for subset in gather_subset:
+        if subset == 'all':
+            runable_subsets.update(VALID_SUBSETS)
+            continue
+
+        if subset.startswith('!'):
+            subset = subset[1:]
+            if subset == 'all':
+                exclude_subsets.update(VALID_SUBSETS)
+                continue
+            exclude = True
+        else:
+            exclude = False
+
+        if subset not in VALID_SUBSETS:
+            raise ValueError(f'Invalid subset specified: {subset}. Valid subsets are: {", ".join(VALID_SUBSETS)}')
+
+        if exclude:
+            exclude_subsets.add(subset)
+        else:
+            runable_subsets.add(subset)
+
+    if not runable_subsets:
+        runable_subsets.update(VALID_SUBSETS)
+
+    runable_subsets.difference_update(exclude_subsets)
+    runable_subsets.add('default')
+
+    return runable_subsets
+
+
+def load_fact_cache(module, version):
+    """Return the fact cache of the device, emptied when show version changed"""
+    digest = hashlib.sha1(version.encode('utf-8')).hexdigest()
+
+    cache = read_cache(module, 'facts')
+    if not cache or cache.get('version_digest') != digest:
+        cache = dict(version_digest=digest, subsets=dict())
+    return cache
+
+
+def gather_facts(module, runable_subsets, cache_ttl=None):
+    facts = dict()
+    facts['gather_subset'] = list(runable_subsets)
+
+    instances = list()
+    warnings = list()
+
+    cache = None
+    if cache_ttl and not cache_enabled(module):
+        warnings.append("Fact cache disabled, cache_key is not set")
+    elif cache_ttl:
+        # the cache depends on the show version output the default subset
+        # collects, it is always collected first
+        default = FACT_SUBSETS['default'](module)
+        default.populate()
+        facts.update(default.facts)
+        warnings.extend(default.warnings)
+        runable_subsets = runable_subsets - set(['default'])
+
+        version = default.responses[0] if default.responses else None
+        if version:
+            cache = load_fact_cache(module, version)
+        else:
+            warnings.append("Fact cache disabled, failed to execute 'show version'")
+
+    if cache is not None:
+        now = time.time()
+        for key in list(runable_subsets):
+            entry = cache['subsets'].get(key)
+            if key in cache_ttl and entry and now - entry['timestamp'] < int(cache_ttl[key]):
+                facts.update(entry['facts'])
+                runable_subsets = runable_subsets - set([key])
+
+    for key in runable_subsets:
+        try:
+            instance = FACT_SUBSETS[key](module)
+            instances.append(instance)
+        except Exception as exc:
+            warnings.append(f"Failed to initialize {key} facts collector: {str(exc)}")
+
+    for inst in instances:
+        try:
+            inst.populate()
+            facts.update(inst.facts)
+            if hasattr(inst, 'warnings'):
+                warnings.extend(inst.warnings)
+        except Exception as exc:
+            warnings.append(f"Failed to populate facts for {inst.__class__.__name__}: {str(exc)}")
+            continue
+
+        # facts collected with errors are not worth keeping
+        if cache is not None and inst.KEY in cache_ttl and not inst.warnings:
+            cache['subsets'][inst.KEY] = dict(timestamp=time.time(), facts=inst.facts)
+
+    if cache is not None:
+        write_cache(module, 'facts', cache)
+
+    ansible_facts = dict()
+    for key, value in iteritems(facts):
+        try:
+            ansible_facts['ansible_net_%s' % key] = value
+        except Exception as exc:
+            warnings.append(f"Failed to process fact key {key}: {str(exc)}")
+
+    return ansible_facts, warnings
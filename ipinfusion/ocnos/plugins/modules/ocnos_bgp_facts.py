@@ -34,6 +34,41 @@ description:
     current version only supports BGP neighbor status.
     The BGP neighbor status is collected by OcNOS 'show bgp neighbor'
     command and be prepended to C(ansible_net_bgp_neighbor).
+  - The collection can be limited to some neighbors, a VRF or some address
+    families. Only the selected neighbors are requested from the device.
+  - The C(summary) subset reads 'show ip bgp summary' and returns the peers
+    as parallel lists in C(ansible_net_bgp_summary). It is much less output
+    than the neighbor detail when only the peer states are needed.
+options:
+  gather_subset:
+    description:
+      - Restrict the facts collected, the subsets are C(neighbor) and
+        C(summary).
+      - C(summary) is only collected when it is listed or with C(all), so
+        the default C(!neighbor) collects nothing.
+    type: list
+    default: ['!neighbor']
+  neighbors:
+    description:
+      - Addresses of the BGP neighbors to collect, as shown by the device.
+        One 'show bgp neighbor' command is run per neighbor.
+      - All neighbors are collected when not set.
+    type: list
+    elements: str
+  vrf:
+    description:
+      - Collect the neighbors of this VRF only, with
+        'show ip bgp vrf <vrf> neighbors'.
+    type: str
+  address_family:
+    description:
+      - Address families to keep in the neighbor facts, for example
+        C(IPv4 Unicast) or C(l2vpn evpn). The names are not case sensitive.
+      - All address families are kept when not set.
+      - The summary subset supports C(IPv4 Unicast) and C(IPv6 Unicast),
+        it collects C(IPv4 Unicast) when not set.
+    type: list
+    elements: str
 '''
 EAMPLES = '''
 The following is an example of using the module ocnos_bgp_facts.
@@ -47,16 +82,52 @@ The following is an example of using the module ocnos_bgp_facts.
     debug:
       msg: "{{ result }}"
 
+  - name: Collect the uplink peers only
+    ipinfusion.ocnos.ocnos_bgp_facts:
+      gather_subset: neighbor
+      neighbors:
+        - 10.0.0.1
+        - 10.0.0.3
+      address_family: IPv4 Unicast
+
+  - name: Check that every peer is established
+    ipinfusion.ocnos.ocnos_bgp_facts:
+      gather_subset: summary
+      address_family:
+        - IPv4 Unicast
+        - IPv6 Unicast
+
+  - assert:
+      that: ansible_net_bgp_summary['IPv4 Unicast'].state | unique == ['Established']
+
 '''
 RETURN = '''
   ansible_net_bgp_neighbor:
     description: BGP neighbor status collected from the device
     returned: alwas
     type: dict
+  ansible_net_bgp_summary:
+    description:
+      - BGP peers per address family, as parallel lists C(peer), C(as),
+        C(state), C(uptime) and C(prefixes_received). The state of an
+        established peer is C(Established) and its prefixes_received is the
+        number of prefixes received, it is null for the other states.
+      - C(router_id) and C(local_as) of the BGP instance.
+    returned: when summary is collected
+    type: dict
+    sample:
+      IPv4 Unicast:
+        router_id: 1.1.1.1
+        local_as: "65000"
+        peer: ["10.0.0.2", "10.0.0.4"]
+        as: ["65001", "65002"]
+        state: ["Established", "Active"]
+        uptime: ["1d02h03m", "never"]
+        prefixes_received: [3, null]
 '''
 
 import re
-from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands, ocnos_argument_spec, check_args
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands, run_commands_batch, ocnos_argument_spec, check_args
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.six import iteritems
 
@@ -67,6 +138,7 @@ class BgpFactsBase(object):
     def __init__(self, module):
         self.module = module
         self.facts = dict()
+        self.warnings = list()
         self.responses = None
         self.PERSISTENT_COMMAND_TIMEOUT = 60
 
@@ -78,26 +150,224 @@ class BgpFactsBase(object):
         return run_commands(self.module, cmd, check_rc=False)
 
 
+def _camel_case(text):
+    return re.sub(r' (.)', lambda c: c.group(1).upper(), text)
+
+
+def _match_rules(rules, line):
+    """Return the facts of the first rule matching the line, or None
+
+    A rule is (keyword, regex, fields). The regex only runs when the
+    literal keyword is in the line, fields builds the facts from the match.
+    """
+    for keyword, regex, fields in rules:
+        if keyword in line:
+            match = regex.search(line)
+            if match:
+                return fields(match)
+    return None
+
+
+def _bgp_state(match):
+    state = match.group(1)
+    facts = dict()
+    if state == 'Established,':
+        state = "Established"
+        upfor = UP_FOR_RE.search(match.group(2))
+        if upfor:
+            facts["EstablishedUpFor"] = upfor.group(1)
+    facts["state"] = state
+    return facts
+
+
+NEIGHBOR_RE = re.compile(r'^BGP neighbor is (\S+), (vrf \S+, |)remote AS (\S+), local AS (\S+), (\S+)')
+VRF_RE = re.compile(r'vrf (\S+),')
+CAPABILITY_RE = re.compile(r'^ {4}(\S.+)')
+CAPABILITY_VALUE_RE = re.compile(r'(.+)[ ]*: (.*)')
+ADDRESS_FAMILY_RE = re.compile(r'For address family: (\S+ \S+)')
+PREFIX_LIST_SEQ_RE = re.compile(r"^   seq (.+)$")
+ORF_TYPE_RE = re.compile(r'^    Outbound Route Filter \(ORF\) type \((64|128)\) Prefix-list:')
+ORF_SEND_MODE_RE = re.compile(r'^      Send-mode: (.+)')
+ORF_RECEIVE_MODE_RE = re.compile(r'^      Receive-mode: (.+)')
+PREFIX_LIST_RE = re.compile(r'(ip.*) prefix-list (.+): \S+ entries')
+ORF_RE = re.compile(r'^  Outbound Route Filter \(ORF\): (.+)')
+UP_FOR_RE = re.compile(r'up for (\S+)')
+SUMMARY_ROUTER_RE = re.compile(r'BGP router identifier (\S+), local AS number (\S+)')
+
+ADDRESS_FAMILY_FLAGS = (
+    'First update is deferred until ORF or ROUTE-REFRESH is received',
+    'Route-Reflector Client',
+    'Route-Server Client',
+    'Inbound soft reconfiguration allowed',
+    'Private AS number removed from updates to this neighbor',
+    'NEXT_HOP is always this router',
+    'AS_PATH is propagated unchanged to this neighbor',
+    'NEXT_HOP is propagated unchanged to this neighbor',
+    'MED is propagated unchanged to this neighbor',
+)
+ADDRESS_FAMILY_FLAGS_RE = re.compile(r'  (%s)' % '|'.join(re.escape(flag) for flag in ADDRESS_FAMILY_FLAGS))
+
+ADDRESS_FAMILY_FILTERS = (
+    'Default information originate, ',
+    'Weight',
+    'Incoming update prefix filter list is ',
+    'Outgoing update prefix filter list is ',
+    'Incoming update network filter list is ',
+    'Outgoing update network filter list is ',
+    'Incoming update AS path filter list is ',
+    'Outgoing update AS path filter list is ',
+    'Route map for incoming advertisements is ',
+    'Route map for outgoing advertisements is ',
+    'Route map for selective unsuppress is ',
+)
+
+# Rules of the address family lines, tried in order before the ORF and
+# prefix-list lines
+ADDRESS_FAMILY_RULES = [
+    ('BGP table version ', re.compile(r'BGP table version (\S+), neighbor version (\S+)'),
+     lambda m: {"BGPtableVersion": int(m.group(1)), "neighborVersion": int(m.group(2))}),
+    ('Index ', re.compile(r'Index (\S+), Offset (\S+), Mask (\S+)'),
+     lambda m: {"index": int(m.group(1)), "offset": int(m.group(2)), "mask": m.group(3)}),
+    (' peer-group member', re.compile(r'(\S+) peer-group member'),
+     lambda m: {"peerGroupMember": m.group(1)}),
+    ('Graceful restart: ', re.compile(r'Graceful restart: (.+)'),
+     lambda m: {"GracefulRestart": m.group(1)}),
+]
+
+# Rules of the address family lines, tried in order after the flags
+ADDRESS_FAMILY_TAIL_RULES = [
+    ('Community attribute sent to this neighbor (', re.compile(r'Community attribute sent to this neighbor \((\S+)\)'),
+     lambda m: {"communityAttribute": m.group(1)}),
+] + [
+    # the filter lines are anchored, so one rule per filter matches the same
+    (keyword, re.compile(r'^  (%s)(.+)$' % re.escape(keyword)),
+     lambda m: {_camel_case(m.group(1).replace(' is ', '')): m.group(2)})
+    for keyword in ADDRESS_FAMILY_FILTERS
+] + [
+    (' accepted prefixes', re.compile(r'(\S+) accepted prefixes'),
+     lambda m: {"acceptedPrefixes": int(m.group(1))}),
+    (' announced prefixes', re.compile(r'(\S+) announced prefixes'),
+     lambda m: {"announcedPrefixes": int(m.group(1))}),
+]
+
+# Rules of the neighbor lines, tried in order
+NEIGHBOR_RULES = [
+    ('Description: ', re.compile(r'Description: (.+)'),
+     lambda m: {"Description": m.group(1)}),
+    ('Member of peer-group ', re.compile(r'Member of peer-group (\S+) for session parameters'),
+     lambda m: {"MemberOfPeerGroup": m.group(1)}),
+    ('BGP version ', re.compile(r'BGP version (\S+), local router ID (\S+), remote router ID (\S+)'),
+     lambda m: {"BGPversion": m.group(1), "localRouterID": m.group(2), "remoteRouterID": m.group(3)}),
+    ('BGP state = ', re.compile(r'BGP state = (\S+)\s*(.*)'),
+     _bgp_state),
+    ('Last read ', re.compile(r'Last read (\S+), hold time is (\S+), keepalive interval is (\S+) seconds'),
+     lambda m: {"lastRead": m.group(1), "holdTime": int(m.group(2)), "keepAlive": int(m.group(3))}),
+    ('Configured hold time is ', re.compile(r'Configured hold time is (\S+), keepalive interval is (\S+) seconds'),
+     lambda m: {"configuredHoldTime": int(m.group(1)), "configuredKeepAlive": int(m.group(2))}),
+    ('Received ', re.compile(r'Received (\S+) messages, (\S+) notifications, (\S+) in queue'),
+     lambda m: {"Received": {"messages": int(m.group(1)), "notifications": int(m.group(2)), "InQueue": int(m.group(3))}}),
+    ('Sent ', re.compile(r'Sent (\S+) messages, (\S+) notifications, (\S+) in queue'),
+     lambda m: {"Sent": {"messages": int(m.group(1)), "notifications": int(m.group(2)), "InQueue": int(m.group(3))}}),
+    ('Route refresh request: received ', re.compile(r'Route refresh request: received (\S+), sent (\S+)'),
+     lambda m: {"routeRefreshRequest": {"received": int(m.group(1)), "sent": int(m.group(2))}}),
+    ('Minimum time between advertisement runs is ', re.compile(r'Minimum time between advertisement runs is (\S+) seconds'),
+     lambda m: {"minTimeBetweenAdv": int(m.group(1))}),
+    ('Update source is ', re.compile(r'Update source is (\S+)'),
+     lambda m: {"updateSource": m.group(1)}),
+    ('Bidirectional Forwarding Detection is ', re.compile(r'Bidirectional Forwarding Detection is (\S+)'),
+     lambda m: {"BFD": m.group(1)}),
+    ('Connections established ', re.compile(r'Connections established (\S+); dropped (\S+)'),
+     lambda m: {"connections": {"established": int(m.group(1)), "dropped": int(m.group(2))}}),
+    ('Local host: ', re.compile(r'Local host: (\S+), Local port: (\S+)'),
+     lambda m: {"local": {"host": m.group(1), "port": int(m.group(2))}}),
+    ('Foreign host: ', re.compile(r'Foreign host: (\S+), Foreign port: (\S+)'),
+     lambda m: {"foreign": {"host": m.group(1), "port": int(m.group(2))}}),
+    ('  Remote restart time is ', re.compile(r'^  Remote restart time is (\S+) sec'),
+     lambda m: {"gracefulRestartRemoteRestartTime": int(m.group(1))}),
+    ('  Re-established, ', re.compile(r'^  Re-established, (.+)'),
+     lambda m: {"gracefulRestartReastablishedStatus": m.group(1)}),
+    ('External BGP neighbor may be up to ', re.compile(r'External BGP neighbor may be up to (\S+) hops away'),
+     lambda m: {"externalBGPHops": int(m.group(1))}),
+    ('Nexthop: ', re.compile(r'Nexthop: (\S+)'),
+     lambda m: {"nexthop": m.group(1)}),
+    ('Nexthop global: ', re.compile(r'Nexthop global: (\S+)'),
+     lambda m: {"nexthopGlobal": m.group(1)}),
+    ('Nexthop local: ', re.compile(r'Nexthop local: (\S+)'),
+     lambda m: {"nexthopLinklocal": m.group(1)}),
+    ('BGP connection: ', re.compile(r'BGP connection: (.+)'),
+     lambda m: {"BGPConnection": m.group(1)}),
+    ('Next connect timer due in ', re.compile(r'Next connect timer due in (\S+) seconds'),
+     lambda m: {"nextConnectTimer": int(m.group(1))}),
+    ('Capability error: ', re.compile(r'Capability error: (.+)'),
+     lambda m: {"capabilityError": m.group(1)}),
+    ('Last Reset: ', re.compile(r'Last Reset: (\S+), due to (.+)'),
+     lambda m: {"lastReset": m.group(1), "lastResetDueTo": m.group(2)}),
+    ('Notification Error Message: (', re.compile(r'Notification Error Message: \((.+)\)'),
+     lambda m: {"notificationError": m.group(1)}),
+]
+
+
 class BgpNeighbor(BgpFactsBase):
 
     COMMANDS = ['show bgp neighbor']
 
+    def get_commands(self):
+        neighbors = self.module.params.get('neighbors')
+        vrf = self.module.params.get('vrf')
+
+        if vrf:
+            command = 'show ip bgp vrf %s neighbors' % vrf
+        else:
+            command = self.COMMANDS[0]
+
+        if neighbors:
+            return ['%s %s' % (command, neighbor) for neighbor in neighbors]
+        return [command]
+
     def populate(self):
-        super(BgpNeighbor, self).populate()
-        data = self.responses[0]
-        if data:
-            self.facts['bgp_neighbor'] = self.parse_bgp_neighbor(data)
+        commands = self.get_commands()
+        self.responses, errors = run_commands_batch(self.module, commands)
+
+        neighbors = self.module.params.get('neighbors')
+        address_families = self.module.params.get('address_family')
 
-    def parse_bgp_neighbor(self, data):
-        bgpneighborlines = data.split('\n')
         bgpneighbors = dict()
+        for command, data, error in zip(commands, self.responses, errors):
+            if error:
+                self.warnings.append('%s failed: %s' % (command, error))
+            elif data:
+                bgpneighbors.update(self.parse_bgp_neighbor(data, neighbors, address_families))
+
+        if any(self.responses):
+            self.facts['bgp_neighbor'] = bgpneighbors
+
+    def parse_bgp_neighbor(self, data, neighbors=None, address_families=None):
+        """Parse show bgp neighbor output
+
+        Only the neighbors in neighbors are returned and only the address
+        families in address_families are kept, when they are set.
+        """
+        if address_families:
+            address_families = [family.lower() for family in address_families]
+
+        bgpneighbors = dict()
+        skipNeighbor = False
+        family = None
         addressFamily = ''
+        addressFamilyPrefixList = ''
+        orfTypePrefix = ''
         capabilityMode = False
         neighbor = ''
-        for line in bgpneighborlines:
-            match = re.search(r'^BGP neighbor is (\S+), (vrf \S+, |)remote AS (\S+), local AS (\S+), (\S+)', line)
-            if match:
-                if neighbor != match.group(1):
+        for line in data.split('\n'):
+            if line.startswith('BGP neighbor is '):
+                match = NEIGHBOR_RE.search(line)
+                if match:
+                    skipNeighbor = bool(neighbors) and match.group(1) not in neighbors
+                if skipNeighbor:
+                    capabilityMode = False
+                    neighbor = ''
+                    continue
+                if match and neighbor != match.group(1):
                     addressFamily = ''
                     neighbor = match.group(1)
                     bgpneighbors[neighbor] = {
@@ -105,386 +375,229 @@ class BgpNeighbor(BgpFactsBase):
                         "localAS": match.group(4),
                     }
                     if len(match.group(2)) > 0:
-                        match = re.search(r'vrf (\S+),', match.group(2))
+                        match = VRF_RE.search(match.group(2))
                         bgpneighbors[neighbor]["vrf"] = match.group(1)
                     continue
 
-            match = re.search(r'Neighbor capabilities:', line)
-            if match:
+            if skipNeighbor:
+                continue
+
+            if 'Neighbor capabilities:' in line:
                 capabilityMode = True
                 bgpneighbors[neighbor].update({"capabilities": {}})
                 continue
 
             if capabilityMode:
-                match = re.search(r'^ {4}(\S.+)', line)
+                match = CAPABILITY_RE.search(line)
                 if match:
-                    str = match.group(1)
-                    match = re.search(r'(.+)[ ]*: (.*)', str)
+                    match = CAPABILITY_VALUE_RE.search(match.group(1))
                     if match:
-                        capabilityKey = re.sub(r' (.)', lambda c:c.group(1).upper(), match.group(1))
+                        capabilityKey = _camel_case(match.group(1))
                         bgpneighbors[neighbor]["capabilities"].update({capabilityKey: match.group(2)})
                         continue
                 else:
                     capabilityMode = False
-                    
-            match = re.search(r'For address family: (\S+ \S+)', line)
-            if match:
-                addressFamily = match.group(1)
-                if "addressFamily" in bgpneighbors[neighbor]:
-                    bgpneighbors[neighbor]["addressFamily"].update({addressFamily: {}})
-                else:
-                    bgpneighbors[neighbor].update({"addressFamily" : {addressFamily: {}}})
-                addressFamilyPrefixList = ''                    
-                continue
-                              
+
+            if 'For address family: ' in line:
+                match = ADDRESS_FAMILY_RE.search(line)
+                if match:
+                    addressFamily = match.group(1)
+                    # an address family that is not selected is still parsed,
+                    # into a dict that is dropped
+                    family = dict()
+                    if not address_families or addressFamily.lower() in address_families:
+                        if "addressFamily" in bgpneighbors[neighbor]:
+                            bgpneighbors[neighbor]["addressFamily"].update({addressFamily: family})
+                        else:
+                            bgpneighbors[neighbor].update({"addressFamily": {addressFamily: family}})
+                    addressFamilyPrefixList = ''
+                    continue
 
             if len(addressFamily) > 0:
+                # an empty line or a line other than a prefix-list entry does
+                # not end the address family nor the prefix-list
                 if len(line) == 0:
-                    adressFamily = ''
                     continue
 
-                if len(addressFamilyPrefixList) > 0:
-                    match = re.search(r"^   seq (.+)$", line)
+                if len(addressFamilyPrefixList) > 0 and line.startswith('   seq '):
+                    match = PREFIX_LIST_SEQ_RE.search(line)
                     if match:
-                        bgpneighbors[neighbor]["addressFamily"][addressFamily][addressFamilyPrefixList].append(match.group(1))
+                        family[addressFamilyPrefixList].append(match.group(1))
                         continue
-                    else:
-                        addressfamilyPrefixList = ''
-                    
-                match = re.search(r'BGP table version (\S+), neighbor version (\S+)', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "BGPtableVersion": int(match.group(1)),
-                        "neighborVersion": int(match.group(2)),
-                        })
-                    continue
-
-                match = re.search(r'Index (\S+), Offset (\S+), Mask (\S+)', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "index": int(match.group(1)),
-                        "offset": int(match.group(2)),
-                        "mask": match.group(3),
-                        })
-                    continue
-
-                match = re.search(r'(\S+) peer-group member', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "peerGroupMember": match.group(1),
-                        })
-                    continue
-
-                match = re.search(r'Graceful restart: (.+)', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "GracefulRestart": match.group(1),
-                        })
-                    continue
-
-                match = re.search(r'^    Outbound Route Filter \(ORF\) type \((64|128)\) Prefix-list:', line)
-                if match:
-                    orfTypePrefix = match.group(1)
-                    continue
-
-                match = re.search(r'^      Send-mode: (.+)', line)
-                if match and len(orfTypePrefix) > 0:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "ORFType%sSendMode" % orfTypePrefix: match.group(1),
-                        })
-                    continue
-
-                match = re.search(r'^      Receive-mode: (.+)', line)
-                if match and len(orfTypePrefix) > 0:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "ORFType%sReceiveMode" % orfTypePrefix: match.group(1),
-                        })
-                    continue
-
-                match = re.search(r'(ip.*) prefix-list (.+): \S+ entries', line)
-                if match:
-                    addressFamilyPrefixList = match.group(1) + "ipPrefixList_" + match.group(2)
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        addressFamilyPrefixList: []
-                        })
-                    continue
-                    
-                match = re.search(r'^  Outbound Route Filter \(ORF\): (.+)', line)
-                if match and len(orfTypePrefix) > 0:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "ORF": match.group(1),
-                        })
-                    continue
-
-                match = re.search(
-                    r'  (First update is deferred until ORF or ROUTE-REFRESH is received'
-                    '|Route-Reflector Client'
-                    '|Route-Server Client'
-                    '|Inbound soft reconfiguration allowed'
-                    '|Private AS number removed from updates to this neighbor'
-                    '|NEXT_HOP is always this router'
-                    '|AS_PATH is propagated unchanged to this neighbor'
-                    '|NEXT_HOP is propagated unchanged to this neighbor'
-                    '|MED is propagated unchanged to this neighbor'
-                    ')', line)
-                if match:
-                    if not 'flags' in bgpneighbors[neighbor]["addressFamily"][addressFamily]:
-                        bgpneighbors[neighbor]["addressFamily"][addressFamily].update({"flags": []})
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily]["flags"].append(match.group(1))
-
-                match = re.search(r'Community attribute sent to this neighbor \((\S+)\)', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "communityAttribute": match.group(1),
-                        })
-                    continue
-
-                match = re.search(
-                    r'^  (Default information originate, '
-                    '|Weight'
-                    '|Incoming update prefix filter list is '
-                    '|Outgoing update prefix filter list is '
-                    '|Incoming update network filter list is '
-                    '|Outgoing update network filter list is '
-                    '|Incoming update AS path filter list is '
-                    '|Outgoing update AS path filter list is '
-                    '|Route map for incoming advertisements is '
-                    '|Route map for outgoing advertisements is '
-                    '|Route map for selective unsuppress is )'
-                    '(.+)$', line)
-                if match:
-                    key = re.sub(r' (.)', lambda c:c.group(1).upper(), match.group(1).replace(' is ', ''))
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({key: match.group(2)})
 
+                facts = _match_rules(ADDRESS_FAMILY_RULES, line)
+                if facts is not None:
+                    family.update(facts)
                     continue
-                    
-                match = re.search(r'(\S+) accepted prefixes', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "acceptedPrefixes": int(match.group(1)),
-                        })
-                    continue
-
-                match = re.search(r'(\S+) announced prefixes', line)
-                if match:
-                    bgpneighbors[neighbor]["addressFamily"][addressFamily].update({
-                        "announcedPrefixes": int(match.group(1)),
-                        })
-                    continue
-
-            match = re.search(r'Description: (.+)', line)
-            if match:
-                bgpneighbors[neighbor]["Description"] = match.group(1)
-                continue
 
-            match = re.search(r'Member of peer-group (\S+) for session parameters', line)
-            if match:
-                bgpneighbors[neighbor]["MemberOfPeerGroup"] = match.group(1)
-                continue
-
-            match = re.search(r'BGP version (\S+), local router ID (\S+), remote router ID (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "BGPversion": match.group(1),
-                    "localRouterID": match.group(2),
-                    "remoteRouterID": match.group(3),
-                    })
-                continue
+                if 'Outbound Route Filter (ORF) type (' in line:
+                    match = ORF_TYPE_RE.search(line)
+                    if match:
+                        orfTypePrefix = match.group(1)
+                        continue
 
-            match = re.search(r'BGP state = (\S+)\s*(.*)', line)
-            if match:
-                state = match.group(1)
-                if state == 'Established,':
-                    state = "Established"
-                    upfor = match.group(2)
-                    match = re.search(r'up for (\S+)', upfor)
+                if len(orfTypePrefix) > 0 and 'Send-mode: ' in line:
+                    match = ORF_SEND_MODE_RE.search(line)
                     if match:
-                        bgpneighbors[neighbor].update({
-                            "EstablishedUpFor": match.group(1),
-                        })
-                bgpneighbors[neighbor].update({
-                    "state": state,
-                    })
-                continue
+                        family.update({
+                            "ORFType%sSendMode" % orfTypePrefix: match.group(1),
+                            })
+                        continue
 
-            match = re.search(r'Last read (\S+), hold time is (\S+), keepalive interval is (\S+) seconds', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "lastRead" : match.group(1),
-                    "holdTime": int(match.group(2)),
-                    "keepAlive": int(match.group(3)),
-                    })
-                continue
+                if len(orfTypePrefix) > 0 and 'Receive-mode: ' in line:
+                    match = ORF_RECEIVE_MODE_RE.search(line)
+                    if match:
+                        family.update({
+                            "ORFType%sReceiveMode" % orfTypePrefix: match.group(1),
+                            })
+                        continue
 
-            match = re.search(r'Configured hold time is (\S+), keepalive interval is (\S+) seconds', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "configuredHoldTime": int(match.group(1)),
-                    "configuredKeepAlive": int(match.group(2)),
-                    })
-                continue
+                if ' prefix-list ' in line:
+                    match = PREFIX_LIST_RE.search(line)
+                    if match:
+                        addressFamilyPrefixList = match.group(1) + "ipPrefixList_" + match.group(2)
+                        family.update({
+                            addressFamilyPrefixList: []
+                            })
+                        continue
 
-            match = re.search(r'Received (\S+) messages, (\S+) notifications, (\S+) in queue', line)
-            if match:
-                bgpneighbors[neighbor].update({"Received": {
-                    "messages" : int(match.group(1)),
-                    "notifications": int(match.group(2)),
-                    "InQueue": int(match.group(3)),
-                    }})
-                continue
+                if len(orfTypePrefix) > 0 and 'Outbound Route Filter (ORF): ' in line:
+                    match = ORF_RE.search(line)
+                    if match:
+                        family.update({
+                            "ORF": match.group(1),
+                            })
+                        continue
 
-            match = re.search(r'Sent (\S+) messages, (\S+) notifications, (\S+) in queue', line)
-            if match:
-                bgpneighbors[neighbor].update({"Sent": {
-                    "messages" : int(match.group(1)),
-                    "notifications": int(match.group(2)),
-                    "InQueue": int(match.group(3)),
-                    }})
-                continue
+                # a flag line still goes through the rules below
+                for flag in ADDRESS_FAMILY_FLAGS:
+                    if flag in line:
+                        match = ADDRESS_FAMILY_FLAGS_RE.search(line)
+                        if match:
+                            if not 'flags' in family:
+                                family.update({"flags": []})
+                            family["flags"].append(match.group(1))
+                        break
+
+                facts = _match_rules(ADDRESS_FAMILY_TAIL_RULES, line)
+                if facts is not None:
+                    family.update(facts)
+                    continue
 
-            match = re.search(r'Route refresh request: received (\S+), sent (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({"routeRefreshRequest": {
-                    "received" : int(match.group(1)),
-                    "sent": int(match.group(2)),
-                    }})
-                continue
+            facts = _match_rules(NEIGHBOR_RULES, line)
+            if facts is not None:
+                bgpneighbors[neighbor].update(facts)
 
-            match = re.search(r'Minimum time between advertisement runs is (\S+) seconds', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "minTimeBetweenAdv" : int(match.group(1)),
-                    })
-                continue
+        return bgpneighbors
 
-            match = re.search(r'Update source is (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "updateSource" : match.group(1),
-                    })
-                continue
 
-            match = re.search(r'Bidirectional Forwarding Detection is (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "BFD" : match.group(1),
-                    })
-                continue
+class BgpSummary(BgpFactsBase):
 
-            match = re.search(r'Connections established (\S+); dropped (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "connections": {
-                        "established": int(match.group(1)),
-                        "dropped": int(match.group(2)),
-                    }})
-                continue
+    # address family -> command, %s is the vrf
+    COMMANDS = {
+        'IPv4 Unicast': 'show ip bgp%s summary',
+        'IPv6 Unicast': 'show bgp ipv6%s summary',
+    }
 
-            match = re.search(r'Local host: (\S+), Local port: (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "local": {
-                        "host": match.group(1),
-                        "port": int(match.group(2)),
-                    }})
-                continue
+    def get_commands(self):
+        vrf = self.module.params.get('vrf')
+        vrf = ' vrf %s' % vrf if vrf else ''
 
-            match = re.search(r'Foreign host: (\S+), Foreign port: (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                    "foreign": {
-                        "host": match.group(1),
-                        "port": int(match.group(2)),
-                    }})
-                continue
+        families = dict((family.lower(), family) for family in self.COMMANDS)
+        commands = dict()
+        for family in self.module.params.get('address_family') or ['IPv4 Unicast']:
+            if family.lower() in families:
+                family = families[family.lower()]
+                commands[family] = self.COMMANDS[family] % vrf
+            else:
+                self.warnings.append('address family %s is not supported by the summary subset' % family)
+        return commands
 
-            match = re.search(r'^  Remote restart time is (\S+) sec', line)
+    def populate(self):
+        commands = self.get_commands()
+        families = list(commands)
+        self.responses, errors = run_commands_batch(self.module, [commands[family] for family in families])
+
+        summary = dict()
+        for family, data, error in zip(families, self.responses, errors):
+            if error:
+                self.warnings.append('%s failed: %s' % (commands[family], error))
+            elif data:
+                summary[family] = self.parse_bgp_summary(data, self.module.params.get('neighbors'))
+        self.facts['bgp_summary'] = summary
+
+    def parse_bgp_summary(self, data, neighbors=None):
+        summary = {
+            "router_id": None,
+            "local_as": None,
+            "peer": [],
+            "as": [],
+            "state": [],
+            "uptime": [],
+            "prefixes_received": [],
+        }
+        table = False
+        address = None
+        for line in data.split('\n'):
+            match = SUMMARY_ROUTER_RE.search(line)
             if match:
-                bgpneighbors[neighbor].update({
-                        "gracefulRestartRemoteRestartTime": int(match.group(1)),
-                    })
+                summary["router_id"] = match.group(1)
+                summary["local_as"] = match.group(2)
                 continue
 
-            match = re.search(r'^  Re-established, (.+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "gracefulRestartReastablishedStatus": match.group(1),
-                    })
+            if line.startswith('Neighbor') and 'State/PfxRcd' in line:
+                table = True
                 continue
 
-            match = re.search(r'External BGP neighbor may be up to (\S+) hops away', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "externalBGPHops": int(match.group(1)),
-                    })
+            if not table:
                 continue
 
-            match = re.search(r'Nexthop: (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "nexthop": match.group(1),
-                    })
+            fields = line.split()
+            if not fields or line.startswith('Total number'):
+                table = False
                 continue
 
-            match = re.search(r'Nexthop global: (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "nexthopGlobal": match.group(1),
-                    })
+            # a long neighbor address is alone on its line
+            if len(fields) == 1:
+                address = fields[0]
                 continue
+            if address:
+                fields.insert(0, address)
+                address = None
 
-            match = re.search(r'Nexthop local: (\S+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "nexthopLinklocal": match.group(1),
-                    })
+            # Neighbor V AS MsgRcv MsgSen TblVer InQ OutQ Up/Down State/PfxRcd
+            if len(fields) < 10:
                 continue
-
-            match = re.search(r'BGP connection: (.+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "BGPConnection": match.group(1),
-                    })
+            if neighbors and fields[0] not in neighbors:
                 continue
 
-            match = re.search(r'Next connect timer due in (\S+) seconds', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "nextConnectTimer": int(match.group(1)),
-                    })
-                continue
+            state = ' '.join(fields[9:])
+            if state.isdigit():
+                prefixes = int(state)
+                state = "Established"
+            else:
+                prefixes = None
 
-            match = re.search(r'Capability error: (.+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "capabilityError": match.group(1),
-                    })
-                continue
-                
-            match = re.search(r'Last Reset: (\S+), due to (.+)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "lastReset": match.group(1),
-                        "lastResetDueTo": match.group(2),
-                    })
-                continue
+            summary["peer"].append(fields[0])
+            summary["as"].append(fields[2])
+            summary["state"].append(state)
+            summary["uptime"].append(fields[8])
+            summary["prefixes_received"].append(prefixes)
 
-            match = re.search(r'Notification Error Message: \((.+)\)', line)
-            if match:
-                bgpneighbors[neighbor].update({
-                        "notificationError": match.group(1),
-                    })
-                continue
-                
-        return bgpneighbors
+        return summary
 
 
 FACT_SUBSETS = dict(
     neighbor=BgpNeighbor,
+    summary=BgpSummary,
 )
 
 VALID_SUBSETS = frozenset(FACT_SUBSETS.keys())
 
+# subsets collected when gather_subset only excludes subsets, summary was
+# added later and is only collected when it is asked for
+DEFAULT_SUBSETS = frozenset(['neighbor'])
+
 PERSISTENT_COMMAND_TIMEOUT = 60
 
 
@@ -492,7 +605,10 @@ def main():
     """main entry point for module execution
     """
     argument_spec = dict(
-        gather_subset=dict(default=['!neighbor'], type='list')
+        gather_subset=dict(default=['!neighbor'], type='list'),
+        neighbors=dict(type='list', elements='str'),
+        vrf=dict(type='str'),
+        address_family=dict(type='list', elements='str'),
     )
 
     argument_spec.update(ocnos_argument_spec)
@@ -528,7 +644,7 @@ def main():
             runable_subsets.add(subset)
 
     if not runable_subsets:
-        runable_subsets.update(VALID_SUBSETS)
+        runable_subsets.update(DEFAULT_SUBSETS)
 
     runable_subsets.difference_update(exclude_subsets)
 #    runable_subsets.add('default')
@@ -540,16 +656,17 @@ def main():
     for key in runable_subsets:
         instances.append(FACT_SUBSETS[key](module))
 
+    warnings = list()
     for inst in instances:
         inst.populate()
         facts.update(inst.facts)
+        warnings.extend(inst.warnings)
 
     ansible_facts = dict()
     for key, value in iteritems(facts):
         key = 'ansible_net_%s' % key
         ansible_facts[key] = value
 
-    warnings = list()
     check_args(module, warnings)
 
     module.exit_json(ansible_facts=ansible_facts, warnings=warnings)
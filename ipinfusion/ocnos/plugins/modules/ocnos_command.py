@@ -44,8 +44,21 @@ options:
         is returned. If the I(wait_for) argument is provided, the
         module is not returned until the condition is satisfied or
         the number of retires as expired.
+      - A command can be given as a dict with the C(command), C(prompt),
+        C(answer) and C(output) keys.
     type: list
     required: true
+  output:
+    description:
+      - Format of the command outputs.  With C(json), show commands are
+        sent in their C(show json) form and the parsed objects are
+        returned in I(stdout), so I(wait_for) can evaluate typed values.
+        A command that has no JSON rendering is returned as text.
+      - The C(output) key of a command given as a dict overrides this
+        argument for that command.
+    type: str
+    default: text
+    choices: ['text', 'json']
   wait_for:
     description:
       - List of conditions to evaluate against the output of the
@@ -71,6 +84,8 @@ options:
         before it is considered failed. The command is run on the
         target device every retry and evaluated against the
         I(wait_for) conditions.
+      - Only the commands referenced by the conditions that are not
+        satisfied yet are run again on a retry.
     type: int
     default: 10
   interval:
@@ -81,6 +96,43 @@ options:
         trying the command again.
     type: int
     default: 1
+  backoff:
+    description:
+      - Factor the interval is multiplied by after every retry.  The
+        default keeps a fixed I(interval).
+    type: float
+    default: 1
+  max_interval:
+    description:
+      - Upper bound in seconds of the interval when I(backoff) is used.
+    type: int
+  jitter:
+    description:
+      - Randomize the wait between retries between half and all of the
+        current interval, so that many hosts waiting for the same event
+        do not poll in lockstep.
+    type: bool
+    default: false
+  timeout:
+    description:
+      - Total time in seconds to wait for the I(wait_for) conditions,
+        whatever the number of I(retries) left.  No deadline is applied
+        by default.
+    type: int
+  output_dir:
+    description:
+      - Directory on the controller where the output of each command is
+        written, instead of returning it in I(stdout).  The output is
+        written by the persistent connection and never goes through the
+        module result, which only holds the path, size and SHA-256 of
+        each file in I(outputs).
+      - The files are named after the position and the text of the
+        command, for example C(1_show_ip_route.txt).
+      - A relative path is taken from the working directory of the module,
+        the directory ansible-playbook was started from, as the persistent
+        connection runs in another directory.
+      - This argument is mutually exclusive with I(wait_for).
+    type: path
 """
 
 EXAMPLES = """
@@ -136,19 +188,59 @@ vars:
       - "result.changed == false"
       - "result.stdout is defined"
       - "result.stdout | length == 2"
+
+- name: get structured output
+  ocnos_command:
+    commands:
+      - show interface brief
+      - show version
+    output: json
+  register: result
+
+- name: wait for the BGP neighbors to be established
+  ocnos_command:
+    commands:
+      - show version
+      - show bgp neighbors 10.1.1.1
+      - show bgp neighbors 10.1.1.2
+    wait_for:
+      - "result[1] contains 'BGP state = Established'"
+      - "result[2] contains 'BGP state = Established'"
+    retries: 30
+    interval: 2
+    backoff: 1.5
+    max_interval: 20
+    jitter: true
+    timeout: 300
+
+- name: save the routing table of the device on the controller
+  ocnos_command:
+    commands:
+      - show ip route
+      - show running-config
+    output_dir: "outputs/{{ inventory_hostname }}"
+  register: result
 """
 
 RETURN = """
 stdout:
-  description: the set of responses from the commands
-  returned: always
+  description:
+    - the set of responses from the commands
+    - the responses of the commands run with the json output are parsed
+      objects
+  returned: when output_dir is not set
   type: list
   sample: ['...', '...']
 stdout_lines:
   description: The value of stdout split into a list
-  returned: always
+  returned: when output_dir is not set
   type: list
   sample: [['...', '...'], ['...'], ['...']]
+outputs:
+  description: The command, path, size and sha256 of each file written
+  returned: when output_dir is set
+  type: list
+  sample: [{"command": "show ip route", "path": "/tmp/out/1_show_ip_route.txt", "size": 52428800, "sha256": "..."}]
 failed_conditions:
   description: the conditionals that failed
   returned: failed
@@ -156,16 +248,65 @@ failed_conditions:
   sample: ['...', '...']
 """
 
+import os
+import random
+import re
 import time
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands
+from ansible.module_utils._text import to_text
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands, run_commands_to_files
 from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import ocnos_provider_spec,ocnos_argument_spec
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.parsing import Conditional
 from ansible.module_utils.six import string_types
 from ansible.module_utils.connection import ConnectionError
 
 
+RESULT_INDEX_RE = re.compile(r'^result\[(\d+)\]')
+
+
+def get_referenced_commands(conditionals, count):
+    """Return the indexes of the commands the conditionals depend on
+
+    All the commands are returned when a conditional does not point to a
+    single command output.
+    """
+    indexes = set()
+    for item in conditionals:
+        match = RESULT_INDEX_RE.match(item.key)
+        if not match or int(match.group(1)) >= count:
+            return list(range(count))
+        indexes.add(int(match.group(1)))
+    return sorted(indexes)
+
+
+def get_wait_time(interval, jitter):
+    if jitter:
+        return random.uniform(interval / 2.0, interval)
+    return interval
+
+
+def get_command(cmd):
+    if isinstance(cmd, dict):
+        return cmd['command']
+    return cmd
+
+
+def set_output(commands, output):
+    """Apply the output format to the commands that do not set their own"""
+    if output == 'text':
+        return commands
+
+    result = list()
+    for cmd in commands:
+        if not isinstance(cmd, dict):
+            cmd = {'command': cmd}
+        if not cmd.get('output'):
+            cmd = dict(cmd, output=output)
+        result.append(cmd)
+    return result
+
+
 def to_lines(stdout):
     for item in stdout:
         if isinstance(item, string_types):
@@ -173,41 +314,97 @@ def to_lines(stdout):
         yield item
 
 
+def get_output_path(output_dir, index, command):
+    name = re.sub(r'[^\w.-]+', '_', get_command(command)).strip('_')
+    return os.path.join(output_dir, '%d_%s.txt' % (index, name))
+
+
+def run_to_files(module, commands):
+    # the persistent connection writes the files from its own directory
+    output_dir = os.path.abspath(module.params['output_dir'])
+    paths = [get_output_path(output_dir, index, command)
+             for index, command in enumerate(commands, 1)]
+    try:
+        files = run_commands_to_files(module, commands, paths)
+    except ConnectionError as exc:
+        module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
+
+    outputs = list()
+    for command, item in zip(commands, files):
+        outputs.append(dict(command=get_command(command), **item))
+    return outputs
+
+
 def main():
     spec = dict(
         # { command: <str>, prompt: <str>, response: <str> }
         commands=dict(type='list', required=True),
+        output=dict(default='text', choices=['text', 'json']),
 
         wait_for=dict(type='list'),
         match=dict(default='all', choices=['all', 'any']),
 
         retries=dict(default=10, type='int'),
-        interval=dict(default=1, type='int')
+        interval=dict(default=1, type='int'),
+        backoff=dict(default=1, type='float'),
+        max_interval=dict(type='int'),
+        jitter=dict(default=False, type='bool'),
+        timeout=dict(type='int'),
+
+        output_dir=dict(type='path'),
     )
 
     spec.update(ocnos_argument_spec)
 
-    module = AnsibleModule(argument_spec=spec, supports_check_mode=True)
+    module = AnsibleModule(argument_spec=spec,
+                           mutually_exclusive=[('output_dir', 'wait_for')],
+                           supports_check_mode=True)
     result = {'changed': False}
 
+    commands = set_output(module.params['commands'], module.params['output'])
+
+    if module.params['output_dir']:
+        result['outputs'] = run_to_files(module, commands)
+        module.exit_json(**result)
+
     wait_for = module.params['wait_for'] or list()
     conditionals = [Conditional(c) for c in wait_for]
 
-    commands = module.params['commands']
     retries = module.params['retries']
     interval = module.params['interval']
     match = module.params['match']
+    backoff = module.params['backoff']
+    max_interval = module.params['max_interval']
+    jitter = module.params['jitter']
+    timeout = module.params['timeout']
+
+    if backoff < 1:
+        module.fail_json(msg='backoff must be greater than or equal to 1')
+
+    deadline = time.time() + timeout if timeout else None
+    timed_out = False
 
     # these commands are not supported in OcNOS VM
     notsupported_cmds = ["show hardware-information", "show system-information"]
 
+    # the first run collects every output, the retries only refresh the
+    # outputs the pending conditionals are evaluated against
+    responses = None
+    indexes = None
+
     while retries > 0:
         try:
-            responses = run_commands(module, commands)
+            if responses is None:
+                responses = run_commands(module, commands)
+            else:
+                pending = run_commands(module, [commands[index] for index in indexes])
+                for index, response in zip(indexes, pending):
+                    responses[index] = response
         except ConnectionError as exc:
             for ns_cmd in notsupported_cmds:
                 if ns_cmd in str(exc):
-                    commands = [cmd for cmd in commands if ns_cmd not in cmd]
+                    commands = [cmd for cmd in commands if ns_cmd not in get_command(cmd)]
+                    responses = None
         else:
             for item in list(conditionals):
                 if item(responses):
@@ -219,12 +416,27 @@ def main():
             if not conditionals:
                 break
 
-        time.sleep(interval)
+            indexes = get_referenced_commands(conditionals, len(commands))
+
         retries -= 1
+        if retries > 0:
+            wait = get_wait_time(interval, jitter)
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= wait:
+                    timed_out = True
+                    break
+            time.sleep(wait)
+
+            interval = interval * backoff
+            if max_interval is not None:
+                interval = min(interval, max_interval)
 
     if conditionals:
         failed_conditions = [item.raw for item in conditionals]
         msg = 'One or more conditional statements have not been satisfied'
+        if timed_out:
+            msg += ' within %s seconds' % timeout
         module.fail_json(msg=msg, failed_conditions=failed_conditions)
 
     result.update({
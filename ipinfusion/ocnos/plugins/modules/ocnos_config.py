@@ -115,6 +115,12 @@ options:
         I(never), the running-config will never be copied to the
         startup-config.  If the argument is set to I(changed), then the running-config
         will only be copied to the startup-config if the task has made a change.
+      - With I(modified) and I(cache_ttl), the digest of the running-config
+        that was last found saved is remembered in I(cache_dir) for
+        I(cache_ttl) seconds, and the startup-config is only retrieved when
+        the running-config has a different digest.  Nothing is retrieved
+        when no commit was made since then.  Without I(cache_ttl) the
+        running-config is compared with the startup-config every time.
     type: str
     default: never
     choices: ['always', 'never', 'modified', 'changed']
@@ -136,15 +142,66 @@ options:
         every task in a playbook.  The I(running_config) argument allows the
         implementer to pass in the configuration to use as the base
         config for comparison.
+      - When I(parents) starts with an C(interface), C(router bgp),
+        C(router ospf) or C(router isis) section and I(running_config) is
+        not set, only that section of the running-config is retrieved from
+        the device.
     aliases: ['config']
     type: str
+  cache_ttl:
+    description:
+      - Number of seconds the running-config retrieved from the device is
+        cached on the controller and reused by the following tasks.  The
+        cache is only used while the output of C(show commit list) is
+        unchanged, and it is dropped when the task changes the
+        configuration.  The default of C(0) disables the cache.
+      - Changes that are not committed on the device, for example in
+        non-commit mode, are only noticed once the cache expires.
+    type: int
+    default: 0
+  cache_dir:
+    description:
+      - Directory of the controller side cache, one sub-directory per device.
+    type: path
+    default: ~/.ansible/ocnos_cache
+  cache_key:
+    description:
+      - Name of the device in the cache, the inventory hostname by default.
+        Nothing is cached without it.
+    type: str
   diff_ignore_lines:
     description:
       - Use this argument to specify one or more lines that should be
         ignored during the diff.  This is used for lines in the configuration
         that are automatically updated by the system.  This argument takes
         a list of regular expressions or exact line matches.
+      - A line is left out of the diff when one of the expressions matches
+        it or is found in it as plain text.  The lines left out are
+        returned in I(suppressed) with the expression that matched.
     type: list
+  pipeline_window:
+    description:
+      - Number of configuration lines written to the device at once
+        without waiting for the prompt after each line.  The output of
+        each window is scanned for errors afterwards and the failing line
+        is still reported.  Lines after a failing line in the same window
+        have already been sent to the device.  The default of C(0) sends
+        the lines one at a time.
+      - A line whose output cannot be told apart, because it was lost or
+        the device did not echo it, fails the task.  Windows need a
+        network_cli connection that supports C(strip_prompt), the lines
+        are sent one at a time otherwise.
+    type: int
+    default: 0
+  ignored_errors:
+    description:
+      - List of regular expressions for device error messages that are
+        ignored while the configuration is pushed, in addition to the
+        built-in list of benign errors and the C(ansible_ocnos_ignored_errors)
+        connection variable.  Ignored errors are returned in I(ignored)
+        together with the pattern that matched.
+    type: list
+    elements: str
   backup_options:
     description:
       - This is a dict object containing configurable options related to backup file path.
@@ -186,6 +243,17 @@ EXAMPLES = """
     src: config.cfg
     backup: yes
 
+- name: reuse the running-config between the tasks of a play
+  ipinfusion.ocnos.ocnos_config:
+    lines: "ntp server {{ item }}"
+    cache_ttl: 600
+  loop: "{{ ntp_servers }}"
+
+- name: push a large prefix-list 500 lines at a time
+  ipinfusion.ocnos.ocnos_config:
+    src: prefix-list.cfg
+    pipeline_window: 500
+
 - name: configurable backup path
   ipinfusion.ocnos.ocnos_config:
     src: config.cfg
@@ -201,6 +269,16 @@ updates:
   returned: Only when lines is specified.
   type: list
   sample: ['...', '...']
+suppressed:
+  description: Lines left out of the diff by diff_ignore_lines and the expression that matched them
+  returned: when a line was left out
+  type: list
+  sample: [{"line": "ntp server 10.0.0.1", "rule": "ntp server"}]
+ignored:
+  description: Device errors that were ignored and the pattern that matched them
+  returned: when an error was ignored
+  type: list
+  sample: [{"command": "vlan 10 bridge 1", "error": "%% Configuration already exists", "rule": "%% Configuration already exists"}]
 backup_path:
   description: The full path to the backup file
   returned: when backup is yes
@@ -209,15 +287,51 @@ backup_path:
 """
 import os
 import re
+import time
+from ansible.module_utils._text import to_text
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands, load_config, get_config
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands, load_config, get_config, clear_config_cache
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import ConfigIndex, config_difference, config_digest
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import PatternClassifier
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import cache_enabled, get_config_indicator, read_cache, write_cache
 from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import ocnos_argument_spec, check_args
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig, dumps
 
+# top level sections that 'show running-config <section>' can print alone
+SECTIONS = [
+    (re.compile(r'^interface (\S+)$'), r'interface \1'),
+    (re.compile(r'^router bgp \S+$'), 'bgp'),
+    (re.compile(r'^router ospf( \S+)?$'), 'ospf'),
+    (re.compile(r'^router isis \S+$'), 'isis'),
+]
+
+
+def get_section_flags(module):
+    """Return the show running-config flags of the section in parents"""
+    parents = module.params['parents']
+    if not parents or not module.params['lines']:
+        return None
+    for regex, section in SECTIONS:
+        match = regex.match(parents[0].strip())
+        if match:
+            return [match.expand(section)]
+    return None
+
+
 def get_running_config(module):
     contents = module.params['running_config']
     if not contents:
-        contents = get_config(module)
+        cache_ttl = module.params['cache_ttl']
+        flags = get_section_flags(module)
+        if flags:
+            try:
+                contents = get_config(module, flags=flags, cache_ttl=cache_ttl)
+            except ConnectionError:
+                # not a section of this release, use the whole config
+                flags = None
+        if not flags:
+            contents = get_config(module, cache_ttl=cache_ttl)
     return NetworkConfig(indent=1, contents=contents)
 
 
@@ -231,6 +345,71 @@ def save_config(module, result):
                     'non-volatile storage')
 
 
+def save_config_when_modified(module, result, ignore_lines):
+    """Save the running-config when it differs from the startup-config
+
+    The configs last found equal are only remembered when the cache is
+    enabled with cache_ttl, the startup-config is compared every time
+    otherwise.
+    """
+    cache_ttl = module.params['cache_ttl']
+    if not cache_ttl or not cache_enabled(module):
+        running = config_digest(get_config(module), ignore_lines)
+        startup = to_text(run_commands(module, ['show startup-config'])[0]).strip()
+        if running != config_digest(startup, ignore_lines):
+            save_config(module, result)
+        return
+
+    indicator = get_config_indicator(module)
+    saved = read_cache(module, 'saved_config') or dict()
+    if (saved.get('ignore_lines') != ignore_lines or
+            time.time() - saved.get('timestamp', 0) >= cache_ttl):
+        saved = dict()
+
+    if indicator and saved.get('indicator') == indicator:
+        # nothing was committed since both configs were found equal
+        return
+
+    digest = config_digest(get_config(module), ignore_lines)
+    if digest != saved.get('digest'):
+        startup = to_text(run_commands(module, ['show startup-config'])[0]).strip()
+        if digest != config_digest(startup, ignore_lines):
+            save_config(module, result)
+            if module.check_mode:
+                return
+
+    write_cache(module, 'saved_config', dict(indicator=indicator, digest=digest, ignore_lines=ignore_lines,
+                                             timestamp=time.time()))
+
+
+def filter_diff_lines(lines, patterns):
+    """Split lines into the lines kept and the lines suppressed by patterns
+
+    A pattern suppresses a line when it matches the line as a regular
+    expression or is found in it as plain text, all patterns are tried
+    in a single search per line.
+    """
+    rules = dict()
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+            expression = '%s|%s' % (pattern, re.escape(pattern))
+        except re.error:
+            expression = re.escape(pattern)
+        rules[expression] = pattern
+
+    classifier = PatternClassifier(rules)
+    kept = list()
+    suppressed = list()
+    for line in lines:
+        rule = classifier.classify(str(line))
+        if rule is None:
+            kept.append(line)
+        else:
+            suppressed.append(dict(line=line, rule=rules[rule]))
+    return kept, suppressed
+
+
 def get_candidate(module):
     candidate = NetworkConfig(indent=1)
     if module.params['src']:
@@ -254,10 +433,9 @@ def run(module, result):
 
     candidate = get_candidate(module)
     if match != 'none' and replace != 'config':
-        contents = get_running_config(module)
-        configobj = NetworkConfig(contents=contents, indent=1)
-        commands = candidate.difference(configobj, path=path, match=match,
-                                        replace=replace)
+        index = ConfigIndex(get_running_config(module))
+        commands = config_difference(candidate, index, path=path, match=match,
+                                     replace=replace)
     else:
         commands = candidate.items
 
@@ -273,47 +451,27 @@ def run(module, result):
 
             result['commands'] = commands
 
-        diff = load_config(module, commands, commit=module.params['commit'])
+        resp = load_config(module, commands, commit=module.params['commit'],
+                           window=module.params['pipeline_window'],
+                           ignored_errors=module.params['ignored_errors'],
+                           full_response=True)
+        clear_config_cache(module)
+        diff = resp.get('response')
+        if resp.get('ignored'):
+            result['ignored'] = resp['ignored']
         if diff_ignore_lines:
-            final_diff =[]
-            for each_line in diff:
-                final_diff.append(each_line)
-            debug=[]
-            for each_ignore_line in diff_ignore_lines.split("|"):
-              check_for_diff = 1
-              debug.append(diff)
-              for each_diff_line in final_diff:
-                 if each_diff_line in diff:
-                   if re.search(each_ignore_line, each_diff_line):
-                      check_for_diff = 0
-                   debug.append(each_diff_line)
-                   if str(each_ignore_line) in str(each_diff_line):
-                      check_for_diff = 0
-                   elif each_diff_line.find(each_ignore_line) != -1:
-                      check_for_diff = 0
-                   if check_for_diff == 0:
-                     diff.remove(each_diff_line)
-                     check_for_diff = 1
-
-            result['diff'] = dict(prepared=diff)
-            result['changed'] = True
-        else:
-            result['diff'] = dict(prepared=diff)
-            result['changed'] = True
+            diff, suppressed = filter_diff_lines(diff, diff_ignore_lines.split('|'))
+            if suppressed:
+                result['suppressed'] = suppressed
 
-    running_config = module.params['running_config']
-    startup_config = None
+        result['diff'] = dict(prepared=diff)
+        result['changed'] = True
 
     if module.params['save_when'] == 'always':
         save_config(module, result)
     elif module.params['save_when'] == 'modified':
-        output = run_commands(module, ['show running-config', 'show startup-config'])
-
-        running_config = NetworkConfig(indent=1, contents=output[0], ignore_lines=diff_ignore_lines)
-        startup_config = NetworkConfig(indent=1, contents=output[1], ignore_lines=diff_ignore_lines)
-
-        if running_config.sha1 != startup_config.sha1:
-            save_config(module, result)
+        ignore_lines = diff_ignore_lines.split('|') if diff_ignore_lines else []
+        save_config_when_modified(module, result, ignore_lines)
     elif module.params['save_when'] == 'changed' and result['changed']:
         save_config(module, result)
 
@@ -343,6 +501,11 @@ def main():
         backup_options=dict(type='dict', options=backup_spec),
         save_when=dict(choices=['always', 'never', 'modified', 'changed'], default='never'),
         diff_ignore_lines=dict(type='str',default=""),
+        pipeline_window=dict(type='int', default=0),
+        ignored_errors=dict(type='list', elements='str'),
+        cache_ttl=dict(type='int', default=0),
+        cache_dir=dict(type='path', default='~/.ansible/ocnos_cache'),
+        cache_key=dict(type='str'),
     )
 
     argument_spec.update(ocnos_argument_spec)
@@ -32,10 +32,34 @@ options:
     - Specify IP protocol.
     choices=[ ip, ipv6 ]
     default: ip
+  timeout:
+    description:
+    - Time in seconds to wait for the reply of each packet.
+    type: int
+    default: 1
   dest:
     description:
     - The IP Address or hostname (resolvable by switch) of the remote node.
-    required: true
+    - One of I(dest) or I(destinations) is required.
+  destinations:
+    description:
+    - List of remote nodes to test from a single task, instead of I(dest).
+    - An entry is either the address or a dict with the C(dest) key and
+      optionally the C(vrf), C(count), C(ttl), C(timeout), C(ipproto),
+      C(interface) and C(state) keys, which default to the module values.
+    - The pings are sent in few calls to the device and their results are
+      returned in I(destinations). The pings of a call are expected to
+      complete within the C(persistent_command_timeout) of the connection,
+      C(count) times C(timeout) seconds each when no reply comes back.
+    - The task fails before sending any ping when a single entry can take
+      longer than C(persistent_command_timeout).
+    type: list
+  max_failures:
+    description:
+    - Number of I(destinations) that may not be in their expected I(state)
+      without failing the task.
+    type: int
+    default: 0
   interface:
     description:
     - Specify outgoing interface. This is effective only for IPv6 linklocal address was specified in 'dest'
@@ -74,86 +98,111 @@ EXAMPLES = r'''
     dest: 10.40.40.40
     vrf: prod
     count: 20
+
+- name: Test reachability to the loopbacks of the fabric
+  ocnos_ping:
+    destinations: "{{ groups['leaf'] | map('extract', hostvars, 'loopback') | list }}"
+    vrf: default
+    count: 2
+    max_failures: 1
+
+- name: Test reachability and unreachability from a single task
+  ocnos_ping:
+    destinations:
+      - 10.10.10.10
+      - dest: 10.20.20.20
+        vrf: prod
+      - dest: 10.30.30.30
+        state: absent
 '''
 
 RETURN = '''
 commands:
-  description: Show the command sent.
+  description: Show the command sent, one per destination with I(destinations).
   returned: always
   type: list
   sample: ["ping\nip\n \n192.168.122.1\n3\n64\n1\n100\n2\n0\nn\nn\n"]
 packet_loss:
   description: Percentage of packets lost.
-  returned: always
+  returned: with dest
   type: str
   sample: "0%"
 packets_rx:
   description: Packets successfully received.
-  returned: always
+  returned: with dest
   type: int
   sample: 3
 packets_tx:
   description: Packets successfully transmitted.
-  returned: always
+  returned: with dest
   type: int
   sample: 3
 rtt:
   description: Show RTT stats.
-  returned: always
+  returned: with dest
   type: dict
   sample: {"avg": 0.115, "max": 0.135, "min": 0.079}
+destinations:
+  description:
+  - The dest, vrf, state, packet_loss, packets_rx, packets_tx, rtt and
+    failed results of every destination.
+  - msg explains why a destination failed.
+  returned: with destinations
+  type: list
+  sample: [{"dest": "10.10.10.10", "vrf": "management", "state": "present", "packet_loss": "0%",
+            "packets_rx": 1, "packets_tx": 1, "rtt": {"avg": 0.115, "max": 0.115, "min": 0.115},
+            "failed": false}]
+failed_destinations:
+  description: The destinations that are not in their expected state.
+  returned: with destinations
+  type: list
+  sample: ["10.30.30.30"]
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import run_commands_batch
 from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import get_connection
 from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import ocnos_argument_spec
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import BATCH_SIZE
 import re
 
 
+IPV6ADDR_RE = re.compile(r"^[a-fA-F0-9:]+$")
+LLADDR_RE = re.compile(r"^[Ff][Ee]80:[a-fA-F0-9:]+$")
+
+
 def main():
     """ main entry point for module execution
     """
     argument_spec = dict(
         count=dict(type="int", default=1),
         ttl=dict(type="int", default=64),
-        dest=dict(type="str", required=True),
+        timeout=dict(type="int", default=1),
+        dest=dict(type="str"),
+        destinations=dict(type="list"),
+        max_failures=dict(type="int", default=0),
         source=dict(type="str"),
         ipproto=dict(type="str", choices=["ip", "ipv6"], default="ip"),
         state=dict(type="str", choices=["absent", "present"], default="present"),
         vrf=dict(type="str", default="management"),
         interface=dict(type="str"),
     )
-    ipv6addr_re = re.compile(r"^[a-fA-F0-9:]+$")
 
     argument_spec.update(ocnos_argument_spec)
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec,
+                           required_one_of=[("dest", "destinations")],
+                           mutually_exclusive=[("dest", "destinations")])
 
-    count = module.params["count"]
-    ttl = module.params["ttl"]
     dest = module.params["dest"]
-    vrf = module.params["vrf"]
-    ipproto = module.params["ipproto"]
     interface = module.params["interface"]
     source = module.params["source"]
 
     warnings = list()
     results = {}
-    
-    outinterface = ""
-    if ipv6addr_re.match(dest):
-        ipproto = "ipv6"
-        lladdr_re = re.compile(r"^[Ff][Ee]80:[a-fA-F0-9:]+$")
-        if lladdr_re.match(dest):
-            if interface is None:
-                module.fail_json(msg="Interface is not specified for IPv6 linklocal address", **results)
-                module.exit_json(**results)
-                return
-            else:
-                outinterface = interface + "\n"
-
-    if outinterface is None and interface is not None:
+
+    if dest is not None and interface is not None and not LLADDR_RE.match(dest):
         warnings.append("interface parameter is not effective if dest is not IPv6 linklocal adderss")
 
     if source is not None:
@@ -162,18 +211,64 @@ def main():
     if warnings:
         results["warnings"] = warnings
 
+    if module.params["destinations"] is not None:
+        ping_destinations(module, results)
+        module.exit_json(**results)
+        return
+
+    try:
+        results["commands"] = get_ping_command(module.params, dest)
+    except ValueError as exc:
+        module.fail_json(msg=str(exc), **results)
+        return
+
     connection = get_connection(module)
-    if ipproto == "ip":
-        results["commands"] = "ping\n{0}\n{1}\n{2}\n{3}\n{4}\n{5}\n{6}\n{7}\n{8}\n{9}\n{10}\n".format("ip", vrf, dest, count, ttl, 1, 100, 2, 0, "n", "n")
-    else:
-        results["commands"] = "ping\n{0}\n{1}\n{2}\n{3}\n{4}\n{5}\n{6}\n{7}\n{8}\n{9}\n{10}".format("ipv6", vrf, dest, count, ttl, 1, 100, 2, 0, "n", outinterface)
     ping_results = connection.get(results["commands"])
-    ping_results_list = ping_results.split("\n")
-    if len(ping_results_list) < 2:
+    parsed = parse_ping_output(ping_results)
+    if parsed is None:
         results["failed"] = True
         module.exit_json(**results)
         return
 
+    loss, stats = parsed
+    results.update(stats)
+
+    validate_results(module, loss, results)
+
+    module.exit_json(**results)
+
+
+def get_ping_command(params, dest):
+    """
+    Return the interactive ping dialog for dest.
+    params holds the vrf, count, ttl, timeout, ipproto and interface values.
+    """
+    ipproto = params["ipproto"]
+    outinterface = ""
+    if IPV6ADDR_RE.match(dest):
+        ipproto = "ipv6"
+        if LLADDR_RE.match(dest):
+            if params["interface"] is None:
+                raise ValueError("Interface is not specified for IPv6 linklocal address")
+            outinterface = params["interface"] + "\n"
+
+    if ipproto == "ip":
+        return "ping\n{0}\n{1}\n{2}\n{3}\n{4}\n{5}\n{6}\n{7}\n{8}\n{9}\n{10}\n".format(
+            "ip", params["vrf"], dest, params["count"], params["ttl"], params["timeout"], 100, 2, 0, "n", "n")
+    return "ping\n{0}\n{1}\n{2}\n{3}\n{4}\n{5}\n{6}\n{7}\n{8}\n{9}\n{10}".format(
+        "ipv6", params["vrf"], dest, params["count"], params["ttl"], params["timeout"], 100, 2, 0, "n", outinterface)
+
+
+def parse_ping_output(output):
+    """
+    Parse the output of the ping dialog.
+    Returns the packet loss percentage and the dict of the packet_loss, packets_rx,
+    packets_tx and rtt results, or None when the output has no statistics.
+    """
+    ping_results_list = output.split("\n")
+    if len(ping_results_list) < 2:
+        return None
+
     stats = ping_results_list[len(ping_results_list) - 2]
     rtts = ping_results_list[len(ping_results_list) - 1]
     if rtts.startswith("%Network is unreachable"):
@@ -184,21 +279,104 @@ def main():
     else:
         loss, rx, tx, rtt = parse_ping(stats, rtts)
         loss = int(loss)
-        
-    results["packet_loss"] = str(loss) + "%"
-    results["packets_rx"] = int(rx)
-    results["packets_tx"] = int(tx)
-    
+
     # Convert rtt values to float
     for k, v in rtt.items():
         if rtt[k] is not None:
             rtt[k] = float(v)
 
-    results["rtt"] = rtt
+    return loss, {
+        "packet_loss": str(loss) + "%",
+        "packets_rx": int(rx),
+        "packets_tx": int(tx),
+        "rtt": rtt,
+    }
 
-    validate_results(module, loss, results)
 
-    module.exit_json(**results)
+def ping_destinations(module, results):
+    """
+    Ping every destination of the destinations list in few calls to the device.
+    An entry is either the destination or a dict with the dest key and optionally
+    vrf, count, ttl, ipproto, interface and state keys overriding the module values.
+    The task fails when more than max_failures destinations are not in their
+    expected state.
+    """
+    command_timeout = int(get_connection(module).get_option("persistent_command_timeout"))
+
+    entries = list()
+    for item in module.params["destinations"]:
+        if not isinstance(item, dict):
+            item = {"dest": item}
+        if not item.get("dest"):
+            module.fail_json(msg="dest is required for every entry of destinations", **results)
+
+        entry = dict((key, item.get(key, module.params[key]))
+                     for key in ("vrf", "count", "ttl", "timeout", "ipproto", "interface", "state"))
+        entry["dest"] = item["dest"]
+        try:
+            entry["command"] = get_ping_command(entry, entry["dest"])
+        except ValueError as exc:
+            module.fail_json(msg="%s: %s" % (entry["dest"], exc), **results)
+        if get_ping_runtime(entry) >= command_timeout:
+            module.fail_json(msg="%s: %s pings with a %s seconds timeout may not complete within the "
+                                 "persistent_command_timeout of %d seconds"
+                                 % (entry["dest"], entry["count"], entry["timeout"], command_timeout), **results)
+        entries.append(entry)
+
+    results["commands"] = [entry["command"] for entry in entries]
+    responses = list()
+    errors = list()
+    for batch in split_by_runtime(entries, command_timeout):
+        outputs, failures = run_commands_batch(module, [entry["command"] for entry in batch])
+        responses.extend(outputs)
+        errors.extend(failures)
+
+    destinations = list()
+    for entry, response, error in zip(entries, responses, errors):
+        item = {"dest": entry["dest"], "vrf": entry["vrf"], "state": entry["state"]}
+        parsed = parse_ping_output(response) if error is None else None
+        if parsed is None:
+            item["failed"] = True
+            item["msg"] = error or "Ping returned no statistics"
+        else:
+            loss, stats = parsed
+            item.update(stats)
+            msg = check_state(entry["state"], loss)
+            item["failed"] = msg is not None
+            if msg is not None:
+                item["msg"] = msg
+        destinations.append(item)
+
+    results["destinations"] = destinations
+    results["failed_destinations"] = [item["dest"] for item in destinations if item["failed"]]
+
+    failures = len(results["failed_destinations"])
+    if failures > module.params["max_failures"]:
+        module.fail_json(msg="%d of %d destinations are not in their expected state" % (failures, len(destinations)),
+                         **results)
+
+
+def get_ping_runtime(entry):
+    """
+    Return the seconds the ping of entry takes at most, when no reply comes back.
+    """
+    return int(entry["count"]) * max(int(entry["timeout"]), 1)
+
+
+def split_by_runtime(entries, budget):
+    """
+    Split the entries into lists of at most BATCH_SIZE entries whose pings
+    complete within budget seconds.
+    """
+    batches = list()
+    runtime = 0
+    for entry in entries:
+        if not batches or len(batches[-1]) == BATCH_SIZE or runtime + get_ping_runtime(entry) >= budget:
+            batches.append(list())
+            runtime = 0
+        batches[-1].append(entry)
+        runtime += get_ping_runtime(entry)
+    return batches
 
 
 def parse_ping(line1, line2):
@@ -230,15 +408,24 @@ def parse_ping(line1, line2):
         rtt_groupdict
 
 
-def validate_results(module, loss, results):
+def check_state(state, loss):
     """
-    This function is used to validate whether the ping results were unexpected per "state" param.
+    Return the error message when the packet loss is unexpected per state, or None.
     """
-    state = module.params["state"]
     if state == "present" and loss == 100:
-        module.fail_json(msg="Ping failed unexpectedly", **results)
+        return "Ping failed unexpectedly"
     elif state == "absent" and loss < 100:
-        module.fail_json(msg="Ping succeeded unexpectedly", **results)
+        return "Ping succeeded unexpectedly"
+    return None
+
+
+def validate_results(module, loss, results):
+    """
+    This function is used to validate whether the ping results were unexpected per "state" param.
+    """
+    msg = check_state(module.params["state"], loss)
+    if msg is not None:
+        module.fail_json(msg=msg, **results)
 
 
 if __name__ == "__main__":
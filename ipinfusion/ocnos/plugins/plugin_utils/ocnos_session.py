@@ -0,0 +1,275 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Contains the netmiko session helpers shared by the OcNOS Action Plugins.
+# They run on the controller only.
+# IP Infusion
+#
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
+from ansible.errors import AnsibleError
+from netmiko import ConnectHandler
+from paramiko.proxy import ProxyCommand
+
+# modes a pooled session can be in, the enabled OcNOS CLI or the root shell
+CLI = 'cli'
+SHELL = 'shell'
+
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+def get_proxy_command(common_args, host, port):
+    """Return the ProxyCommand of ansible_ssh_common_args for host and port"""
+    proxy_cmd = common_args.strip()
+    if proxy_cmd.startswith("-o ProxyCommand="):
+        # Remove the prefix
+        proxy_cmd = proxy_cmd.replace("-o ProxyCommand=", "", 1).strip()
+        # Strip surrounding quotes
+        proxy_cmd = proxy_cmd.strip('"').strip("'")
+
+    # Replace %h and %p placeholders with actual host/port
+    return proxy_cmd.replace("%h", host).replace("%p", port)
+
+
+def get_connection_params(task_args, task_vars, defaults=None):
+    """Return the connection details of the OcNOS device of a task
+
+    Every value is looked up in the task arguments first, then in the task
+    (or host) vars, then in defaults.
+    """
+    defaults = defaults or {}
+
+    def lookup(*names):
+        for name in names:
+            value = task_args.get(name) or task_vars.get(name)
+            if value:
+                return value
+        for name in names:
+            if defaults.get(name):
+                return defaults[name]
+        return None
+
+    host = lookup('ansible_host')
+    port = str(lookup('ansible_port') or 22)
+    params = {
+        'host': host,
+        'port': port,
+        'username': lookup('ansible_ssh_user', 'ansible_user'),
+        'password': lookup('ansible_ssh_pass', 'ansible_password'),
+        'proxy_command': None,
+    }
+
+    if not all((params['host'], params['username'], params['password'])):
+        raise AnsibleError("Missing OcNOS connection details in inventory/task vars.")
+
+    #Handle SSH Proxy or Jump Server Setting
+    common_args = lookup('ansible_ssh_common_args')
+    if common_args:
+        params['proxy_command'] = get_proxy_command(common_args, host, port)
+
+    return params
+
+
+def wait_until(check, timeout, interval=1, backoff=2, max_interval=15, progress=None):
+    """Call check until it returns a true value or timeout seconds passed
+
+    The wait between two calls starts at interval seconds and is multiplied
+    by backoff up to max_interval, so a quick operation is seen done quickly
+    and a long one is not polled more than needed.  progress is called with
+    the elapsed seconds after every unsuccessful call.  Returns the last
+    value of check.
+    """
+    start = time.time()
+    while True:
+        value = check()
+        elapsed = time.time() - start
+        if value or elapsed >= timeout:
+            return value
+        if progress is not None:
+            progress(elapsed)
+        time.sleep(min(interval, timeout - elapsed))
+        interval = min(interval * backoff, max_interval)
+
+
+class PooledSession(object):
+    """A netmiko session of the pool and the mode it is in
+
+    Attribute access is forwarded to the netmiko connection, so a pooled
+    session is used like the connection itself.
+    """
+
+    def __init__(self, key, conn):
+        self.key = key
+        self.conn = conn
+        self.mode = CLI
+        self.closed = False
+        self.last_used = time.time()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def set_mode(self, mode):
+        """Move the session between the OcNOS CLI and the root shell"""
+        if mode == self.mode:
+            return
+
+        if mode == SHELL:
+            #Enter the OcNOS Debian Shell and escalate privileges to root
+            self.conn.send_command('start-shell', expect_string=r'\$')
+            self.conn.send_command('su -', expect_string='Password:')
+            self.conn.send_command('root', expect_string='#')
+        else:
+            #come back to ocnos prompt
+            self.conn.send_command('exit', expect_string=r'\$')
+            self.conn.send_command('exit', expect_string='#')
+        self.mode = mode
+
+    def alive(self):
+        try:
+            return not self.closed and self.conn.is_alive()
+        except Exception:
+            return False
+
+
+class SessionPool(object):
+    """Keyed pool of authenticated netmiko sessions to OcNOS devices
+
+    Sessions are keyed by host, port, user and jump host.  A released
+    session stays open in the mode it was left in and is handed out again
+    by acquire(), preferably to a caller that wants that same mode.  Idle
+    sessions are closed after idle_timeout seconds.
+
+    The pool lives in the worker process of a task, so sessions are only
+    reused within one task, by the steps of a plugin or by the threads of
+    a plugin handling many hosts.  Every task opens its own sessions.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key, params):
+        connection_dict = {
+            'host': params['host'],
+            'port': int(params['port']),
+            'username': params['username'],
+            'password': params['password'],
+            'device_type': 'ipinfusion_ocnos'
+            }
+        if params.get('proxy_command'):
+            connection_dict['sock'] = ProxyCommand(params['proxy_command'])
+
+        # Try to establish a connection to the DUT using netmiko
+        conn = ConnectHandler(**connection_dict)
+        session = PooledSession(key, conn)
+        try:
+            conn.enable()
+        except Exception:
+            self.discard(session)
+            raise
+        return session
+
+    def _take_idle(self, key, mode):
+        with self._lock:
+            idle = self._idle.get(key)
+            if not idle:
+                return None
+            for index, session in enumerate(idle):
+                if session.mode == mode:
+                    return idle.pop(index)
+            return idle.pop()
+
+    def acquire(self, params, mode=CLI):
+        """Return a session to the device of params, in the given mode"""
+        self.evict()
+        key = (params['host'], str(params['port']), params['username'], params.get('proxy_command'))
+
+        session = self._take_idle(key, mode)
+        while session is not None and not session.alive():
+            self.discard(session)
+            session = self._take_idle(key, mode)
+
+        if session is None:
+            session = self._connect(key, params)
+
+        try:
+            session.set_mode(mode)
+        except Exception:
+            self.discard(session)
+            raise
+        return session
+
+    def release(self, session):
+        """Give a session back to the pool for the next caller"""
+        if session.closed:
+            return
+        session.last_used = time.time()
+        with self._lock:
+            self._idle.setdefault(session.key, []).append(session)
+
+    def discard(self, session):
+        """Close a session that must not be reused, after a reload for example"""
+        if session.closed:
+            return
+        session.closed = True
+        try:
+            session.conn.disconnect()
+        except Exception:
+            pass
+
+    def evict(self):
+        """Close the sessions idle for more than idle_timeout seconds"""
+        expired = list()
+        limit = time.time() - self.idle_timeout
+        with self._lock:
+            for key, idle in list(self._idle.items()):
+                expired.extend(session for session in idle if session.last_used < limit)
+                idle[:] = [session for session in idle if session.last_used >= limit]
+                if not idle:
+                    del self._idle[key]
+        for session in expired:
+            self.discard(session)
+
+    def close_all(self):
+        with self._lock:
+            sessions = [session for idle in self._idle.values() for session in idle]
+            self._idle.clear()
+        for session in sessions:
+            self.discard(session)
+
+    @contextmanager
+    def session(self, params, mode=CLI):
+        """Acquire a session for a with block and release it at the end
+
+        The session is discarded instead when the block raises, as its state
+        is unknown.
+        """
+        session = self.acquire(params, mode)
+        try:
+            yield session
+        except BaseException:
+            self.discard(session)
+            raise
+        self.release(session)
+
+
+_POOL = SessionPool()
+atexit.register(_POOL.close_all)
+
+
+def get_pool():
+    """Return the session pool of the task worker process"""
+    return _POOL
@@ -0,0 +1,94 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS config backup Action Plugin
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import gzip
+import json
+
+from ansible_collections.ipinfusion.ocnos.plugins.action.ocnos_config_backup import ActionModule, time_stamper
+
+
+class FakeSession(object):
+
+    def __init__(self, outputs=None):
+        self.outputs = outputs or {}
+
+    def send_command(self, command, **kwargs):
+        return self.outputs.get(command, 'output of %s' % command)
+
+
+DUMP_LIST = [
+    ('show json running', 'leaf1.json'),
+    ('show xml running', 'leaf1.xml'),
+    ('show running', 'leaf1.cfg'),
+]
+
+
+def stream_backups(tmp_path, time_stamp, outputs=None):
+    action = ActionModule.__new__(ActionModule)
+    return action._stream_backups(FakeSession(outputs), DUMP_LIST, str(tmp_path), 'leaf1', time_stamp, 300)
+
+
+def read_manifest(tmp_path):
+    with open(str(tmp_path / 'leaf1.digests.json')) as f:
+        return json.load(f)
+
+
+def test_time_stamper():
+    assert time_stamper('leaf1.cfg', '2025-01-10_08:12:45') == 'leaf1_2025-01-10_08:12:45.cfg'
+    assert time_stamper('10.0.0.1.json', 'ts') == '10.0.0.1_ts.json'
+    # ocnos_pcap captures of a dotted hostname
+    assert time_stamper('leaf1.dc1.pcapng', 'ts') == 'leaf1.dc1_ts.pcapng'
+    assert time_stamper('leaf1.dc1_xe1.pcap', 'ts') == 'leaf1.dc1_xe1_ts.pcap'
+
+
+def test_stream_backups_dotted_hostname(tmp_path):
+    hostname = 'leaf1.dc1.example.com'
+    dump_list = [
+        ('show json running', '%s.json' % hostname),
+        ('show xml running', '%s.xml' % hostname),
+        ('show running', '%s.cfg' % hostname),
+    ]
+    action = ActionModule.__new__(ActionModule)
+    result = action._stream_backups(FakeSession(), dump_list, str(tmp_path), hostname, 'ts', 300)
+
+    files = [backup['file'] for backup in result['backup_files']]
+    assert files == ['%s_ts.json.gz' % hostname, '%s_ts.xml.gz' % hostname, '%s_ts.cfg.gz' % hostname]
+    for (show, file), name in zip(dump_list, files):
+        with gzip.open(str(tmp_path / name)) as f:
+            assert f.read() == b'output of ' + show.encode()
+
+
+def test_stream_backups_unchanged(tmp_path):
+    first = stream_backups(tmp_path, 'ts1')
+    manifest = read_manifest(tmp_path)
+    assert first['changed'] is True
+
+    second = stream_backups(tmp_path, 'ts2')
+    assert second['changed'] is False
+    assert second['backup_files'] == [dict(backup, changed=False) for backup in first['backup_files']]
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+        ['leaf1.digests.json', 'leaf1_ts1.cfg.gz', 'leaf1_ts1.json.gz', 'leaf1_ts1.xml.gz']
+    assert read_manifest(tmp_path) == manifest
+
+
+def test_stream_backups_changed(tmp_path):
+    stream_backups(tmp_path, 'ts1')
+    result = stream_backups(tmp_path, 'ts2', {'show running': 'hostname leaf1'})
+
+    assert result['changed'] is True
+    assert [(backup['file'], backup['changed']) for backup in result['backup_files']] == \
+        [('leaf1_ts1.json.gz', False), ('leaf1_ts1.xml.gz', False), ('leaf1_ts2.cfg.gz', True)]
+    with gzip.open(str(tmp_path / 'leaf1_ts2.cfg.gz')) as f:
+        assert f.read() == b'hostname leaf1'
+
+    manifest = read_manifest(tmp_path)
+    assert manifest['leaf1.cfg'] == {'file': 'leaf1_ts2.cfg.gz', 'sha256': result['backup_files'][2]['sha256']}
+    assert manifest['leaf1.json']['file'] == 'leaf1_ts1.json.gz'
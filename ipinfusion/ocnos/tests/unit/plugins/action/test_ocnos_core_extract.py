@@ -0,0 +1,97 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS core extraction Action Plugin
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from contextlib import contextmanager
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible_collections.ipinfusion.ocnos.plugins.action import ocnos_core_extract
+
+CORE = 'core_nsm_1234.gz'
+
+
+class FakeConn(object):
+    """Answers the commands of a core extraction, the GDB log being written for in_use polls"""
+
+    def __init__(self, in_use=1, copy_output='Copy Success', tools=True):
+        self.in_use = in_use
+        self.copy_output = copy_output
+        self.tools = tools
+        self.commands = []
+
+    def set_mode(self, mode):
+        self.commands.append('mode %s' % mode)
+
+    def send_command(self, command, **kwargs):
+        self.commands.append(command)
+        if command == 'show cores':
+            return CORE
+        if command.startswith('show core '):
+            return 'GDB log: %s' % CORE
+        if command.startswith('stat '):
+            return '4096'
+        if 'command -v fuser' in command:
+            if not self.tools:
+                return 'unknown'
+            self.in_use -= 1
+            return 'in-use' if self.in_use >= 0 else 'closed'
+        if command.startswith('copy filepath'):
+            return self.copy_output
+        return ''
+
+
+@pytest.fixture
+def action(monkeypatch, tmp_path):
+    conn = FakeConn()
+
+    class FakePool(object):
+
+        @contextmanager
+        def session(self, params, mode=None):
+            yield conn
+
+    monkeypatch.setattr(ocnos_core_extract, 'get_pool', FakePool)
+    monkeypatch.setattr(ocnos_core_extract, 'get_connection_params', lambda args, task_vars: {})
+    monkeypatch.setattr(ocnos_core_extract, 'wait_until', lambda check, timeout, **kwargs: check() or check() or check())
+
+    class FakeTask(object):
+        args = dict(remote_host='10.0.0.9', remote_path='/cores', remote_username='u', remote_password='p',
+                    compress=True, manifest=str(tmp_path / 'manifest.json'))
+
+    action = ocnos_core_extract.ActionModule.__new__(ocnos_core_extract.ActionModule)
+    action._task = FakeTask()
+    return action, conn
+
+
+def test_file_in_use():
+    assert ocnos_core_extract.file_in_use(FakeConn(in_use=1), '/tmp/x') is True
+    assert ocnos_core_extract.file_in_use(FakeConn(in_use=0), '/tmp/x') is False
+    assert ocnos_core_extract.file_in_use(FakeConn(tools=False), '/tmp/x') is None
+
+
+def test_extract_waits_for_the_log_to_be_closed(action):
+    action, conn = action
+    result = action.run(task_vars=dict(inventory_hostname='leaf1'))
+    assert result['copied_files'] == ['leaf1_%s.gz' % CORE]
+    gzip = conn.commands.index('gzip -c /tmp/%s > /tmp/%s.gz' % (CORE, CORE))
+    # in use on the first poll, closed on the second
+    assert len([cmd for cmd in conn.commands[:gzip] if 'command -v fuser' in cmd]) == 2
+    assert 'rm -f /tmp/%s.gz' % CORE in conn.commands
+
+
+def test_extract_removes_the_archive_when_the_copy_fails(action):
+    action, conn = action
+    conn.copy_output = 'Copy Failed'
+    with pytest.raises(AnsibleError, match='Copy failed'):
+        action.run(task_vars=dict(inventory_hostname='leaf1'))
+    assert conn.commands[-1] != 'clear cores'
+    assert 'rm -f /tmp/%s.gz' % CORE in conn.commands
@@ -0,0 +1,104 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS iperf3 matrix Action Plugin
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from itertools import combinations
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible_collections.ipinfusion.ocnos.plugins.action.ocnos_iperf3 import summarize_iperf3
+from ansible_collections.ipinfusion.ocnos.plugins.action.ocnos_iperf3_matrix import (
+    full_mesh_rounds, get_bits_per_second, get_pairs, schedule_rounds
+)
+
+
+def check_rounds(rounds, pairs):
+    # every pair runs once and a host is in one pair of a round at most
+    assert sorted(pair for round_pairs in rounds for pair in round_pairs) == sorted(pairs)
+    for round_pairs in rounds:
+        hosts = [host for pair in round_pairs for host in pair]
+        assert len(hosts) == len(set(hosts))
+
+
+def test_get_pairs_full_mesh():
+    assert get_pairs('full_mesh', hosts=['a', 'b', 'c']) == [('a', 'b'), ('a', 'c'), ('b', 'c')]
+    assert get_pairs('full_mesh', hosts=['a', 'b'], bidirectional=True) == [('a', 'b'), ('b', 'a')]
+
+
+def test_get_pairs_leaf_spine():
+    assert get_pairs('leaf_spine', leaves=['l1', 'l2'], spines=['s1']) == [('s1', 'l1'), ('s1', 'l2')]
+    with pytest.raises(AnsibleError, match='requires leaves and spines'):
+        get_pairs('leaf_spine', leaves=['l1'])
+
+
+def test_get_pairs_pairs():
+    pairs = [{'server': 'a', 'client': 'b'}, ['b', 'c'], ['a', 'b']]
+    assert get_pairs('pairs', pairs=pairs) == [('a', 'b'), ('b', 'c')]
+    with pytest.raises(AnsibleError, match='same server and client'):
+        get_pairs('pairs', pairs=[['a', 'a']])
+    with pytest.raises(AnsibleError, match='Invalid iperf3 pair'):
+        get_pairs('pairs', pairs=[{'server': 'a'}])
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 3, 4, 9, 10])
+def test_full_mesh_rounds(count):
+    hosts = ['host%d' % i for i in range(count)]
+    rounds = full_mesh_rounds(hosts)
+    check_rounds(rounds, get_pairs('full_mesh', hosts=hosts))
+    # n - 1 rounds, n when n is odd
+    assert len(rounds) == (count - 1 + count % 2 if count > 1 else 0)
+
+
+def test_schedule_rounds():
+    pairs = get_pairs('leaf_spine', leaves=['l%d' % i for i in range(6)], spines=['s1', 's2'], bidirectional=True)
+    rounds = schedule_rounds(pairs)
+    check_rounds(rounds, pairs)
+    # every spine has 12 pairs
+    assert len(rounds) == 12
+
+
+def test_schedule_rounds_mesh():
+    pairs = list(combinations(range(10), 2))
+    check_rounds(schedule_rounds(pairs), pairs)
+
+
+def test_summarize_iperf3_tcp():
+    data = {
+        'start': {'test_start': {'protocol': 'TCP'}},
+        'intervals': [{'sum': {'start': 0, 'end': 1, 'bits_per_second': 1e7, 'retransmits': 2, 'omitted': False},
+                       'streams': [{'socket': 5, 'bits_per_second': 1e7, 'retransmits': 2}]}],
+        'end': {'streams': [{'sender': {'bits_per_second': 1.1e7, 'retransmits': 2},
+                             'receiver': {'bits_per_second': 1e7}}],
+                'sum_sent': {'bits_per_second': 1.1e7, 'retransmits': 2},
+                'sum_received': {'bits_per_second': 1e7},
+                'cpu_utilization_percent': {'host_total': 5.0}},
+    }
+    summary = summarize_iperf3(data)
+    assert summary['protocol'] == 'TCP'
+    assert summary['intervals'][0]['retransmits'] == 2
+    assert summary['intervals'][0]['streams'][0]['bits_per_second'] == 1e7
+    assert summary['streams'] == [{'sender': {'bits_per_second': 1.1e7, 'retransmits': 2},
+                                   'receiver': {'bits_per_second': 1e7}}]
+    assert 'cpu_utilization_percent' not in summary
+    assert get_bits_per_second(summary) == 1e7
+
+
+def test_summarize_iperf3_udp_error():
+    data = {
+        'start': {'test_start': {'protocol': 'UDP'}},
+        'end': {'sum': {'bits_per_second': 1e6, 'jitter_ms': 0.5, 'lost_percent': 1.5}},
+        'error': 'interrupt - the client has terminated',
+    }
+    summary = summarize_iperf3(data)
+    assert summary['sum']['lost_percent'] == 1.5
+    assert summary['error'] == 'interrupt - the client has terminated'
+    assert get_bits_per_second(summary) == 1e6
+    assert get_bits_per_second(summarize_iperf3({})) is None
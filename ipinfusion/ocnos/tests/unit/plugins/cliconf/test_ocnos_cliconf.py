@@ -0,0 +1,182 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the pipelined configuration writes of the OcNOS Cliconf Plugin
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible_collections.ipinfusion.ocnos.plugins.cliconf.ocnos import Cliconf, split_window_output
+
+LINES = ['interface xe1', 'description uplink', 'ip address 10.0.0.1/31']
+
+INVALID_INPUT = (
+    "                                  ^\r\n"
+    "% Invalid input detected at '^' marker.\r\n"
+)
+
+
+class FakeConnection(object):
+    """network_cli stand-in replaying the reads of a device transcript"""
+
+    def __init__(self, reads, timeout=30):
+        self.reads = list(reads)
+        self.sent = []
+        self.marker = None
+        self.timeout = timeout
+
+    def get_option(self, option):
+        assert option == 'persistent_command_timeout'
+        return self.timeout
+
+    def get_prompt(self):
+        return b'OcNOS#'
+
+    def send(self, command, sendonly=False, **kwargs):
+        command = command.decode()
+        self.sent.append(command)
+        if '! ansible window end' in command:
+            self.marker = command.splitlines()[-1]
+        return ''
+
+    def receive(self, command=None, prompts=None, answer=None, newline=True,
+                prompt_retry_check=False, check_all=False, strip_prompt=True):
+        read = self.reads.pop(0).replace('MARKER', self.marker)
+        if read.startswith('ERROR:'):
+            raise AnsibleConnectionFailure(read[len('ERROR:'):])
+        return read.encode()
+
+
+def transcript(*reads):
+    return FakeConnection(reads)
+
+
+def edit_config(conn, lines):
+    cliconf = Cliconf(conn)
+    # no ansible_ocnos_ignored_errors connection option
+    cliconf.get_option = lambda option, hostvars=None: None
+    return cliconf.edit_config(lines, commit=False, window=10)
+
+
+def test_split_window_output_clean():
+    output = (
+        "OcNOS(config)#interface xe1\r\n"
+        "OcNOS(config-if)#description uplink\r\n"
+        "OcNOS(config-if)#ip address 10.0.0.1/31\r\n"
+        "OcNOS(config-if)#"
+    )
+    assert split_window_output(LINES, output) == (['', '', ''], None)
+
+
+def test_split_window_output_error_of_last_line():
+    output = (
+        "OcNOS(config)#interface xe1\r\n"
+        "OcNOS(config-if)#description uplink\r\n"
+        "OcNOS(config-if)#ip address 10.0.0.1/31\r\n" + INVALID_INPUT +
+        "OcNOS(config-if)#! end\r\n"
+        "OcNOS(config-if)#"
+    )
+    outputs, unattributed = split_window_output(LINES + ['! end'], output)
+    assert outputs[:2] == ['', '']
+    assert "% Invalid input detected" in outputs[2]
+    assert unattributed is None
+
+
+def test_split_window_output_missing_echo():
+    output = (
+        "%% Configuration already exists\r\n"
+        "OcNOS(config-if)#ip address 10.0.0.1/31\r\n"
+        "OcNOS(config-if)#"
+    )
+    outputs, unattributed = split_window_output(LINES, output)
+    assert outputs == [None, None, '']
+    assert unattributed == '%% Configuration already exists'
+
+
+def test_window_reads_up_to_the_marker():
+    conn = transcript(
+        "OcNOS(config)#interface xe1\r\nOcNOS(config-if)#",
+        "description uplink\r\nOcNOS(config-if)#ip address 10.0.0.1/31\r\nOcNOS(config-if)#",
+        "MARKER\r\nOcNOS(config-if)#",
+    )
+    resp = edit_config(conn, LINES)
+    assert resp['request'] == ['configure terminal'] + LINES
+    assert not conn.reads
+
+
+def test_window_error_on_last_line_fails():
+    conn = transcript(
+        "OcNOS(config)#interface xe1\r\nOcNOS(config-if)#description uplink\r\nOcNOS(config-if)#",
+        "ERROR:ip address 10.0.0.1/31\r\n" + INVALID_INPUT + "OcNOS(config-if)#",
+        "MARKER\r\nOcNOS(config-if)#",
+    )
+    with pytest.raises(AnsibleConnectionFailure, match="configuration line 'ip address 10.0.0.1/31' failed"):
+        edit_config(conn, LINES)
+    # the window was read up to the marker before failing
+    assert not conn.reads
+
+
+def test_window_ignored_error():
+    conn = transcript(
+        "OcNOS(config)#interface xe1\r\nOcNOS(config-if)#",
+        "ERROR:description uplink\r\n%% Configuration already exists\r\nOcNOS(config-if)#",
+        "ip address 10.0.0.1/31\r\nOcNOS(config-if)#MARKER\r\nOcNOS(config-if)#",
+    )
+    resp = edit_config(conn, LINES)
+    assert resp['ignored'][0]['command'] == 'description uplink'
+
+
+def test_window_unattributed_error_fails():
+    # the echoes of the first lines were lost with the start of a read
+    # interrupted by an error
+    conn = transcript(
+        "ERROR:% Invalid input detected at '^' marker.\r\nOcNOS(config-if)#",
+        "ip address 10.0.0.1/31\r\nOcNOS(config-if)#MARKER\r\nOcNOS(config-if)#",
+    )
+    with pytest.raises(AnsibleConnectionFailure, match="configuration window starting with 'interface xe1' failed"):
+        edit_config(conn, LINES)
+
+
+def test_window_lost_echo_fails():
+    conn = transcript(
+        "OcNOS(config-if)#description uplink\r\nOcNOS(config-if)#",
+        "ip address 10.0.0.1/31\r\nOcNOS(config-if)#MARKER\r\nOcNOS(config-if)#",
+    )
+    with pytest.raises(AnsibleConnectionFailure, match="output of configuration line 'interface xe1' was not received"):
+        edit_config(conn, LINES)
+
+
+def test_window_needs_strip_prompt():
+    class OldConnection(FakeConnection):
+        def receive(self, command=None, prompts=None, answer=None, newline=True,
+                    prompt_retry_check=False, check_all=False):
+            raise AssertionError('not used for line by line writes')
+
+    conn = OldConnection([])
+    resp = edit_config(conn, LINES)
+    assert conn.sent[1:4] == LINES
+    assert resp['request'] == ['configure terminal'] + LINES
+
+
+def test_edit_config_window_raises_connection_failures():
+    # network_cli's command timeout is not a device error and is not absorbed
+    conn = transcript(
+        "interface xe1\r\nOcNOS(config-if)#",
+        "ERROR:command timeout triggered, timeout value is 30 secs.",
+    )
+    with pytest.raises(AnsibleConnectionFailure, match='command timeout triggered'):
+        edit_config(conn, LINES)
+
+
+def test_edit_config_window_deadline():
+    # prompts keep coming but the end marker is never echoed
+    conn = FakeConnection(["interface xe1\r\nOcNOS(config-if)#"] * 3, timeout=0)
+    with pytest.raises(AnsibleConnectionFailure, match='not received within 0 seconds'):
+        edit_config(conn, LINES)
+    assert len(conn.reads) == 2
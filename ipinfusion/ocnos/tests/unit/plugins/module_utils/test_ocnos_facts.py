@@ -0,0 +1,120 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS fact collectors
+#
+# Run as a script to time the interface parser on a large device:
+#   python test_ocnos_facts.py [interfaces]
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import sys
+import time
+
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos_facts import Interfaces
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read()
+
+
+def interface(i):
+    """Return the show interface lines of a synthetic interface, varied by i"""
+    name = 'xe%d' % i if i % 7 else 'po%d' % i
+    lines = ['Interface %s' % name,
+             '  Scope: both',
+             '  Hardware is %s  Current HW addr: 3c2c.99a1.%04x' % ('ETH' if i % 7 else 'AGG', i % 0x10000),
+             '  Physical:3c2c.99a1.%04x  Logical:(not set)' % (i % 0x10000),
+             '  Port Mode is %s' % ('Router' if i % 3 else 'access'),
+             '  Interface index: %d' % (10000 + i),
+             '  Metric 1 mtu %d duplex-full(auto) link-speed 10g(auto)' % (9216 if i % 2 else 1500),
+             '  <UP,BROADCAST,RUNNING,MULTICAST>',
+             '  VRF Binding: Associated with %s' % ('default' if i % 4 else 'red'),
+             '  Label switching is disabled']
+    if i % 3:
+        lines.append('  Description: link to leaf %d' % i)
+    if i % 2:
+        lines.append('  inet 10.%d.%d.1/31 broadcast 10.%d.%d.1' % (i // 250, i % 250, i // 250, i % 250))
+    if i % 5:
+        lines.append('  inet6 2001:db8::%x/127' % i)
+    if i % 11 == 0:
+        lines.append('  line protocol is down')
+    lines += ['    RX',
+              '      input packets %d bytes %d' % (i * 10, i * 640),
+              '    TX',
+              '      output packets %d bytes %d' % (i * 20, i * 1280)]
+    return name, lines
+
+
+def device(interfaces):
+    """Return the show interface, brief, counters and transceiver outputs of a device with interfaces"""
+    intf, counters = [], []
+    brief = ['Ethernet  Type   PVID  Mode   Status  Reason   Speed', 'Interface']
+    transceiver = ['Port       DDM    Temp (C)  Voltage (V)  Lane  Current   Tx Power  Rx Power', '-' * 80]
+    for i in range(interfaces):
+        name, lines = interface(i)
+        intf += lines
+        if i % 13:
+            brief.append('%-9s ETH    --    routed   %s    none     10g' % (name, 'up' if i % 6 else 'down'))
+        counters += ['Interface %s' % name, ' Rx Packets:          %d' % (i * 10), ' Tx Packets:          %d' % (i * 20), '']
+        if i % 4 == 0:
+            transceiver += ['%-10s Y      33.41     3.30         1     6.50      -2.13     -3.02' % name,
+                            '                                         2     6.58      -2.07     -4.11']
+    return ['\n'.join(lines) for lines in (intf, brief, counters, transceiver)]
+
+
+def parse_interfaces(*data):
+    interfaces = Interfaces.__new__(Interfaces)
+    interfaces.warnings = []
+    interfaces.facts = dict(all_ipv4_addresses=[], all_ipv6_addresses=[])
+    facts = interfaces.parse_interfaces(*data)
+    return facts, interfaces
+
+
+def test_parse_interfaces_fixture():
+    # ocnos_interfaces_facts.json holds the facts of the parser that joined
+    # the lines of every interface and searched them field by field
+    expected = json.loads(load_fixture('ocnos_interfaces_facts.json'))
+    facts, interfaces = parse_interfaces(*[load_fixture('ocnos_show_interface%s.txt' % suffix)
+                                           for suffix in ('', '_brief', '_counters', '_transceiver')])
+
+    assert facts == expected['interfaces']
+    assert list(facts) == list(expected['interfaces'])
+    assert interfaces.facts['all_ipv4_addresses'] == expected['all_ipv4_addresses']
+    assert interfaces.facts['all_ipv6_addresses'] == expected['all_ipv6_addresses']
+    assert interfaces.warnings == []
+
+
+def test_parse_interfaces_first_match():
+    facts, interfaces = parse_interfaces(
+        'Interface xe1\n  Description: mtu 9000 link\n  Metric 1 mtu 1500 duplex-full\n  line protocol is down',
+        'xe1       ETH   --    routed   up      none     10g',
+        '', '')
+    assert facts['xe1']['description'] == 'mtu 9000 link'
+    assert facts['xe1']['mtu'] == '9000'
+    # the brief status is preferred over the line protocol
+    assert facts['xe1']['lineprotocol'] == 'UP'
+
+
+def main():
+    interfaces = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = device(interfaces)
+    timings = []
+    for dummy in range(3):
+        start = time.perf_counter()
+        parse_interfaces(*data)
+        timings.append(time.perf_counter() - start)
+    print('%d interfaces, %d lines: %.3fs' % (interfaces, sum(output.count('\n') + 1 for output in data), min(timings)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS module_utils helpers
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import random
+
+import pytest
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import PatternClassifier, _cache_path
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import ConfigIndex, config_difference
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils import ocnos
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import BATCH_SIZE, run_commands_batch
+
+
+class FakeModule(object):
+
+    def __init__(self, **params):
+        self.params = params
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def run_commands_batch(self, commands, check_rc):
+        self.calls.append([cmd['command'] for cmd in commands])
+        return [{'output': 'output of %s' % cmd['command'], 'error': None} for cmd in commands]
+
+
+def test_run_commands_batch_split(monkeypatch):
+    monkeypatch.setattr(ocnos, 'to_commands', lambda module, commands: [{'command': cmd} for cmd in commands])
+    module = FakeModule()
+    module._ocnos_connection = FakeConnection()
+    commands = ['show interface xe%d' % i for i in range(2 * BATCH_SIZE + 3)]
+
+    outputs, errors = run_commands_batch(module, commands)
+    assert [len(call) for call in module._ocnos_connection.calls] == [BATCH_SIZE, BATCH_SIZE, 3]
+    assert outputs == ['output of %s' % cmd for cmd in commands]
+    assert errors == [None] * len(commands)
+
+
+def test_pattern_classifier_combined():
+    classifier = PatternClassifier([r'%% Configuration already exists', r'(?i)bgp is already running'])
+    assert classifier.classify('%% BGP is already running, AS is 65000') == r'(?i)bgp is already running'
+    assert classifier.classify('%% Configuration already exists') == r'%% Configuration already exists'
+    assert classifier.classify('%% Invalid input') is None
+
+
+def test_pattern_classifier_backreference():
+    # \1 would refer to the group of another pattern inside the alternation
+    classifier = PatternClassifier([r'%% Port is already aggregated', r'(\w+) is already a member of \1'])
+    assert classifier.classify('xe1 is already a member of xe1') == r'(\w+) is already a member of \1'
+    assert classifier.classify('xe1 is already a member of xe2') is None
+
+
+def test_pattern_classifier_duplicate_group_names():
+    classifier = PatternClassifier([r'VLAN (?P<id>\d+) exists', r'VRF (?P<id>\w+) exists'])
+    assert classifier.classify('%% VRF red exists') == r'VRF (?P<id>\w+) exists'
+
+
+def test_cache_path_keyed_on_cache_key(tmp_path):
+    # both devices report the default hostname, the inventory hosts differ
+    leaf1 = FakeModule(cache_key='leaf1', cache_dir=str(tmp_path))
+    leaf2 = FakeModule(cache_key='leaf2', cache_dir=str(tmp_path))
+    assert _cache_path(leaf1, 'facts') == str(tmp_path / 'leaf1' / 'facts.json')
+    assert _cache_path(leaf1, 'facts') != _cache_path(leaf2, 'facts')
+    assert _cache_path(FakeModule(cache_key='../leaf1', cache_dir=str(tmp_path)), 'facts') == str(tmp_path / '.._leaf1' / 'facts.json')
+    assert _cache_path(FakeModule(cache_dir=str(tmp_path)), 'facts') is None
+
+
+def random_config(rand):
+    """Return a config of interface and router blocks, possibly interleaved"""
+    lines = []
+    for dummy in range(rand.randint(1, 6)):
+        if rand.random() < 0.2:
+            lines.append('hostname leaf%d' % rand.randint(1, 2))
+            continue
+        lines.append(rand.choice(['interface xe1', 'interface xe2', 'router bgp 65000']))
+        for dummy in range(rand.randint(0, 3)):
+            child = rand.choice([' mtu 1500', ' mtu 9000', ' description a', ' description b', ' address-family ipv4 unicast'])
+            lines.append(child)
+            if child == ' address-family ipv4 unicast' and rand.random() < 0.5:
+                lines.append('  network 10.0.%d.0/24' % rand.randint(0, 1))
+    return '\n'.join(lines)
+
+
+def difference(candidate, running, match, replace, path=None):
+    return [item.line for item in config_difference(NetworkConfig(indent=1, contents=candidate),
+                                                    ConfigIndex(NetworkConfig(indent=1, contents=running)),
+                                                    match=match, path=path, replace=replace)]
+
+
+def netcommon_difference(candidate, running, match, replace, path=None):
+    return [item.line for item in NetworkConfig(indent=1, contents=candidate).difference(
+        NetworkConfig(indent=1, contents=running), match=match, path=path, replace=replace)]
+
+
+def test_config_difference_returns_to_earlier_block():
+    running = 'interface xe1\n mtu 1500\ninterface xe2\n mtu 1500'
+    candidate = 'interface xe1\n description a\ninterface xe2\n description b\ninterface xe1\n mtu 9000'
+    assert difference(candidate, running, 'line', None) == [
+        'interface xe1', 'interface xe1 description a',
+        'interface xe2', 'interface xe2 description b',
+        'interface xe1', 'interface xe1 mtu 9000',
+    ]
+
+
+@pytest.mark.parametrize('match,replace', [
+    ('line', None), ('strict', None), ('exact', None), ('line', 'block'), ('strict', 'block'),
+])
+def test_config_difference_netcommon(match, replace):
+    rand = random.Random('%s-%s' % (match, replace))
+    for dummy in range(500):
+        candidate, running = random_config(rand), random_config(rand)
+        path = rand.choice([None, ['interface xe1'], ['router bgp 65000']]) if match != 'line' else None
+        assert difference(candidate, running, match, replace, path) == \
+            netcommon_difference(candidate, running, match, replace, path), (candidate, running, path)
@@ -0,0 +1,128 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS BGP facts parser
+#
+# Run as a script to time the parser on a large capture:
+#   python test_ocnos_bgp_facts.py [peers]
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from ansible_collections.ipinfusion.ocnos.plugins.modules.ocnos_bgp_facts import BgpNeighbor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def peer(i):
+    """Return the show bgp neighbor lines of a synthetic peer, varied by i"""
+    vrf = 'vrf red, ' if i % 5 == 0 else ''
+    lines = ['BGP neighbor is 10.%d.%d.2, %sremote AS %d, local AS 65000, external link' % (i // 250, i % 250, vrf, 65001 + i),
+             '  Description: peer %d' % i if i % 2 else '  Member of peer-group RR for session parameters',
+             '  BGP version 4, local router ID 1.1.1.1, remote router ID 2.2.%d.%d' % (i // 250, i % 250),
+             '  BGP state = Established, up for 1d02h%02d' % (i % 60) if i % 3 else '  BGP state = Active',
+             '  Last read 00:00:%02d, hold time is 90, keepalive interval is 30 seconds' % (i % 60),
+             '  Configured hold time is 180, keepalive interval is 60 seconds',
+             '  Neighbor capabilities:',
+             '    Route refresh: advertised and received (old and new)',
+             '    Address family IPv4 Unicast: advertised and received',
+             '    Graceful Restart Capabilty: advertised',
+             '  Received %d messages, 0 notifications, 0 in queue' % (i * 3),
+             '  Sent %d messages, 1 notifications, 0 in queue' % (i * 4),
+             '  Route refresh request: received 0, sent 0',
+             '  Minimum time between advertisement runs is 30 seconds',
+             '  Update source is lo',
+             '  Bidirectional Forwarding Detection is disabled',
+             '',
+             ' For address family: IPv4 Unicast',
+             '  BGP table version %d, neighbor version %d' % (i, i),
+             '  Index %d, Offset 0, Mask 0x%x' % (i, 1 << (i % 8)),
+             '  RR peer-group member',
+             '  Graceful restart: advertised, received',
+             '  AF-dependant capabilities:',
+             '    Outbound Route Filter (ORF) type (%d) Prefix-list:' % (64 if i % 2 else 128),
+             '      Send-mode: advertised',
+             '      Receive-mode: received',
+             '  Outbound Route Filter (ORF): sent;',
+             '  First update is deferred until ORF or ROUTE-REFRESH is received',
+             '  Route-Reflector Client',
+             '  Inbound soft reconfiguration allowed',
+             '  Community attribute sent to this neighbor (both)',
+             '  Default information originate, default sent',
+             '  Incoming update prefix filter list is *PL-IN',
+             '  Route map for outgoing advertisements is *RM-OUT',
+             '  Weight 100',
+             '  ip prefix-list PL-%d: 2 entries' % i,
+             '   seq 5 permit 10.0.0.0/8 le 32',
+             '   seq 10 deny any',
+             '  %d accepted prefixes' % (i * 10),
+             '  %d announced prefixes' % (i * 5),
+             '',
+             ' For address family: IPv6 Unicast',
+             '  BGP table version 1, neighbor version 1',
+             '  Index 2, Offset 0, Mask 0x4',
+             '  NEXT_HOP is always this router',
+             '  0 accepted prefixes',
+             '',
+             ' Connections established %d; dropped %d' % (i % 7, i % 3),
+             '  Last Reset: 1d01h, due to BGP Notification sent',
+             '  Notification Error Message: (Cease/Other Configuration Change.)',
+             '  External BGP neighbor may be up to 1 hops away.',
+             'Local host: 10.0.0.1, Local port: 179',
+             'Foreign host: 10.0.0.2, Foreign port: %d' % (40000 + i),
+             'Nexthop: 10.0.0.1',
+             'Nexthop global: 2001:db8::1',
+             'Nexthop local: fe80::1',
+             'BGP connection: non shared network',
+             '  Remote restart time is 120 sec',
+             '  Re-established, restart time 120',
+             '  Next connect timer due in %d seconds' % (i % 30),
+             '  Capability error: none',
+             '']
+    return lines
+
+
+def capture(peers):
+    """Return the show bgp neighbor output of a route reflector with peers"""
+    return '\n'.join(line for i in range(peers) for line in peer(i))
+
+
+def parse_bgp_neighbor(data, neighbors=None, address_families=None):
+    return BgpNeighbor.__new__(BgpNeighbor).parse_bgp_neighbor(data, neighbors, address_families)
+
+
+@pytest.mark.parametrize('peers', [1, 7, 30])
+def test_parse_bgp_neighbor_equivalence(peers):
+    # ocnos_bgp_neighbor_facts.json holds the facts of the parser that ran
+    # every regex on every line, for capture(30)
+    with open(os.path.join(FIXTURES, 'ocnos_bgp_neighbor_facts.json')) as f:
+        expected = json.load(f)
+    expected = dict(list(expected.items())[:peers])
+
+    facts = parse_bgp_neighbor(capture(peers))
+    assert json.dumps(facts) == json.dumps(expected)
+
+
+def main():
+    peers = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    data = capture(peers)
+    timings = []
+    for dummy in range(3):
+        start = time.perf_counter()
+        parse_bgp_neighbor(data)
+        timings.append(time.perf_counter() - start)
+    print('%d peers, %d lines: %.3fs' % (peers, data.count('\n') + 1, min(timings)))
+
+
+if __name__ == '__main__':
+    main()
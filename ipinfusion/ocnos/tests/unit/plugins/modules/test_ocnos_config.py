@@ -0,0 +1,65 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS config module
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.ipinfusion.ocnos.plugins.modules import ocnos_config
+
+RUNNING = 'hostname leaf1\n!\ninterface xe1\n mtu 9216\n!'
+STARTUP = 'hostname leaf1\n!\ninterface xe1\n mtu 1500\n!'
+
+
+class FakeModule(object):
+
+    check_mode = False
+
+    def __init__(self, **params):
+        self.params = dict(cache_ttl=0, cache_dir=None, cache_key=None)
+        self.params.update(params)
+
+
+@pytest.fixture
+def device(monkeypatch):
+    """Patch the device access of ocnos_config, returns the commands run"""
+    commands = []
+
+    def run_commands(module, cmds):
+        if not isinstance(cmds, list):
+            cmds = [cmds]
+        commands.extend(cmds)
+        return [STARTUP if cmds == ['show startup-config'] else '']
+
+    monkeypatch.setattr(ocnos_config, 'get_config', lambda module, **kwargs: RUNNING)
+    monkeypatch.setattr(ocnos_config, 'get_config_indicator', lambda module: 'commit-1')
+    monkeypatch.setattr(ocnos_config, 'run_commands', run_commands)
+    return commands
+
+
+def test_save_when_modified_without_cache(device):
+    # without cache_ttl the startup-config is compared every time
+    for dummy in range(2):
+        result = dict(changed=False)
+        ocnos_config.save_config_when_modified(FakeModule(cache_key='leaf1'), result, [])
+        assert result['changed']
+    assert device == ['show startup-config', 'copy running-config startup-config\r'] * 2
+
+
+def test_save_when_modified_with_cache(device, tmp_path):
+    module = FakeModule(cache_ttl=600, cache_dir=str(tmp_path), cache_key='leaf1')
+    result = dict(changed=False)
+    ocnos_config.save_config_when_modified(module, result, [])
+    assert result['changed']
+
+    # nothing was committed since the save
+    result = dict(changed=False)
+    ocnos_config.save_config_when_modified(module, result, [])
+    assert not result['changed']
+    assert device == ['show startup-config', 'copy running-config startup-config\r']
@@ -0,0 +1,35 @@
+# Copyright (C) 2025 IP Infusion
+#
+# GNU General Public License v3.0+
+#
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# Unit tests of the OcNOS ping module helpers
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.ipinfusion.ocnos.plugins.module_utils.ocnos import BATCH_SIZE
+from ansible_collections.ipinfusion.ocnos.plugins.modules.ocnos_ping import get_ping_runtime, split_by_runtime
+
+
+def entries(*runtimes):
+    return [{"dest": "10.0.0.%d" % i, "count": count, "timeout": timeout}
+            for i, (count, timeout) in enumerate(runtimes)]
+
+
+def test_get_ping_runtime():
+    assert get_ping_runtime({"count": 5, "timeout": 2}) == 10
+    # ping waits at least a second between packets
+    assert get_ping_runtime({"count": "5", "timeout": 0}) == 5
+
+
+def test_split_by_runtime():
+    batches = split_by_runtime(entries((5, 2), (5, 2), (5, 2), (1, 1)), 30)
+    assert [[entry["dest"] for entry in batch] for batch in batches] == \
+        [["10.0.0.0", "10.0.0.1"], ["10.0.0.2", "10.0.0.3"]]
+
+
+def test_split_by_runtime_batch_size():
+    batches = split_by_runtime(entries(*[(1, 1)] * (BATCH_SIZE + 1)), 3600)
+    assert [len(batch) for batch in batches] == [BATCH_SIZE, 1]